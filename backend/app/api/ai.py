@@ -1,23 +1,24 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import os
+from typing import AsyncIterator, List
+import asyncio
 import re
 import json
-import google.generativeai as genai
-from openai import OpenAI
-from dotenv import load_dotenv
 from app.core.config import settings
+from app.core.metrics import stage
+from app.services.llm import STREAM_IDLE_TIMEOUT, LLMTimeoutError, get_llm, with_idle_timeout
+from app.services.quiz_cache import PROMPT_VERSION, quiz_cache, quiz_cache_key
+from app.services.quiz_pipeline import map_reduce_quiz
+from app.services.quiz_stream import stream_questions
+from app.services.singleflight import quiz_flights
 
-load_dotenv()
 router = APIRouter()
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
-if settings.GOOGLE_API_KEY:
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+NUM_QUESTIONS = 5
 
-def generate_quiz_from_text(text: str):
-    prompt = f"""
-    Generate 5 multiple-choice questions (MCQs) based on the following text:
+def quiz_prompt(text: str, count: int = NUM_QUESTIONS) -> str:
+    return f"""
+    Generate {count} multiple-choice questions (MCQs) based on the following text:
     {text}
 
     Format your response strictly as valid JSON like this:
@@ -30,34 +31,138 @@ def generate_quiz_from_text(text: str):
       ...
     ]
     """
-    try:
-        if settings.ENV == "production":
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-            )
-            raw_output = response.choices[0].message.content.strip()
-        else:
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            response = model.generate_content(prompt)
-            raw_output = response.text.strip()
 
+def parse_quiz_output(raw_output: str) -> list:
+    """Pull the JSON array of questions out of a model reply"""
+    with stage("quiz.parse"):
         json_match = re.search(r"\[.*\]", raw_output, re.DOTALL)
         if json_match:
             json_str = json_match.group(0)
         else:
-            json_str = raw_output 
+            json_str = raw_output
 
-        quiz_data = json.loads(json_str)
-        return {"quiz": quiz_data}
-            
-        
+        return json.loads(json_str)
+
+async def generate_questions(text: str, count: int = NUM_QUESTIONS) -> list:
+    """One provider call: `count` questions about `text`"""
+    raw_output = (await get_llm().complete([{"role": "user", "content": quiz_prompt(text, count)}])).strip()
+    try:
+        return parse_quiz_output(raw_output)
     except json.JSONDecodeError:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to parse AI response as valid JSON. Raw output:\n{raw_output}",
         )
+
+async def generate_quiz_from_text(text: str, bypass_cache: bool = False):
+    llm = get_llm()
+    cache_key = quiz_cache_key(text, topic=None, model=llm.model)
+    cached = await quiz_cache.aget(cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return {"quiz": cached}
+
+    namespace = f"{llm.name}:{llm.model}:{PROMPT_VERSION}"
+    if settings.NEAR_DUP_ENABLED and not bypass_cache:
+        # NumPy is only imported once a quiz is actually generated
+        from app.services.near_duplicates import near_duplicates, reshuffle
+        try:
+            similar = await asyncio.to_thread(near_duplicates.lookup, text, namespace)
+        except Exception as e:
+            # The index only saves a provider call; a broken one counts as a miss
+            print(f"Near-duplicate lookup failed: {e}")
+            similar = None
+        if similar is not None:
+            quiz_data = similar["quiz"]
+            if settings.NEAR_DUP_RESHUFFLE:
+                quiz_data = reshuffle(quiz_data)
+            await quiz_cache.aset(cache_key, quiz_data)
+            return {"quiz": quiz_data}
+
+    async def generate() -> list:
+        if len(text) > settings.QUIZ_CHUNK_SIZE:
+            # Long material: generate per chunk in parallel, then merge
+            quiz_data = await map_reduce_quiz(
+                text,
+                NUM_QUESTIONS,
+                generate_questions,
+                chunk_size=settings.QUIZ_CHUNK_SIZE,
+                overlap=settings.QUIZ_CHUNK_OVERLAP,
+                max_chunks=settings.QUIZ_MAX_CHUNKS,
+                parallelism=settings.QUIZ_CHUNK_PARALLELISM,
+            )
+        else:
+            quiz_data = await generate_questions(text)
+        await quiz_cache.aset(cache_key, quiz_data)
+        if settings.NEAR_DUP_ENABLED:
+            from app.services.near_duplicates import near_duplicates
+            try:
+                await asyncio.to_thread(near_duplicates.add, text, namespace, quiz_data)
+            except Exception as e:
+                print(f"Near-duplicate index update failed: {e}")
+        return quiz_data
+
+    try:
+        # Identical requests arriving while this one is generating share its provider call
+        return {"quiz": await quiz_flights.do(cache_key, generate)}
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
\ No newline at end of file
+
+async def stream_quiz_from_text(text: str, bypass_cache: bool = False) -> AsyncIterator[dict]:
+    """Yield each question of the quiz for `text` as soon as it is ready.
+
+    Short texts stream straight from the provider and every question is
+    validated as its JSON object closes. Cached quizzes and long texts that
+    go through map-reduce are replayed once complete.
+    """
+    llm = get_llm()
+    cache_key = quiz_cache_key(text, topic=None, model=llm.model)
+    cached = await quiz_cache.aget(cache_key, bypass=bypass_cache)
+    if cached is None and len(text) > settings.QUIZ_CHUNK_SIZE:
+        cached = (await generate_quiz_from_text(text, bypass_cache=True))["quiz"]
+    if cached is not None:
+        for question in cached:
+            yield question
+        return
+
+    questions = []
+    tokens = llm.stream([{"role": "user", "content": quiz_prompt(text)}])
+    try:
+        async for question in stream_questions(with_idle_timeout(tokens, STREAM_IDLE_TIMEOUT)):
+            questions.append(question.dict())
+            yield questions[-1]
+    except asyncio.TimeoutError:
+        raise LLMTimeoutError(f"AI provider sent nothing for {STREAM_IDLE_TIMEOUT}s")
+    if not questions:
+        raise ValueError("AI response did not contain any valid quiz questions")
+    await quiz_cache.aset(cache_key, questions)
+
+async def generate_quizzes(texts: List[str], concurrency: int,
+                           bypass_cache: bool = False) -> AsyncIterator[dict]:
+    """Generate a quiz per text, at most `concurrency` at a time.
+
+    Yields {"index", "quiz"} or {"index", "error"} for each text in the order
+    the generations finish. Pending generations are cancelled if the caller
+    stops iterating.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, text: str) -> dict:
+        async with semaphore:
+            try:
+                result = await generate_quiz_from_text(text, bypass_cache=bypass_cache)
+                return {"index": index, "quiz": result["quiz"]}
+            except HTTPException as e:
+                return {"index": index, "error": e.detail}
+            except Exception as e:
+                return {"index": index, "error": str(e)}
+
+    tasks = [asyncio.create_task(run(i, text)) for i, text in enumerate(texts)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+import asyncio
+from app.api.auth import require_user
+from app.core.config import settings
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+def is_admin(user: dict) -> bool:
+    """Whether the user is listed in ANALYTICS_ADMIN_EMAILS"""
+    admins = {e.strip().lower() for e in settings.ANALYTICS_ADMIN_EMAILS.split(",") if e.strip()}
+    return (user.get("email") or "").lower() in admins
+
+@router.get("")
+async def get_analytics(
+    user_id: Optional[str] = Query(None, description="Include this user's mastery curve (admins only for other users)"),
+    top: int = Query(20, ge=1, le=200, description="Number of hardest questions to list"),
+    min_attempts: int = Query(5, ge=1, description="Ignore questions with fewer answers"),
+    refresh: bool = Query(False, description="Reload answer history instead of using the cached snapshot (admins only)"),
+    user: dict = Depends(require_user),
+):
+    """Question difficulty, topic accuracy, distractor rates and a mastery curve.
+
+    Admins see the whole platform; everyone else sees statistics over their
+    own answers only.
+    """
+    # NumPy is only imported once analytics are actually requested
+    from app.services.analytics import learning_analytics
+    own_id = str(user["id"])
+    admin = is_admin(user)
+    if not admin and user_id is not None and user_id != own_id:
+        raise HTTPException(status_code=403, detail="Cannot view another user's analytics")
+    if not admin and refresh:
+        raise HTTPException(status_code=403, detail="Only admins can force an analytics reload")
+    try:
+        # Loading and crunching the history is blocking work
+        return await asyncio.to_thread(
+            learning_analytics.report, user_id=user_id if admin else own_id, top=top,
+            min_attempts=min_attempts, refresh=refresh, scope_user=None if admin else own_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
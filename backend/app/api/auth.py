@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Header
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header
 from app.models.schemas import LoginRequest, SignupRequest, AuthResponse
-from app.services.databases import db
-import os
+from app.services.async_db import async_db
+from app.services.auth_tokens import (
+    InvalidTokenError, LocalVerificationUnavailable, profile_cache, token_verifier
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -10,13 +14,13 @@ async def login(credentials: LoginRequest):
     """Login user with email and password"""
     try:
         # Authenticate with Supabase Auth
-        response = db.client.auth.sign_in_with_password({
+        response = await async_db.sign_in_with_password({
             "email": credentials.email,
             "password": credentials.password
         })
         
         # Get user profile from User table
-        user_profile = db.get_user_by_email(credentials.email)
+        user_profile = await async_db.get_user_by_email(credentials.email)
         
         print(f"Login - Email: {credentials.email}")
         print(f"Login - User profile found: {user_profile}")
@@ -46,7 +50,7 @@ async def signup(credentials: SignupRequest):
     """Sign up new user"""
     try:
         # Create auth user in Supabase Auth
-        auth_response = db.client.auth.sign_up({
+        auth_response = await async_db.sign_up({
             "email": credentials.email,
             "password": credentials.password
         })
@@ -54,7 +58,7 @@ async def signup(credentials: SignupRequest):
             raise HTTPException(status_code=400, detail="Failed to create auth user")
         
         # Create user profile in User table
-        user_profile = db.create_user_profile(
+        user_profile = await async_db.create_user_profile(
             user_id=auth_response.user.id,
             email=credentials.email,
             first_name=credentials.first_name,
@@ -79,41 +83,63 @@ async def signup(credentials: SignupRequest):
 async def logout():
     """Logout user"""
     try:
-        db.client.auth.sign_out()
+        await async_db.sign_out()
         return {"message": "Logged out successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("/me")
-async def get_current_user(authorization: str = Header(None)):
-    """Get current authenticated user"""
+async def require_user(authorization: str = Header(None)) -> dict:
+    """Dependency: the authenticated user's profile, from the Bearer token.
+
+    The token is verified locally (see TokenVerifier) and the profile comes
+    from a short-TTL cache keyed by auth ID, so a warm request makes no
+    network calls. Falls back to Supabase Auth when the token cannot be
+    checked locally.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    token = authorization.replace("Bearer ", "")
+
     try:
-        if not authorization or not authorization.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Not authenticated")
-        
-        token = authorization.replace("Bearer ", "")
-        
-        # Get user from token
-        user_response = db.client.auth.get_user(token)
+        # A JWKS refresh is a blocking HTTP call; keep it off the event loop
+        claims = await asyncio.to_thread(token_verifier.verify, token)
+        auth_id, email = claims["sub"], claims.get("email")
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
+    except LocalVerificationUnavailable:
+        try:
+            user_response = await async_db.get_auth_user(token)
+        except Exception as e:
+            raise HTTPException(status_code=401, detail=str(e))
         if not user_response or not user_response.user:
             raise HTTPException(status_code=401, detail="Invalid token")
-        
-        user = user_response.user
-        user_profile = db.get_user_by_email(user.email)
-        
+        auth_id, email = user_response.user.id, user_response.user.email
+
+    user_profile = profile_cache.get(auth_id)
+    if user_profile is None:
+        try:
+            user_profile = await async_db.get_user_by_email(email)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
         if not user_profile:
             raise HTTPException(status_code=404, detail="User profile not found")
-        
-        return {
-            "user": {
-                "id": user_profile["user_id"],  # This is the database bigint ID
-                "auth_id": user.id,              # This is the Supabase UUID
-                "email": user.email,
-                "first_name": user_profile.get("first_name"),
-                "last_name": user_profile.get("last_name")
-            }
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=str(e))
\ No newline at end of file
+        profile_cache.set(auth_id, user_profile)
+
+    return {
+        "id": user_profile["user_id"],  # This is the database bigint ID
+        "auth_id": auth_id,              # This is the Supabase UUID
+        "email": email,
+        "first_name": user_profile.get("first_name"),
+        "last_name": user_profile.get("last_name")
+    }
+
+async def optional_user(authorization: str = Header(None)) -> Optional[dict]:
+    """Dependency: like require_user, but None for requests without a Bearer token"""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return await require_user(authorization)
+
+@router.get("/me")
+async def get_current_user(user: dict = Depends(require_user)):
+    """Get current authenticated user"""
+    return {"user": user}
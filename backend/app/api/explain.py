@@ -1,29 +1,30 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from openai import OpenAI
-import google.generativeai as genai
-from dotenv import load_dotenv
-import os
+from typing import AsyncIterator, List, Optional
 import json
 import re
 import asyncio
+import time
+from app.core.config import settings
+from app.core.metrics import stage
+from app.api.auth import optional_user
+from app.models.schemas import QuizQuestion
+from app.services.conversation import build_context
+from app.services.async_db import async_db
+from app.services.jobs import QueueFullError, job_queue
+from app.services.llm import STREAM_IDLE_TIMEOUT, LLMTimeoutError, get_llm, with_idle_timeout
+from app.services.quiz_cache import quiz_cache, quiz_cache_key
+from app.services.quiz_stream import stream_questions
+from app.services.singleflight import explain_flights, quiz_flights
 
-load_dotenv()
 
 router = APIRouter()
 
-# Get environment
-ENV = os.getenv("ENV", "development")
+SYSTEM_PROMPT = "You are a friendly tutor who explains things clearly for students. Break down complex concepts into simple terms, use examples, and encourage learning."
 
-# Initialize clients
-openai_client = None
-if ENV == "production":
-    openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-else:
-    google_api_key = os.getenv("GOOGLE_API_KEY")
-    if google_api_key:
-        genai.configure(api_key=google_api_key)
+# Questions in a topic quiz
+NUM_QUESTIONS = 5
 
 class Message(BaseModel):
     role: str
@@ -31,11 +32,11 @@ class Message(BaseModel):
 
 class ExplainRequest(BaseModel):
     messages: List[Message]
+    bypass_cache: bool = False
 
-class QuizQuestion(BaseModel):
-    question: str
-    options: List[str]
-    answer: str
+def provider_metadata() -> dict:
+    llm = get_llm()
+    return {"provider": llm.name, "model": llm.model}
 
 def detect_quiz_intent(user_message: str) -> bool:
     """Detect if user wants to be quizzed"""
@@ -61,13 +62,12 @@ def extract_quiz_topic(user_message: str) -> str:
     # If no specific trigger found, return the whole message
     return user_message
 
-def generate_quiz(topic: str, context_messages: List[Message]) -> List[QuizQuestion]:
-    """Generate quiz questions based on topic and conversation context"""
-    
-    # Build context from previous messages
-    context = "\n".join([f"{msg.role}: {msg.content}" for msg in context_messages[-5:]])
-    
-    prompt = f"""Based on the conversation context and the topic "{topic}", generate 5 multiple-choice questions.
+def quiz_context(context_messages: List[Message]) -> str:
+    """Build context from previous messages"""
+    return "\n".join([f"{msg.role}: {msg.content}" for msg in context_messages[-5:]])
+
+def topic_quiz_prompt(topic: str, context: str) -> str:
+    return f"""Based on the conversation context and the topic "{topic}", generate 5 multiple-choice questions.
 
 Context:
 {context}
@@ -82,88 +82,226 @@ Generate questions that test understanding of {topic}. Format your response ONLY
 ]
 Make sure all 4 options are plausible but only one is correct."""
 
+async def bank_quiz(topic: str, user_id: Optional[str]) -> Optional[List[QuizQuestion]]:
+    """A quiz of the user's own stored questions on the topic, or None when they cannot fill one"""
+    if not settings.QUESTION_BANK_ENABLED or not user_id:
+        return None
+    try:
+        bank = await async_db.get_question_bank(user_id)
+    except Exception as e:
+        print(f"Could not load the question bank for {user_id}: {e}")
+        return None
+    if bank is None or not bank.can_fill(topic, NUM_QUESTIONS):
+        return None
+    answered = []
     try:
-        if ENV == "production":
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-            )
-            raw_output = response.choices[0].message.content.strip()
-        else:
-            model = genai.GenerativeModel("gemini-2.5-flash")
-            response = model.generate_content(prompt)
-            raw_output = response.text.strip()
+        answered = await async_db.get_answered_question_ids(user_id)
+    except Exception as e:
+        print(f"Could not load answered questions for {user_id}: {e}")
+    questions = bank.quiz(topic, NUM_QUESTIONS, answered_ids=answered)
+    return [QuizQuestion(**q) for q in questions] if questions else None
+
+async def generate_quiz(topic: str, context_messages: List[Message],
+                        bypass_cache: bool = False, user_id: Optional[str] = None) -> List[QuizQuestion]:
+    """Generate quiz questions based on topic and conversation context"""
+    context = quiz_context(context_messages)
+
+    llm = get_llm()
+    cache_key = quiz_cache_key(context, topic=topic, model=llm.model)
+    cached = await quiz_cache.aget(cache_key, bypass=bypass_cache)
+    if cached is not None:
+        return [QuizQuestion(**q) for q in cached]
+
+    # Stored questions first; the LLM only runs when the bank comes up short
+    banked = None if bypass_cache else await bank_quiz(topic, user_id)
+    if banked is not None:
+        return banked
+
+    async def generate() -> List[dict]:
+        prompt = topic_quiz_prompt(topic, context)
+        raw_output = (await llm.complete([{"role": "user", "content": prompt}])).strip()
 
         # Extract JSON from response
-        json_match = re.search(r"\[.*\]", raw_output, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(0)
-        else:
-            json_str = raw_output
-
-        quiz_data = json.loads(json_str)
-        return [QuizQuestion(**q) for q in quiz_data]
-        
+        with stage("quiz.parse"):
+            json_match = re.search(r"\[.*\]", raw_output, re.DOTALL)
+            if json_match:
+                json_str = json_match.group(0)
+            else:
+                json_str = raw_output
+
+            quiz_data = json.loads(json_str)
+            questions = [QuizQuestion(**q).dict() for q in quiz_data]
+        await quiz_cache.aset(cache_key, questions)
+        return questions
+
+    try:
+        # Identical requests arriving while this one is generating share its provider call
+        return [QuizQuestion(**q) for q in await quiz_flights.do(cache_key, generate)]
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate quiz: {str(e)}")
 
+async def stream_quiz(topic: str, context_messages: List[Message],
+                      bypass_cache: bool = False, user_id: Optional[str] = None) -> AsyncIterator[QuizQuestion]:
+    """Like generate_quiz, but yields each question as soon as the model finishes it"""
+    context = quiz_context(context_messages)
+
+    llm = get_llm()
+    cache_key = quiz_cache_key(context, topic=topic, model=llm.model)
+    cached = await quiz_cache.aget(cache_key, bypass=bypass_cache)
+    if cached is None and not bypass_cache:
+        banked = await bank_quiz(topic, user_id)
+        cached = [q.dict() for q in banked] if banked is not None else None
+    if cached is not None:
+        for q in cached:
+            yield QuizQuestion(**q)
+        return
+
+    questions = []
+    tokens = llm.stream([{"role": "user", "content": topic_quiz_prompt(topic, context)}])
+    async for question in stream_questions(with_idle_timeout(tokens, STREAM_IDLE_TIMEOUT)):
+        questions.append(question)
+        yield question
+    if not questions:
+        raise ValueError("AI response did not contain any valid quiz questions")
+    await quiz_cache.aset(cache_key, [q.dict() for q in questions])
+
+def explain_context(messages: List[Message]) -> List[dict]:
+    """History trimmed to the configured token budget, ready for a single provider call"""
+    return build_context(
+        messages,
+        token_budget=settings.EXPLAIN_CONTEXT_TOKEN_BUDGET,
+        max_turn_tokens=settings.EXPLAIN_MAX_TURN_TOKENS,
+    )
+
+def user_id_of(user: Optional[dict]) -> Optional[str]:
+    """The signed-in user's ID; topic quizzes from the bank skip questions they have answered"""
+    return str(user["id"]) if user else None
+
+async def explain_reply(request: ExplainRequest, user_id: Optional[str] = None) -> dict:
+    """The /explain response: a quiz when one is asked for, otherwise an explanation"""
+    # Get the last user message
+    last_message = request.messages[-1].content
+
+    # Check if user wants a quiz
+    if detect_quiz_intent(last_message):
+        topic = extract_quiz_topic(last_message)
+        quiz_questions = await generate_quiz(topic, request.messages[:-1], request.bypass_cache,
+                                             user_id)
+
+        return {
+            "answer": f"Great! Let's test your knowledge about {topic}. I've prepared a quiz for you.",
+            "quiz": [q.dict() for q in quiz_questions],
+            "quiz_topic": topic
+        }
+
+    # Regular explanation mode: the whole history goes out in one call
+    llm = get_llm()
+    context = explain_context(request.messages)
+    flight_key = (llm.name, llm.model, json.dumps(context))
+    try:
+        answer = await explain_flights.do(
+            flight_key, lambda: llm.complete(context, system=SYSTEM_PROMPT)
+        )
+    except LLMTimeoutError:
+        raise HTTPException(status_code=504, detail="AI provider took too long to respond")
+
+    return {"answer": answer}
+
+async def run_explain_job(payload: dict) -> dict:
+    return await explain_reply(ExplainRequest(**payload), payload.get("user_id"))
+
+job_queue.register("explain", run_explain_job)
+
 @router.post("/explain")
-async def explain_mode(request: ExplainRequest):
-    system_prompt = "You are a friendly tutor who explains things clearly for students. Break down complex concepts into simple terms, use examples, and encourage learning."
-    
+async def explain_mode(request: ExplainRequest, user: Optional[dict] = Depends(optional_user)):
     try:
-        # Get the last user message
-        last_message = request.messages[-1].content
-        
-        # Check if user wants a quiz
-        if detect_quiz_intent(last_message):
-            topic = extract_quiz_topic(last_message)
-            quiz_questions = generate_quiz(topic, request.messages[:-1])
-            
-            return {
-                "answer": f"Great! Let's test your knowledge about {topic}. I've prepared a quiz for you.",
-                "quiz": [q.dict() for q in quiz_questions],
-                "quiz_topic": topic
-            }
-        
-        # Regular explanation mode
-        if ENV == "production":
-            response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    *[{"role": msg.role, "content": msg.content} for msg in request.messages]
-                ],
-                temperature=0.7,
-            )
-            answer = response.choices[0].message.content
-        else:
-            model = genai.GenerativeModel(
-                "gemini-2.5-flash",
-                system_instruction=system_prompt
-            )
-            
-            chat = model.start_chat(history=[])
-            
-            for i, msg in enumerate(request.messages[:-1]):
-                if msg.role == "user":
-                    chat.send_message(msg.content)
-
-            try:
-                response = await asyncio.wait_for(
-                    asyncio.to_thread(chat.send_message, request.messages[-1].content),
-                    timeout=60
-                )
-                answer = response.text
-            except asyncio.TimeoutError:
-                raise HTTPException(status_code=504, detail="Gemini took too long to respond")
-            
-            response = chat.send_message(request.messages[-1].content)
-            answer = response.text
-        
-        return {"answer": answer}
-        
+        return await explain_reply(request, user_id_of(user))
+    except HTTPException:
+        raise
     except Exception as e:
         print("❌ Backend Error:", str(e))
-        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def explain_events(request: ExplainRequest, user_id: Optional[str] = None) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    last_message = request.messages[-1].content
+
+    if detect_quiz_intent(last_message):
+        topic = extract_quiz_topic(last_message)
+        yield sse_event("token", {
+            "text": f"Great! Let's test your knowledge about {topic}. I've prepared a quiz for you."
+        })
+        quiz_questions = []
+        try:
+            async for question in stream_quiz(topic, request.messages[:-1], request.bypass_cache,
+                                              user_id):
+                quiz_questions.append(question)
+                yield sse_event("question", {"index": len(quiz_questions) - 1, **question.dict()})
+        except Exception as e:
+            print("❌ Backend Error:", str(e))
+            yield sse_event("error", {"detail": f"Failed to generate quiz: {str(e)}"})
+            return
+        yield sse_event("quiz", {
+            "quiz": [q.dict() for q in quiz_questions],
+            "quiz_topic": topic
+        })
+        yield sse_event("done", {
+            **provider_metadata(),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        })
+        return
+
+    first_token_ms = None
+    chunks = 0
+    chars = 0
+    try:
+        tokens = get_llm().stream(explain_context(request.messages), system=SYSTEM_PROMPT)
+        async for text in with_idle_timeout(tokens, STREAM_IDLE_TIMEOUT):
+            if first_token_ms is None:
+                first_token_ms = round((time.perf_counter() - started) * 1000)
+            chunks += 1
+            chars += len(text)
+            yield sse_event("token", {"text": text})
+    except (asyncio.TimeoutError, LLMTimeoutError):
+        yield sse_event("error", {"detail": "AI provider stopped responding"})
+        return
+    except Exception as e:
+        print("❌ Backend Error:", str(e))
+        yield sse_event("error", {"detail": f"Error: {str(e)}"})
+        return
+
+    yield sse_event("done", {
+        **provider_metadata(),
+        "first_token_ms": first_token_ms,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000),
+        "chunks": chunks,
+        "chars": chars,
+    })
+
+@router.post("/explain/jobs", status_code=202)
+async def explain_job(request: ExplainRequest, user: Optional[dict] = Depends(optional_user)):
+    """Queue the /explain work and return its job at once; poll /api/jobs/{job_id} for the reply"""
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="messages must not be empty")
+    try:
+        payload = {**request.dict(), "user_id": user_id_of(user)}
+        return {"job": await job_queue.submit("explain", payload)}
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/explain/stream")
+async def explain_stream(request: ExplainRequest, user: Optional[dict] = Depends(optional_user)):
+    """Stream the explanation as SSE: token events, then a done event with metadata"""
+    if not request.messages:
+        raise HTTPException(status_code=400, detail="messages must not be empty")
+    return StreamingResponse(
+        explain_events(request, user_id_of(user)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException, Query
+from app.core.config import settings
+from app.services.jobs import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(0, ge=0, description="Seconds to hold the request open until the job finishes"),
+):
+    """Status of a background job, with its result once it has succeeded"""
+    try:
+        timeout = min(wait, settings.JOB_MAX_WAIT_SECONDS)
+        job = await job_queue.wait(job_id, timeout) if timeout else await job_queue.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return {"job": job}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,13 +1,48 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.api import users, message, progress, question, quiz, study_material, user_answer, sessions, auth
-from app.api import ai, explain
+from app.api import ai, explain, analytics, jobs
 from fastapi.middleware.cors import CORSMiddleware
 # from fastapi.responses import FileResponse
 from fastapi.responses import Response
 # from mangum import Mangum
+from app.services.supabase_client import supabase_pool
+from app.services.async_db import async_db
+from app.services.databases import db
+from app.services.activity import session_activity
+from app.services.jobs import job_queue
+from app.services.question_bank import question_banks
+from app.services.auth_tokens import profile_cache
+from app.services.singleflight import explain_flights, quiz_flights
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.config import settings
+from app.services.warmup import warm_up
 
 
-app = FastAPI(title="QuizCraft API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ON_STARTUP:
+        print(f"Warm-up (ms): {warm_up()}")
+    session_activity.start()
+    # Attach to the service requests go through, which benchmarks may have swapped
+    service = async_db._service
+    service.activity = session_activity
+    if not job_queue.durable:
+        print(f"Warning: JOB_DB_PATH {settings.JOB_DB_PATH} is in the temp dir; jobs will not survive a restart")
+    job_queue.start()
+    if settings.QUESTION_BANK_ENABLED:
+        # Each user's bank is built on their first topic quiz, never at startup
+        service.question_banks = question_banks
+    yield
+    service.question_banks = None
+    await job_queue.stop()
+    service.activity = None
+    await session_activity.stop()
+    async_db.close()
+    supabase_pool.close()
+
+
+app = FastAPI(title="QuizCraft API", lifespan=lifespan)
 favicon_path = 'favicon.ico'
 origins = [
     "http://localhost:3000",
@@ -23,6 +58,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 @app.get("/favicon.ico", include_in_schema=False)
 @app.get("/favicon.png", include_in_schema=False)
@@ -38,9 +74,16 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/db")
+async def health_db():
+    return await async_db.run(supabase_pool.health_check)
+
 @app.get("/debug/config")
 async def debug_config():
-    from app.core.config import settings
     return {
         "supabase_url": settings.SUPABASE_URL[:20] + "..." if settings.SUPABASE_URL else "MISSING",
         "supabase_key": "SET" if settings.SUPABASE_KEY else "MISSING",
@@ -51,6 +94,31 @@ async def debug_config():
 
 
 
+@app.get("/debug/cache")
+async def debug_cache():
+    from app.services.quiz_cache import quiz_cache
+    stats = {
+        "quiz_generation": quiz_cache.stats(),
+        "quiz_content": db.content_cache.stats(),
+        "auth_profiles": profile_cache.stats(),
+        "quiz_flights": quiz_flights.stats(),
+        "explain_flights": explain_flights.stats(),
+        "question_bank": question_banks.stats(),
+    }
+    if settings.NEAR_DUP_ENABLED:
+        from app.services.near_duplicates import near_duplicates
+        stats["near_duplicates"] = near_duplicates.stats()
+    return stats
+
+@app.get("/debug/activity")
+async def debug_activity():
+    return session_activity.stats()
+
+@app.get("/debug/jobs")
+async def debug_jobs():
+    return await job_queue.stats()
+
+
 app.include_router(sessions.router, prefix="/api", tags=["chat_sessions"])
 app.include_router(message.router, prefix="/api", tags=["messages"])
 app.include_router(progress.router, prefix="/api", tags=["progress"])
@@ -66,6 +134,8 @@ app.include_router(quiz.router)
 app.include_router(question.router)
 app.include_router(user_answer.router)
 app.include_router(auth.router)
+app.include_router(analytics.router)
+app.include_router(jobs.router)
 
 
 
@@ -1,16 +1,42 @@
 from fastapi import APIRouter, HTTPException, Query
+from app.core.config import settings
 from app.models.schemas import MessageCreate, MessageResponse
-from app.services.databases import db
-from typing import List
+from app.services.async_db import async_db
+from app.services.pagination import InvalidCursorError
+from app.services.projections import InvalidFieldsError, parse_fields
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
 @router.get("")
-async def list_messages(session_id: str = Query(..., description="Session ID")):
-    """Get all messages for a session"""
+async def list_messages(
+    session_id: str = Query(..., description="Session ID"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT, description="Page size"),
+    before: Optional[str] = Query(None, description="Cursor: older messages"),
+    after: Optional[str] = Query(None, description="Cursor: newer messages"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
+    """Get messages for a session in chronological order.
+
+    With limit or a cursor, returns one page (the latest messages when no cursor is given).
+    """
     try:
-        messages = db.get_session_messages(session_id)
-        return {"messages": messages}
+        if limit is None and not before and not after:
+            messages = await async_db.get_session_messages(
+                session_id, columns=parse_fields("Message", fields)
+            )
+            return {"messages": messages}
+        page = await async_db.get_session_messages_page(
+            session_id, limit or settings.PAGE_DEFAULT_LIMIT, before=before, after=after,
+            columns=parse_fields("Message", fields, required=("timestamp", "message_id"))
+        )
+        return {
+            "messages": page["items"],
+            "next_cursor": page["next_cursor"],
+            "prev_cursor": page["prev_cursor"]
+        }
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -18,7 +44,7 @@ async def list_messages(session_id: str = Query(..., description="Session ID")):
 async def create_message(message: MessageCreate):
     """Create a new message"""
     try:
-        new_message = db.create_message(
+        new_message = await async_db.create_message(
             session_id=message.session_id,
             sender=message.sender,
             content=message.content,
@@ -1,13 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.auth import require_user
 from app.services.supabase_client import get_supabase
+from app.services.async_db import async_db
 from app.schemas.progress import ProgressCreate
 router = APIRouter()
 
 @router.get("/progress")
-def get_progress():
-    supabase = get_supabase()
-    response = supabase.table("Progress").select("*").execute()
-    return response.data
+async def get_progress(user: dict = Depends(require_user)):
+    """Get the signed-in user's running quiz totals"""
+    try:
+        return await async_db.get_user_progress(str(user["id"]))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/progress")
 def create_progress(progress:ProgressCreate):
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query, Body
 from app.models.schemas import QuestionCreate
-from app.services.databases import db
-from typing import List
+from app.services.async_db import async_db
+from app.services.projections import InvalidFieldsError, parse_fields
+from typing import List, Optional
 
 router = APIRouter(prefix="/api/questions", tags=["questions"])
 
@@ -9,10 +10,11 @@ router = APIRouter(prefix="/api/questions", tags=["questions"])
 async def create_question(question: QuestionCreate):
     """Create a single question"""
     try:
-        new_question = db.create_question(
+        new_question = await async_db.create_question(
             quiz_id=question.quiz_id,
             quiz_question=question.quiz_question,
-            correct_answer=question.correct_answer
+            correct_answer=question.correct_answer,
+            options=question.options
         )
         return {"question": new_question}
     except Exception as e:
@@ -22,24 +24,29 @@ async def create_question(question: QuestionCreate):
 async def create_questions_batch(questions: List[QuestionCreate]):
     """Create multiple questions at once"""
     try:
+        # Rows without options leave the column out; DatabaseService drops it altogether
+        # when the question_options migration has not been applied
         questions_data = [
-            {
-                "quiz_id": q.quiz_id,
-                "quiz_question": q.quiz_question,
-                "correct_answer": q.correct_answer
-            }
+            q.dict(exclude_none=True)
             for q in questions
         ]
-        new_questions = db.create_questions_batch(questions_data)
+        new_questions = await async_db.create_questions_batch(questions_data)
         return {"questions": new_questions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("")
-async def list_questions(quiz_id: str = Query(..., description="Quiz ID")):
+async def list_questions(
+    quiz_id: str = Query(..., description="Quiz ID"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
     """Get all questions for a quiz"""
     try:
-        questions = db.get_quiz_questions(quiz_id)
+        questions = await async_db.get_quiz_questions(
+            quiz_id, columns=parse_fields("Question", fields)
+        )
         return {"questions": questions}
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
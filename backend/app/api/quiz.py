@@ -1,18 +1,27 @@
-from fastapi import APIRouter
-from app.services.supabase_client import get_supabase
-from app.schemas.quiz import QuizCreate
-from app.api.ai import generate_quiz_from_text
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional
+import json
+from app.core.config import settings
+from app.models.schemas import (
+    QuizCreate, QuizUpdate, QuestionCreate, UserAnswerCreate, QuizSubmission
+)
+from app.api.ai import generate_quiz_from_text, generate_quizzes, stream_quiz_from_text
+from app.services.async_db import async_db
+from app.services.databases import QuizAlreadyFinishedError
+from app.services.jobs import QueueFullError, job_queue
+from app.services.projections import InvalidFieldsError, parse_fields
+from app.services.supabase_client import get_supabase
 
 class NoteInput(BaseModel):
     text: str
+    bypass_cache: bool = False
 
-from fastapi import APIRouter, HTTPException, Query
-from app.models.schemas import (
-    QuizCreate, QuizUpdate, QuestionCreate, UserAnswerCreate
-)
-from app.services.databases import db
-from typing import List
+class BatchNoteInput(BaseModel):
+    texts: List[str]
+    bypass_cache: bool = False
+    max_concurrency: Optional[int] = None
 
 router = APIRouter(prefix="/api/quizzes", tags=["quizzes"])
 
@@ -20,7 +29,7 @@ router = APIRouter(prefix="/api/quizzes", tags=["quizzes"])
 async def create_quiz(quiz: QuizCreate):
     """Create a new quiz"""
     try:
-        new_quiz = db.create_quiz(
+        new_quiz = await async_db.create_quiz(
             session_id=quiz.session_id,
             no_of_questions=quiz.no_of_questions
         )
@@ -32,7 +41,7 @@ async def create_quiz(quiz: QuizCreate):
 async def get_quiz(quiz_id: str):
     """Get a quiz by ID"""
     try:
-        quiz = db.get_quiz(quiz_id)
+        quiz = await async_db.get_quiz(quiz_id)
         if not quiz:
             raise HTTPException(status_code=404, detail="Quiz not found")
         return {"quiz": quiz}
@@ -42,11 +51,18 @@ async def get_quiz(quiz_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("")
-async def list_quizzes(session_id: str = Query(..., description="Session ID")):
+async def list_quizzes(
+    session_id: str = Query(..., description="Session ID"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
     """Get all quizzes for a session"""
     try:
-        quizzes = db.get_session_quizzes(session_id)
+        quizzes = await async_db.get_session_quizzes(
+            session_id, columns=parse_fields("Quiz", fields)
+        )
         return {"quizzes": quizzes}
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -54,7 +70,7 @@ async def list_quizzes(session_id: str = Query(..., description="Session ID")):
 async def update_quiz(quiz_id: str, update: QuizUpdate):
     """Update quiz score and completion status"""
     try:
-        updated = db.update_quiz(
+        updated = await async_db.update_quiz(
             quiz_id=quiz_id,
             score=update.score,
             is_finished=update.is_finished
@@ -64,20 +80,111 @@ async def update_quiz(quiz_id: str, update: QuizUpdate):
         return {"quiz": updated}
     except HTTPException:
         raise
+    except QuizAlreadyFinishedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/{quiz_id}/submit")
+async def submit_quiz(quiz_id: str, submission: QuizSubmission):
+    """Grade and store all answers and finish the quiz in one call"""
+    try:
+        result = await async_db.submit_quiz(
+            quiz_id, [answer.model_dump() for answer in submission.answers]
+        )
+        if not result:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        quiz = result["quiz"]
+        return {
+            "quiz": quiz,
+            "answers": result["answers"],
+            "score": quiz["score"],
+            "total": quiz["no_of_questions"]
+        }
+    except HTTPException:
+        raise
+    except QuizAlreadyFinishedError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate-quiz")
-def generate_quiz(input: NoteInput):
-    quiz_data = generate_quiz_from_text(input.text)
+async def generate_quiz(input: NoteInput):
+    quiz_data = await generate_quiz_from_text(input.text, bypass_cache=input.bypass_cache)
     return {"quiz": quiz_data}
 
+async def run_generate_quiz_job(payload: dict) -> dict:
+    return await generate_quiz_from_text(payload["text"], bypass_cache=payload.get("bypass_cache", False))
+
+job_queue.register("generate_quiz", run_generate_quiz_job)
+
+@router.post("/generate-quiz/jobs", status_code=202)
+async def generate_quiz_job(input: NoteInput):
+    """Queue a quiz generation and return its job at once; poll /api/jobs/{job_id} for the quiz"""
+    try:
+        return {"job": await job_queue.submit("generate_quiz", input.dict())}
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.post("/generate-quiz/stream")
+async def generate_quiz_stream(input: NoteInput):
+    """Stream the quiz as NDJSON: one line per question as soon as it parses, then a summary line"""
+
+    async def lines():
+        count = 0
+        try:
+            async for question in stream_quiz_from_text(input.text, bypass_cache=input.bypass_cache):
+                yield json.dumps({"index": count, "question": question}) + "\n"
+                count += 1
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield json.dumps({"error": detail}) + "\n"
+            return
+        yield json.dumps({"done": True, "count": count}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def batch_concurrency(input: BatchNoteInput) -> int:
+    if not input.texts:
+        raise HTTPException(status_code=400, detail="texts must not be empty")
+    if len(input.texts) > settings.QUIZ_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUIZ_BATCH_MAX_ITEMS} texts per batch",
+        )
+    requested = input.max_concurrency or settings.QUIZ_BATCH_CONCURRENCY
+    return max(1, min(requested, settings.QUIZ_BATCH_MAX_CONCURRENCY))
+
+@router.post("/generate-quiz/batch")
+async def generate_quiz_batch(input: BatchNoteInput):
+    """Generate quizzes for many texts concurrently; results keep the input order"""
+    concurrency = batch_concurrency(input)
+    results = [
+        result async for result in generate_quizzes(input.texts, concurrency, input.bypass_cache)
+    ]
+    results.sort(key=lambda result: result["index"])
+    failed = sum(1 for result in results if "error" in result)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+@router.post("/generate-quiz/batch/stream")
+async def generate_quiz_batch_stream(input: BatchNoteInput):
+    """Like /generate-quiz/batch, but streams one NDJSON line per text as it finishes"""
+    concurrency = batch_concurrency(input)
+
+    async def lines():
+        async for result in generate_quizzes(input.texts, concurrency, input.bypass_cache):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.get("/session/{session_id}")
 async def get_quiz_by_session(session_id: str):
     try:
         print(f"Fetching quiz for session_id: {session_id}")
         supabase = get_supabase()
-        response = supabase.table("Quiz").select("*").eq("session_id", session_id).execute()
+        response = await async_db.run(
+            supabase.table("Quiz").select("*").eq("session_id", session_id).execute
+        )
         print("Supabase raw response:", response)
 
         if not response.data:
@@ -95,16 +202,17 @@ async def get_quiz_by_session(session_id: str):
         raise HTTPException(status_code=500, detail="Failed to fetch quiz")
     
 @router.get("/{quiz_id}/questions")
-async def get_quiz_questions(quiz_id: int):
+async def get_quiz_questions(quiz_id: str):
     try:
-        supabase = get_supabase()
-        response = supabase.table("Question").select("*").eq("quiz_id", quiz_id).order("id", asc=True).execute()
+        questions = await async_db.get_quiz_questions(quiz_id)
 
-        if not response.data:
+        if not questions:
             raise HTTPException(status_code=404, detail="No questions found")
 
-        return {"questions": response.data}
+        return {"questions": questions}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching questions for quiz {quiz_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch questions")
@@ -112,14 +220,15 @@ async def get_quiz_questions(quiz_id: int):
 @router.get("/{quiz_id}/answers")
 async def get_quiz_answers(quiz_id: int):
     try:
-        supabase = get_supabase()
-        response = supabase.table("Answer").select("*").eq("quiz_id", quiz_id).order("id", asc=True).execute()
+        answers = await async_db.get_quiz_answers(str(quiz_id))
 
-        if not response.data:
+        if not answers:
             raise HTTPException(status_code=404, detail="No answers found")
 
-        return {"answers": response.data}
+        return {"answers": answers}
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching answers for quiz {quiz_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch answers")
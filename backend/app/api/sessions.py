@@ -1,16 +1,66 @@
 from fastapi import APIRouter, HTTPException, Query
+from app.core.config import settings
 from app.models.schemas import SessionCreate, SessionUpdate, SessionResponse
-from app.services.databases import db
-from typing import List
+from app.services.async_db import async_db
+from app.services.pagination import InvalidCursorError
+from app.services.projections import InvalidFieldsError, parse_fields
+from typing import List, Optional
+import asyncio
 
 router = APIRouter(prefix="/api/sessions", tags=["sessions"])
 
 @router.get("")
-async def list_sessions(user_id: str = Query(..., description="User UUID")):
-    """Get all sessions for a user"""
+async def list_sessions(
+    user_id: str = Query(..., description="User UUID"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PAGE_MAX_LIMIT, description="Page size"),
+    before: Optional[str] = Query(None, description="Cursor: sessions before this one"),
+    after: Optional[str] = Query(None, description="Cursor: sessions after this one"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
+    """Get sessions for a user, most recently active first; paginated when limit or a cursor is given"""
     try:
-        sessions = db.get_user_sessions(user_id)
-        return {"sessions": sessions}
+        if limit is None and not before and not after:
+            sessions = await async_db.get_user_sessions(
+                user_id, columns=parse_fields("Chat_Session", fields)
+            )
+            return {"sessions": sessions}
+        page = await async_db.get_user_sessions_page(
+            user_id, limit or settings.PAGE_DEFAULT_LIMIT, before=before, after=after,
+            columns=parse_fields("Chat_Session", fields, required=("last_active_at", "session_id"))
+        )
+        return {
+            "sessions": page["items"],
+            "next_cursor": page["next_cursor"],
+            "prev_cursor": page["prev_cursor"]
+        }
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{session_id}/bootstrap")
+async def bootstrap_session(
+    session_id: str,
+    message_limit: int = Query(settings.PAGE_DEFAULT_LIMIT, ge=1, le=settings.PAGE_MAX_LIMIT,
+                               description="Number of most recent messages to include"),
+):
+    """Everything needed to open a chat: the session, its latest messages and its quizzes with questions and answers"""
+    try:
+        session, messages, quizzes = await asyncio.gather(
+            async_db.get_session(session_id),
+            async_db.get_session_messages_page(session_id, message_limit),
+            async_db.get_session_quizzes_detail(session_id),
+        )
+        if not session:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return {
+            "session": session,
+            "messages": messages["items"],
+            "older_messages_cursor": messages["prev_cursor"],
+            "quizzes": quizzes
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -18,7 +68,7 @@ async def list_sessions(user_id: str = Query(..., description="User UUID")):
 async def create_session(session: SessionCreate):
     """Create a new chat session"""
     try:
-        new_session = db.create_session(
+        new_session = await async_db.create_session(
             user_id=session.user_id,
             title=session.title,
             mode=session.mode
@@ -31,7 +81,7 @@ async def create_session(session: SessionCreate):
 async def update_session(session_id: str, update: SessionUpdate):
     """Update session title"""
     try:
-        updated = db.update_session(session_id, title=update.title)
+        updated = await async_db.update_session(session_id, title=update.title)
         if not updated:
             raise HTTPException(status_code=404, detail="Session not found")
         return {"session": updated}
@@ -44,7 +94,7 @@ async def update_session(session_id: str, update: SessionUpdate):
 async def delete_session(session_id: str):
     """Delete a session and all its messages"""
     try:
-        success = db.delete_session(session_id)
+        success = await async_db.delete_session(session_id)
         if not success:
             raise HTTPException(status_code=404, detail="Session not found")
         return {"message": "Session deleted successfully"}
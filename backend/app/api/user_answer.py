@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from app.models.schemas import UserAnswerCreate
-from app.services.databases import db
+from app.services.async_db import async_db
+from app.services.projections import InvalidFieldsError, parse_fields
+from typing import Optional
 
 router = APIRouter(prefix="/api/answers", tags=["answers"])
 
@@ -8,7 +10,7 @@ router = APIRouter(prefix="/api/answers", tags=["answers"])
 async def create_answer(answer: UserAnswerCreate):
     """Create a user answer"""
     try:
-        new_answer = db.create_user_answer(
+        new_answer = await async_db.create_user_answer(
             question_id=answer.question_id,
             answer=answer.answer,
             is_correct=answer.is_correct
@@ -21,7 +23,7 @@ async def create_answer(answer: UserAnswerCreate):
 async def get_answer(question_id: str):
     """Get user's answer for a specific question"""
     try:
-        answer = db.get_question_answer(question_id)
+        answer = await async_db.get_question_answer(question_id)
         if not answer:
             raise HTTPException(status_code=404, detail="Answer not found")
         return {"answer": answer}
@@ -31,10 +33,17 @@ async def get_answer(question_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/quiz/{quiz_id}")
-async def get_quiz_answers(quiz_id: str):
+async def get_quiz_answers(
+    quiz_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated columns to return"),
+):
     """Get all user answers for a quiz"""
     try:
-        answers = db.get_quiz_answers(quiz_id)
+        answers = await async_db.get_quiz_answers(
+            quiz_id, columns=parse_fields("User_Answer", fields)
+        )
         return {"answers": answers}
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from pydantic_settings import BaseSettings
 
 
@@ -8,6 +11,115 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str | None = None
     ENV: str = "development"
     NEXT_PUBLIC_API_BASE_URL: str | None = None
+    # Shared Supabase HTTP pool: max open connections, idle keep-alive and request timeout (seconds)
+    SUPABASE_POOL_SIZE: int = 16
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP_TIMEOUT: float = 10.0
+    # Least time between two rebuilds of the pool after connection errors (seconds)
+    SUPABASE_RECONNECT_INTERVAL: float = 5.0
+    # Async data layer: max DB calls in flight per worker and per-call timeout (seconds)
+    DB_MAX_CONCURRENCY: int = 16
+    DB_CALL_TIMEOUT: float = 15.0
+    # Explain history sent to the LLM: total token budget and cap per turn
+    EXPLAIN_CONTEXT_TOKEN_BUDGET: int = 6000
+    EXPLAIN_MAX_TURN_TOKENS: int = 1500
+    # Generated-quiz cache; QUIZ_CACHE_DB_PATH enables the on-disk SQLite tier
+    QUIZ_CACHE_ENABLED: bool = True
+    QUIZ_CACHE_MAX_ENTRIES: int = 512
+    QUIZ_CACHE_TTL_SECONDS: float = 7 * 24 * 3600
+    QUIZ_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+    QUIZ_CACHE_DB_PATH: str | None = None
+    QUIZ_CACHE_DISK_MAX_ENTRIES: int = 10000
+    # LLM provider: "openai", "gemini" or "fake" (default: openai in production, gemini otherwise)
+    LLM_PROVIDER: str | None = None
+    LLM_MODEL: str | None = None
+    LLM_TIMEOUT: float = 60.0
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BACKOFF: float = 0.5
+    # Fake provider: seconds per call and an optional fixed reply
+    LLM_FAKE_LATENCY: float = 0.5
+    LLM_FAKE_RESPONSE: str | None = None
+    # Bulk quiz generation: default/max concurrent LLM calls and max texts per batch
+    QUIZ_BATCH_CONCURRENCY: int = 8
+    QUIZ_BATCH_MAX_CONCURRENCY: int = 32
+    QUIZ_BATCH_MAX_ITEMS: int = 100
+    # Map-reduce generation for long texts: chunk size/overlap (characters), max chunks, parallel calls
+    QUIZ_CHUNK_SIZE: int = 12000
+    QUIZ_CHUNK_OVERLAP: int = 500
+    QUIZ_MAX_CHUNKS: int = 12
+    QUIZ_CHUNK_PARALLELISM: int = 4
+    # Seconds to batch session last_active_at touches before one bulk write (0 = write on every message)
+    SESSION_TOUCH_DEBOUNCE: float = 5.0
+    # Keyset pagination: page size when a cursor is given without a limit, and the largest allowed limit
+    PAGE_DEFAULT_LIMIT: int = 50
+    PAGE_MAX_LIMIT: int = 200
+
+    # Read-through cache for Question rows and, briefly (they are mutable and other
+    # processes may finish the quiz), Quiz rows
+    QUIZ_CONTENT_CACHE_MAX_ENTRIES: int = 2048
+    QUIZ_CONTENT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    QUIZ_CONTENT_CACHE_TTL_SECONDS: float = 600
+    QUIZ_ROW_CACHE_TTL_SECONDS: float = 3
+
+    # Local JWT verification: HS256 project secret and/or JWKS (defaults to SUPABASE_URL's), key set refresh (seconds)
+    SUPABASE_JWT_SECRET: str | None = None
+    SUPABASE_JWKS_URL: str | None = None
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    JWKS_CACHE_SECONDS: float = 600
+    # Profiles of authenticated users, keyed by auth ID
+    AUTH_PROFILE_CACHE_TTL_SECONDS: float = 60
+    AUTH_PROFILE_CACHE_MAX_ENTRIES: int = 10000
+
+    # Learning analytics: rows per bulk-load request and how long a loaded snapshot is reused (seconds)
+    ANALYTICS_PAGE_SIZE: int = 1000
+    ANALYTICS_CACHE_SECONDS: float = 300
+    # Emails (comma-separated) that may see every user's analytics and force a reload, at most once per interval
+    ANALYTICS_ADMIN_EMAILS: str = ""
+    ANALYTICS_MIN_REFRESH_SECONDS: float = 60
+
+    # /metrics instrumentation; TRACE_SPANS also prints each request's stage timings as a JSON line
+    METRICS_ENABLED: bool = True
+    TRACE_SPANS: bool = False
+
+    # Build the Supabase pool, LLM SDK, PyJWT and NumPy at startup instead of on first use
+    WARMUP_ON_STARTUP: bool = False
+
+    # Background jobs (quiz generation): SQLite file, worker tasks per process, attempts and backoff (seconds).
+    # The default is in the temp dir, which stays writable on read-only deploys but is wiped on restart
+    # (e.g. every Render deploy), losing queued jobs and results; point JOB_DB_PATH at a persistent disk in production.
+    JOB_DB_PATH: str = os.path.join(tempfile.gettempdir(), "quizcraft-jobs.sqlite3")
+    JOB_WORKERS: int = 4
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 2.0
+    # Waiting jobs before submissions are refused, seconds before a running job's worker is presumed dead,
+    # how long finished jobs are kept, idle worker re-check interval and the longest long-poll
+    JOB_MAX_QUEUED: int = 1000
+    JOB_LEASE_SECONDS: float = 600
+    JOB_RESULT_TTL_SECONDS: float = 24 * 3600
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_MAX_WAIT_SECONDS: float = 30
+
+    # Near-duplicate quiz reuse: texts at or above NEAR_DUP_THRESHOLD (estimated Jaccard of word shingles)
+    # to an earlier one get its quiz, reshuffled, instead of a new generation. 64 permutations in 16 bands
+    # of 4 catch almost every pair above 0.7; the SQLite file (temp dir by default) keeps signatures and
+    # quizzes across restarts
+    NEAR_DUP_ENABLED: bool = True
+    NEAR_DUP_THRESHOLD: float = 0.8
+    NEAR_DUP_DB_PATH: str = os.path.join(tempfile.gettempdir(), "quizcraft-near-duplicates.sqlite3")
+    NEAR_DUP_NUM_PERM: int = 64
+    NEAR_DUP_BANDS: int = 16
+    NEAR_DUP_SHINGLE_SIZE: int = 3
+    NEAR_DUP_MIN_WORDS: int = 30
+    NEAR_DUP_RESHUFFLE: bool = True
+
+    # Topic quizzes from the user's own stored questions (those saved with options) before asking the LLM;
+    # MIN_COVERAGE is the share of topic words a question must contain. Each user's bank is built on
+    # first use and kept for TTL_SECONDS, for at most MAX_USERS users per process
+    QUESTION_BANK_ENABLED: bool = True
+    QUESTION_BANK_MIN_COVERAGE: float = 0.6
+    QUESTION_BANK_PAGE_SIZE: int = 1000
+    QUESTION_BANK_TTL_SECONDS: float = 300
+    QUESTION_BANK_MAX_USERS: int = 1000
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,246 @@
+"""In-process metrics in Prometheus text format, plus optional trace spans.
+
+Counters, gauges and histograms are plain dicts keyed by label values behind
+a lock, so recording one costs around a microsecond. `stage()` times a unit of
+work (a DB call, an LLM call, quiz parsing) into the stage histogram and,
+when TRACE_SPANS is on, into the current request's span list.
+"""
+import bisect
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# Seconds; covers in-process cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels: Tuple, value) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, labels)} {value}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (last slot is +Inf), sum
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _samples(self, labels: Tuple, value) -> List[str]:
+        counts, total = value
+        lines, running = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            bucket_labels = _labels(self.label_names, labels, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {running}")
+        lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+        lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instances
+registry = Registry()
+http_requests = registry.counter(
+    "quizcraft_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "quizcraft_http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ("method", "route")
+)
+http_in_flight = registry.gauge("quizcraft_http_requests_in_flight", "HTTP requests being served")
+stage_latency = registry.histogram(
+    "quizcraft_stage_duration_seconds", "Latency of one unit of work inside a request", ("stage",)
+)
+stage_errors = registry.counter("quizcraft_stage_errors_total", "Stages that raised", ("stage",))
+stage_in_flight = registry.gauge("quizcraft_stage_in_flight", "Stages currently running", ("stage",))
+
+# Spans of the current request while TRACE_SPANS is on
+_spans: ContextVar[Optional[list]] = ContextVar("spans", default=None)
+
+
+class stage:
+    """Time the enclosed block as `name` (e.g. "db.get_quiz", "llm.gemini.complete").
+
+    A class rather than a @contextmanager generator: it is on every DB and
+    LLM call, and this is several times cheaper.
+    """
+
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self):
+        if settings.METRICS_ENABLED:
+            stage_in_flight.inc(self.name)
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.started:
+            return False
+        elapsed = time.perf_counter() - self.started
+        stage_in_flight.dec(self.name)
+        stage_latency.observe(elapsed, self.name)
+        if exc_type is not None and issubclass(exc_type, Exception):
+            stage_errors.inc(self.name)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append({"stage": self.name, "start_ms": round((self.started - spans[0]) * 1000, 3),
+                          "duration_ms": round(elapsed * 1000, 3)})
+        return False
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route, including any include_router prefix"""
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    path = scope["path"]
+    regex = getattr(route, "path_regex", None)
+    # Routers included with a prefix keep their unprefixed route in scope
+    for start in range(len(path)):
+        if path[start] == "/" and (regex is None or regex.match(path[start:])):
+            return path[:start] + template
+    return template
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status counts and in-flight requests.
+
+    Latency runs until the last body chunk is sent, so streamed responses
+    are measured in full. Routes are labelled by their path template
+    (/api/quizzes/{quiz_id}); unmatched paths share one label. With
+    TRACE_SPANS on, each request's stages are printed as one JSON line.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        token = _spans.set([started]) if settings.TRACE_SPANS else None
+        http_in_flight.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            route = route_template(scope)
+            http_requests.inc(scope["method"], route, str(status))
+            http_latency.observe(elapsed, scope["method"], route)
+            if token is not None:
+                spans = _spans.get()[1:]
+                _spans.reset(token)
+                print(json.dumps({
+                    "trace": f"{scope['method']} {route}",
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "spans": spans
+                }))
@@ -70,6 +70,7 @@ class QuestionCreate(BaseModel):
     quiz_id: str
     quiz_question: str
     correct_answer: str
+    options: Optional[List[str]] = None
 
 class QuestionResponse(BaseModel):
     question_id: str
@@ -82,9 +83,21 @@ class UserAnswerCreate(BaseModel):
     answer: str
     is_correct: bool
 
+class SubmittedAnswer(BaseModel):
+    question_id: int
+    answer: str
+
+class QuizSubmission(BaseModel):
+    answers: List[SubmittedAnswer]
+
 class UserAnswerResponse(BaseModel):
     user_answer_id: str
     question_id: int
     answer: str
     is_correct: bool
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class QuizQuestion(BaseModel):
+    question: str
+    options: List[str]
+    answer: str
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.services.async_db import async_db
+
+
+class SessionActivityCoalescer:
+    """Batches Chat_Session.last_active_at touches into periodic bulk writes.
+
+    touch() only records the session ID; a background task writes all
+    sessions touched during the last `window` seconds in one UPDATE. touch()
+    is safe to call from DB worker threads and returns False when the
+    coalescer is not running, so callers can fall back to a direct write.
+    """
+
+    def __init__(self, flush: Callable[[List[str]], Awaitable[None]], window: float):
+        self._flush = flush
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending: set = set()
+        self._pending_touches = 0
+        self._task: Optional[asyncio.Task] = None
+        self.touches = 0
+        self.flushed_touches = 0
+        self.writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def touch(self, session_id: str) -> bool:
+        if not self.running:
+            return False
+        with self._lock:
+            self._pending.add(session_id)
+            self._pending_touches += 1
+            self.touches += 1
+        return True
+
+    def start(self):
+        if self.window > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write whatever is still pending"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.window)
+            await self.flush()
+
+    async def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+            touches, self._pending_touches = self._pending_touches, 0
+        if not pending:
+            return
+        try:
+            await self._flush(list(pending))
+            self.writes += 1
+            self.flushed_touches += touches
+        except Exception as e:
+            print(f"Failed to flush session activity: {e}")
+            # Keep them for the next window
+            with self._lock:
+                self._pending |= pending
+                self._pending_touches += touches
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window,
+            "touches": self.touches,
+            "writes": self.writes,
+            "writes_saved": self.flushed_touches - self.writes,
+            "pending": len(self._pending),
+        }
+
+
+# Singleton instance
+session_activity = SessionActivityCoalescer(
+    flush=async_db.touch_sessions,
+    window=settings.SESSION_TOUCH_DEBOUNCE,
+)
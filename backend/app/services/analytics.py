@@ -0,0 +1,288 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+class Codes:
+    """Maps values to dense integer codes (0, 1, 2, ...) in first-seen order"""
+
+    def __init__(self):
+        self.index: Dict = {}
+        self.values: List = []
+
+    def code(self, value) -> int:
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class AnswerFrame:
+    """User_Answer history held as NumPy columns.
+
+    Each answer is a question code, an answer-text code and a correctness
+    flag, in insertion order (user_answer_id), which stands in for time.
+    A question's owner and topic (its Chat_Session's user_id and title) are
+    per-question arrays, so answers never repeat them.
+    """
+
+    def __init__(self, question: np.ndarray, answer: np.ndarray, correct: np.ndarray,
+                 question_user: np.ndarray, question_topic: np.ndarray,
+                 question_ids: List, user_ids: List, topics: List, answers: List):
+        self.question = question
+        self.answer = answer
+        self.correct = correct
+        self.question_user = question_user
+        self.question_topic = question_topic
+        self.question_ids = question_ids
+        self.user_ids = user_ids
+        self.topics = topics
+        self.answers = answers
+        self.question_index = {q: i for i, q in enumerate(question_ids)}
+        self.user_index = {u: i for i, u in enumerate(user_ids)}
+
+    def __len__(self) -> int:
+        return len(self.question)
+
+    @property
+    def user(self) -> np.ndarray:
+        return self.question_user[self.question]
+
+    @property
+    def topic(self) -> np.ndarray:
+        return self.question_topic[self.question]
+
+    def for_user(self, user_id) -> "AnswerFrame":
+        """Only the answers to questions from this user's own sessions"""
+        code = self.user_index.get(str(user_id))
+        mask = self.user == code if code is not None else np.zeros(len(self), dtype=np.bool_)
+        return AnswerFrame(
+            question=self.question[mask], answer=self.answer[mask], correct=self.correct[mask],
+            question_user=self.question_user, question_topic=self.question_topic,
+            question_ids=self.question_ids, user_ids=self.user_ids, topics=self.topics, answers=self.answers,
+        )
+
+    @classmethod
+    def build(cls, sessions: Iterable[dict], quizzes: Iterable[dict],
+              questions: Iterable[dict], answer_pages: Iterable[List[dict]]) -> "AnswerFrame":
+        """Assemble a frame from row iterables (Chat_Session, Quiz, Question, pages of User_Answer).
+
+        Answers are converted page by page, so only one page of row dicts
+        is alive at a time next to the compact arrays.
+        """
+        users, topics, answers = Codes(), Codes(), Codes()
+        session_dims = {
+            row["session_id"]: (users.code(str(row.get("user_id"))), topics.code(row.get("title") or ""))
+            for row in sessions
+        }
+        quiz_session = {row["quiz_id"]: row["session_id"] for row in quizzes}
+
+        question_index: Dict = {}
+        question_ids, question_user, question_topic = [], [], []
+        unknown = (users.code("unknown"), topics.code("unknown"))
+        for row in questions:
+            user, topic = session_dims.get(quiz_session.get(row["quiz_id"]), unknown)
+            question_index[row["question_id"]] = len(question_ids)
+            question_ids.append(row["question_id"])
+            question_user.append(user)
+            question_topic.append(topic)
+
+        question_chunks, answer_chunks, correct_chunks = [], [], []
+        for page in answer_pages:
+            page = [row for row in page if row["question_id"] in question_index]
+            question_chunks.append(np.fromiter(
+                (question_index[row["question_id"]] for row in page), dtype=np.int32, count=len(page)
+            ))
+            answer_chunks.append(np.fromiter(
+                (answers.code((row.get("answer") or "").strip()) for row in page),
+                dtype=np.int32, count=len(page)
+            ))
+            correct_chunks.append(np.fromiter(
+                (bool(row.get("is_correct")) for row in page), dtype=np.bool_, count=len(page)
+            ))
+
+        def join(chunks, dtype):
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+        return cls(
+            question=join(question_chunks, np.int32),
+            answer=join(answer_chunks, np.int32),
+            correct=join(correct_chunks, np.bool_),
+            question_user=np.asarray(question_user, dtype=np.int32),
+            question_topic=np.asarray(question_topic, dtype=np.int32),
+            question_ids=question_ids,
+            user_ids=users.values,
+            topics=topics.values,
+            answers=answers.values,
+        )
+
+
+def _rates(groups: np.ndarray, correct: np.ndarray, size: int):
+    attempts = np.bincount(groups, minlength=size)
+    right = np.bincount(groups, weights=correct, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        accuracy = np.where(attempts > 0, right / np.maximum(attempts, 1), 0.0)
+    return attempts, right, accuracy
+
+
+def question_difficulty(frame: AnswerFrame, min_attempts: int = 1, limit: Optional[int] = None) -> List[dict]:
+    """Questions by share of wrong answers, hardest first"""
+    attempts, right, accuracy = _rates(frame.question, frame.correct, len(frame.question_ids))
+    eligible = np.flatnonzero(attempts >= max(min_attempts, 1))
+    order = eligible[np.lexsort((-attempts[eligible], accuracy[eligible]))][:limit]
+    return [
+        {
+            "question_id": frame.question_ids[i],
+            "attempts": int(attempts[i]),
+            "accuracy": round(float(accuracy[i]), 4),
+            "difficulty": round(1 - float(accuracy[i]), 4)
+        }
+        for i in order
+    ]
+
+
+def topic_accuracy(frame: AnswerFrame) -> List[dict]:
+    """Accuracy per topic (Chat_Session title), most answered first"""
+    attempts, right, accuracy = _rates(frame.topic, frame.correct, len(frame.topics))
+    order = np.argsort(-attempts, kind="stable")
+    return [
+        {"topic": frame.topics[i], "attempts": int(attempts[i]), "accuracy": round(float(accuracy[i]), 4)}
+        for i in order if attempts[i]
+    ]
+
+
+def mastery_curve(frame: AnswerFrame, user_id: str, window: int = 10, points: int = 50) -> dict:
+    """A user's accuracy over their answer history.
+
+    `cumulative` is accuracy over all answers so far; `rolling` over the
+    last `window` answers. Both are sampled at most `points` times.
+    """
+    user = frame.user_index.get(str(user_id))
+    if user is None:
+        return {"user_id": str(user_id), "answers": 0, "points": []}
+    correct = frame.correct[frame.user == user].astype(np.float64)
+    n = len(correct)
+    if not n:
+        return {"user_id": str(user_id), "answers": 0, "points": []}
+
+    totals = np.cumsum(correct)
+    seen = np.arange(1, n + 1)
+    cumulative = totals / seen
+    lagged = np.concatenate([np.zeros(window), totals])[:n]
+    rolling = (totals - lagged) / np.minimum(seen, window)
+
+    sample = np.unique(np.linspace(0, n - 1, min(points, n)).astype(np.int64))
+    return {
+        "user_id": str(user_id),
+        "answers": n,
+        "points": [
+            {
+                "attempt": int(i) + 1,
+                "cumulative": round(float(cumulative[i]), 4),
+                "rolling": round(float(rolling[i]), 4)
+            }
+            for i in sample
+        ]
+    }
+
+
+def distractor_rates(frame: AnswerFrame, question_ids: Optional[List] = None, top: int = 3) -> Dict:
+    """Most-picked wrong answers per question, as a share of all attempts at it"""
+    attempts = np.bincount(frame.question, minlength=len(frame.question_ids))
+    wrong = ~frame.correct
+    n_answers = max(len(frame.answers), 1)
+    pairs = frame.question[wrong].astype(np.int64) * n_answers + frame.answer[wrong]
+    keys, counts = np.unique(pairs, return_counts=True)
+    questions, answers = keys // n_answers, keys % n_answers
+
+    if question_ids is not None:
+        index = frame.question_index
+        wanted = np.asarray([index[q] for q in question_ids if q in index], dtype=np.int64)
+        keep = np.isin(questions, wanted)
+        questions, answers, counts = questions[keep], answers[keep], counts[keep]
+
+    # Group by question, most picked first, then keep the first `top` of each group
+    order = np.lexsort((-counts, questions))
+    questions, answers, counts = questions[order], answers[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, questions[1:] != questions[:-1]]) if len(questions) else np.empty(0, np.int64)
+    rank = np.arange(len(questions)) - np.repeat(starts, np.diff(np.r_[starts, len(questions)]))
+    keep = rank < top
+
+    result: Dict = {}
+    for q, a, count in zip(questions[keep], answers[keep], counts[keep]):
+        result.setdefault(frame.question_ids[q], []).append({
+            "answer": frame.answers[a],
+            "picks": int(count),
+            "rate": round(float(count) / float(attempts[q]), 4)
+        })
+    return result
+
+
+def load_frame(page_size: int) -> AnswerFrame:
+    """Bulk-load the whole answer history from Supabase, a page at a time"""
+    from app.services.databases import db
+
+    return AnswerFrame.build(
+        sessions=db.iter_rows("Chat_Session", "session_id, user_id, title", "session_id", page_size),
+        quizzes=db.iter_rows("Quiz", "quiz_id, session_id", "quiz_id", page_size),
+        questions=db.iter_rows("Question", "question_id, quiz_id", "question_id", page_size),
+        answer_pages=db.iter_pages("User_Answer", "user_answer_id, question_id, answer, is_correct",
+                                   "user_answer_id", page_size),
+    )
+
+
+class LearningAnalytics:
+    """Serves reports from an AnswerFrame that is reloaded at most every `ttl` seconds.
+
+    An explicit refresh reloads early, but never more than once per
+    `min_refresh` seconds, since each load reads every answer table.
+    """
+
+    def __init__(self, loader, ttl: float, min_refresh: float = 0.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self._frame: Optional[AnswerFrame] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def frame(self, refresh: bool = False) -> AnswerFrame:
+        with self._lock:
+            age = time.monotonic() - self._loaded_at
+            if self._frame is None or age > self.ttl or (refresh and age >= self.min_refresh):
+                self._frame = self.loader()
+                self._loaded_at = time.monotonic()
+            return self._frame
+
+    def report(self, user_id: Optional[str] = None, top: int = 20, min_attempts: int = 5,
+               refresh: bool = False, scope_user: Optional[str] = None) -> dict:
+        """The full report; with `scope_user`, built from that user's answers only"""
+        frame = self.frame(refresh)
+        if scope_user is not None:
+            frame = frame.for_user(scope_user)
+        hardest = question_difficulty(frame, min_attempts=min_attempts, limit=top)
+        report = {
+            "answers": len(frame),
+            "questions": hardest,
+            "topics": topic_accuracy(frame),
+            "distractors": distractor_rates(frame, [q["question_id"] for q in hardest])
+        }
+        if user_id is not None:
+            report["mastery"] = mastery_curve(frame, user_id)
+        return report
+
+
+# Singleton instance
+learning_analytics = LearningAnalytics(
+    loader=lambda: load_frame(settings.ANALYTICS_PAGE_SIZE),
+    ttl=settings.ANALYTICS_CACHE_SECONDS,
+    min_refresh=settings.ANALYTICS_MIN_REFRESH_SECONDS,
+)
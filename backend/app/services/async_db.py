@@ -0,0 +1,79 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.metrics import stage
+from app.services.databases import DatabaseService, db
+
+
+class DatabaseTimeoutError(TimeoutError):
+    """Raised when a database call does not finish within its timeout"""
+
+
+class AsyncDatabaseService:
+    """Non-blocking facade over DatabaseService.
+
+    Every public DatabaseService method is exposed as a coroutine with the same
+    signature. The underlying supabase-py calls run on a bounded thread pool so
+    a slow PostgREST round trip never stalls the event loop. A semaphore caps
+    the number of calls in flight and each call gets a timeout.
+    """
+
+    def __init__(self, service: DatabaseService, max_concurrency: int, timeout: float):
+        self._service = service
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="db"
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the DB pool with the concurrency limit and timeout"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        name = getattr(fn, "__name__", repr(fn))
+        pool = getattr(self._service, "pool", None)
+        # The pool this call runs on; if it breaks, only the first caller to notice rebuilds it
+        generation = getattr(pool, "generation", None)
+        with stage(f"db.{name}"):
+            async with self._semaphore:
+                try:
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, call),
+                        timeout=self.timeout,
+                    )
+                except asyncio.TimeoutError:
+                    raise DatabaseTimeoutError(
+                        f"Database call {name} timed out after {self.timeout}s"
+                    ) from None
+                except Exception as e:
+                    # httpx is loaded by now: the failed call went through it
+                    import httpx
+                    if pool is not None and isinstance(e, (httpx.ConnectError, httpx.RemoteProtocolError)):
+                        # Broken connections: hand later calls a fresh pool
+                        pool.reconnect(generation)
+                    raise
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._service, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        return call
+
+
+# Singleton instance
+async_db = AsyncDatabaseService(
+    db,
+    max_concurrency=settings.DB_MAX_CONCURRENCY,
+    timeout=settings.DB_CALL_TIMEOUT,
+)
@@ -0,0 +1,99 @@
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+from app.services.cache import LRUCache
+
+if TYPE_CHECKING:
+    import jwt
+
+# Algorithms Supabase signs access tokens with when asymmetric keys are enabled
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256", "EdDSA"}
+# Clock skew tolerated on exp/iat (seconds)
+LEEWAY = 30
+
+
+class InvalidTokenError(Exception):
+    """Raised when an access token is malformed, expired or badly signed"""
+
+
+class LocalVerificationUnavailable(Exception):
+    """Raised when no local key can check a token (HS256 without SUPABASE_JWT_SECRET)"""
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens without calling the Auth server.
+
+    HS256 tokens are checked against the project's JWT secret; RS256/ES256
+    tokens against the project's JWKS. The key set is fetched lazily, cached
+    for `jwks_lifespan` seconds and re-fetched when a token names a key ID it
+    has not seen, so signing-key rotation needs no restart.
+    """
+
+    def __init__(self, secret: Optional[str], jwks_url: Optional[str], audience: str,
+                 jwks_lifespan: float, timeout: float):
+        self.secret = secret
+        self.jwks_url = jwks_url
+        self.audience = audience
+        self.jwks_lifespan = jwks_lifespan
+        self.timeout = timeout
+        self._jwks: Optional["jwt.PyJWKClient"] = None
+        self._lock = threading.Lock()
+
+    def _jwks_client(self) -> "jwt.PyJWKClient":
+        import jwt
+
+        if self._jwks is None:
+            with self._lock:
+                if self._jwks is None:
+                    self._jwks = jwt.PyJWKClient(
+                        self.jwks_url, cache_keys=True, lifespan=self.jwks_lifespan,
+                        timeout=self.timeout,
+                    )
+        return self._jwks
+
+    def verify(self, token: str) -> dict:
+        """Return the token's claims; requires sub and exp and checks the audience"""
+        # PyJWT (and cryptography behind it) loads on the first authenticated request
+        import jwt
+
+        try:
+            algorithm = jwt.get_unverified_header(token).get("alg")
+            if algorithm == "HS256":
+                if not self.secret:
+                    raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET is not set")
+                key = self.secret
+            elif algorithm in ASYMMETRIC_ALGORITHMS and self.jwks_url:
+                key = self._jwks_client().get_signing_key_from_jwt(token).key
+            else:
+                raise LocalVerificationUnavailable(f"No local key for {algorithm} tokens")
+            return jwt.decode(
+                token, key, algorithms=[algorithm], audience=self.audience,
+                leeway=LEEWAY, options={"require": ["exp", "sub"]},
+            )
+        except jwt.PyJWKClientConnectionError as e:
+            raise LocalVerificationUnavailable(str(e)) from e
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+
+def default_jwks_url() -> Optional[str]:
+    if settings.SUPABASE_JWKS_URL:
+        return settings.SUPABASE_JWKS_URL
+    if settings.SUPABASE_URL:
+        return settings.SUPABASE_URL.rstrip("/") + "/auth/v1/.well-known/jwks.json"
+    return None
+
+
+# Singleton instances
+token_verifier = TokenVerifier(
+    secret=settings.SUPABASE_JWT_SECRET,
+    jwks_url=default_jwks_url(),
+    audience=settings.SUPABASE_JWT_AUDIENCE,
+    jwks_lifespan=settings.JWKS_CACHE_SECONDS,
+    timeout=settings.SUPABASE_HTTP_TIMEOUT,
+)
+profile_cache = LRUCache(
+    max_entries=settings.AUTH_PROFILE_CACHE_MAX_ENTRIES,
+    ttl=settings.AUTH_PROFILE_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,56 @@
+from typing import List
+
+# Rough size of a token in characters, good enough for budgeting prompts
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_turn(text: str, max_tokens: int) -> str:
+    """Cut a single turn down to max_tokens, keeping its beginning"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rstrip() + " …"
+
+
+def build_context(messages: List, token_budget: int, max_turn_tokens: int) -> List[dict]:
+    """Turn a chat history into the turns to send in one provider call.
+
+    Each turn is truncated to max_turn_tokens, then the newest turns are kept
+    until token_budget is spent. The last message is always kept. Returns
+    [{"role": "user" | "assistant", "content": str}, ...] oldest first.
+    """
+    turns = []
+    used = 0
+    for index, msg in enumerate(reversed(messages)):
+        content = truncate_turn(msg.content, max_turn_tokens)
+        cost = estimate_tokens(content)
+        if index > 0 and used + cost > token_budget:
+            break
+        used += cost
+        role = "assistant" if msg.role == "assistant" else "user"
+        turns.append({"role": role, "content": content})
+    turns.reverse()
+    return turns
+
+
+def to_gemini_contents(turns: List[dict]) -> List[dict]:
+    """Convert turns to Gemini contents.
+
+    Gemini expects the conversation to open with a user turn and to
+    alternate roles, so leading assistant turns are dropped and consecutive
+    turns from the same side are merged.
+    """
+    contents = []
+    for turn in turns:
+        role = "model" if turn["role"] == "assistant" else "user"
+        if not contents and role == "model":
+            continue
+        if contents and contents[-1]["role"] == role:
+            contents[-1]["parts"].append(turn["content"])
+        else:
+            contents.append({"role": role, "parts": [turn["content"]]})
+    return contents
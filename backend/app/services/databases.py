@@ -1,24 +1,91 @@
-from supabase import create_client, Client
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
+import json
 import os
 from app.core.config import settings
+from app.services.cache import LRUCache
+from app.services.supabase_client import SupabasePool, supabase_pool
+from app.services.pagination import keyset_page
+from app.services.progress import earned_points, empty_progress, percentage
+from app.services.projections import project
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+class QuizAlreadyFinishedError(Exception):
+    """Raised when answers are submitted for a quiz that is already finished"""
 
 class DatabaseService:
-    def __init__(self):
-        url = settings.SUPABASE_URL
-        key = settings.SUPABASE_KEY
-        self.client: Client = create_client(url, key)
+    def __init__(self, pool: SupabasePool = supabase_pool):
+        self.pool = pool
+        # Flipped off if the submit_quiz migration has not been applied
+        self._submit_rpc_available = True
+        # Same for the user_progress migration
+        self._progress_rpc_available = True
+        # And for the question_options migration (the Question.options column)
+        self._options_column_available = True
+        # SessionActivityCoalescer, set while the app is running
+        self.activity = None
+        # UserQuestionBanks, set while the app is running
+        self.question_banks = None
+        # Question rows only change through the write methods below, which
+        # invalidate them. Quiz rows change (score, is_finished) through other
+        # processes too, so they are kept only briefly
+        self.content_cache = LRUCache(
+            max_entries=settings.QUIZ_CONTENT_CACHE_MAX_ENTRIES,
+            ttl=settings.QUIZ_CONTENT_CACHE_TTL_SECONDS,
+            max_bytes=settings.QUIZ_CONTENT_CACHE_MAX_BYTES,
+            size_fn=lambda value: len(json.dumps(value, default=str)),
+        )
+
+    @property
+    def client(self) -> "Client":
+        """Shared pooled Supabase client"""
+        return self.pool.client
     
+    # ===== AUTH METHODS =====
+    def auth_client(self) -> "Client":
+        """A Supabase client of its own, for calls that change the client's session"""
+        return self.pool.auth_client()
+
+    def sign_in_with_password(self, credentials: dict):
+        return self.auth_client().auth.sign_in_with_password(credentials)
+
+    def sign_up(self, credentials: dict):
+        return self.auth_client().auth.sign_up(credentials)
+
+    def sign_out(self):
+        return self.auth_client().auth.sign_out()
+
+    def get_auth_user(self, token: str):
+        return self.auth_client().auth.get_user(token)
+
     # ===== SESSION METHODS =====
-    def get_user_sessions(self, user_id: int) -> List[dict]:
+    def get_user_sessions(self, user_id: int, columns: str = "*") -> List[dict]:
         """Get all sessions for a user, ordered by last_active_at desc"""
         response = self.client.table("Chat_Session") \
-            .select("*") \
+            .select(columns) \
             .eq("user_id", user_id) \
             .order("last_active_at", desc=True) \
             .execute()
         return response.data
     
+    def get_user_sessions_page(self, user_id: int, limit: int, before: Optional[str] = None,
+                               after: Optional[str] = None, columns: str = "*") -> dict:
+        """Get one page of a user's sessions, keyset-paginated on (last_active_at, session_id) desc"""
+        query = self.client.table("Chat_Session") \
+            .select(columns) \
+            .eq("user_id", user_id)
+        return keyset_page(query, "last_active_at", "session_id", descending=True,
+                           limit=limit, before=before, after=after)
+    
+    def get_session(self, session_id: str) -> Optional[dict]:
+        """Get a session by ID"""
+        response = self.client.table("Chat_Session") \
+            .select("*") \
+            .eq("session_id", session_id) \
+            .execute()
+        return response.data[0] if response.data else None
+    
     def create_session(self, user_id: int, title: str, mode: str) -> dict:
         """Create a new chat session"""
         data = {
@@ -44,6 +111,13 @@ class DatabaseService:
             .execute()
         return response.data[0] if response.data else None
     
+    def touch_sessions(self, session_ids: List[str]) -> None:
+        """Set last_active_at to now for many sessions in one write"""
+        self.client.table("Chat_Session") \
+            .update({"last_active_at": "now()"}) \
+            .in_("session_id", session_ids) \
+            .execute()
+    
     def delete_session(self, session_id: str) -> bool:
         """Delete a session (cascade deletes messages)"""
         response = self.client.table("Chat_Session") \
@@ -53,15 +127,27 @@ class DatabaseService:
         return len(response.data) > 0
     
     # ===== MESSAGE METHODS =====
-    def get_session_messages(self, session_id: str) -> List[dict]:
+    def get_session_messages(self, session_id: str, columns: str = "*") -> List[dict]:
         """Get all messages for a session, ordered by timestamp"""
         response = self.client.table("Message") \
-            .select("*") \
+            .select(columns) \
             .eq("session_id", session_id) \
             .order("timestamp", desc=False) \
             .execute()
         return response.data
     
+    def get_session_messages_page(self, session_id: str, limit: int, before: Optional[str] = None,
+                                  after: Optional[str] = None, columns: str = "*") -> dict:
+        """Get one page of a session's messages, keyset-paginated on (timestamp, message_id).
+
+        Pages are in chronological order; without a cursor the latest messages are returned.
+        """
+        query = self.client.table("Message") \
+            .select(columns) \
+            .eq("session_id", session_id)
+        return keyset_page(query, "timestamp", "message_id", descending=False,
+                           limit=limit, before=before, after=after, tail=True)
+    
     def create_message(self, session_id: str, sender: str, content: str, 
                       quiz_data: Optional[str] = None) -> dict:
         """Create a new message"""
@@ -75,8 +161,9 @@ class DatabaseService:
             .insert(data) \
             .execute()
         
-        # Update session's last_active_at
-        self.update_session(session_id)
+        # Update session's last_active_at, batched when the coalescer is running
+        if self.activity is None or not self.activity.touch(session_id):
+            self.update_session(session_id)
         
         return response.data[0]
     
@@ -95,25 +182,64 @@ class DatabaseService:
         return response.data[0]
     
     def get_quiz(self, quiz_id: str) -> Optional[dict]:
-        """Get a quiz by ID"""
-        response = self.client.table("Quiz") \
-            .select("*") \
-            .eq("quiz_id", quiz_id) \
-            .execute()
-        return response.data[0] if response.data else None
+        """Get a quiz by ID (read-through cached)"""
+        key = ("quiz", str(quiz_id))
+        quiz = self.content_cache.get(key)
+        if quiz is None:
+            response = self.client.table("Quiz") \
+                .select("*") \
+                .eq("quiz_id", quiz_id) \
+                .execute()
+            if not response.data:
+                return None
+            quiz = response.data[0]
+            self.content_cache.set(key, quiz, ttl=settings.QUIZ_ROW_CACHE_TTL_SECONDS)
+        return dict(quiz)
     
-    def get_session_quizzes(self, session_id: str) -> List[dict]:
+    def get_session_quizzes(self, session_id: str, columns: str = "*") -> List[dict]:
         """Get all quizzes for a session"""
         response = self.client.table("Quiz") \
-            .select("*") \
+            .select(columns) \
             .eq("session_id", session_id) \
             .order("timestamp_started", desc=True) \
             .execute()
         return response.data
     
+    def get_session_quizzes_detail(self, session_id: str) -> List[dict]:
+        """Get a session's quizzes with their questions and answers in one embedded select.
+
+        Each quiz gets "questions" and "answers" lists shaped like
+        get_quiz_questions and get_quiz_answers. The questions also warm the
+        quiz content cache.
+        """
+        response = self.client.table("Quiz") \
+            .select("*, Question(*, User_Answer(*))") \
+            .eq("session_id", session_id) \
+            .order("timestamp_started", desc=True) \
+            .order("question_id", foreign_table="Question") \
+            .execute()
+        quizzes = []
+        for quiz in response.data:
+            questions, answers = [], []
+            for question in quiz.pop("Question", None) or []:
+                answers.extend(question.pop("User_Answer", None) or [])
+                questions.append(question)
+            if questions:
+                self.content_cache.set(("questions", str(quiz["quiz_id"])), questions)
+            quizzes.append({**quiz, "questions": project(questions, "*"), "answers": answers})
+        return quizzes
+    
     def update_quiz(self, quiz_id: str, score: Optional[int] = None, 
                    is_finished: Optional[bool] = None) -> dict:
         """Update quiz score and status"""
+        # Dropped again afterwards: a get_quiz racing the write could re-cache the old row
+        self.content_cache.delete(("quiz", str(quiz_id)))
+        try:
+            return self._update_quiz(quiz_id, score, is_finished)
+        finally:
+            self.content_cache.delete(("quiz", str(quiz_id)))
+
+    def _update_quiz(self, quiz_id: str, score: Optional[int], is_finished: Optional[bool]) -> dict:
         data = {}
         if score is not None:
             data["score"] = score
@@ -122,40 +248,314 @@ class DatabaseService:
             if is_finished:
                 data["timestamp_finished"] = "now()"
         
-        response = self.client.table("Quiz") \
+        # Finishing or rescoring a finished quiz would skew progress totals, so
+        # both only apply while is_finished is false; only the call that flips
+        # it counts towards progress
+        guarded = is_finished or (score is not None and is_finished is None)
+        query = self.client.table("Quiz") \
             .update(data) \
+            .eq("quiz_id", quiz_id)
+        if guarded:
+            query = query.eq("is_finished", False)
+        response = query.execute()
+        if response.data:
+            if is_finished:
+                self.record_finished_quiz(response.data[0])
+            return response.data[0]
+        if guarded and self.client.table("Quiz").select("quiz_id").eq("quiz_id", quiz_id).execute().data:
+            raise QuizAlreadyFinishedError(f"Quiz {quiz_id} is already finished")
+        return None
+    
+    def submit_quiz(self, quiz_id: str, answers: List[dict]) -> Optional[dict]:
+        """Grade answers against the quiz's questions, store them and finish the quiz.
+
+        answers is [{"question_id": int, "answer": str}, ...]. Uses the
+        submit_quiz RPC (one transactional round trip) and falls back to three
+        plain PostgREST calls if the function is missing. Returns
+        {"quiz": ..., "answers": [...]}, or None if the quiz does not exist.
+        """
+        # Whatever happens below, the cached quiz row may now be stale; dropped
+        # again afterwards since a get_quiz racing the write could re-cache it
+        self.content_cache.delete(("quiz", str(quiz_id)))
+        try:
+            return self._submit_quiz(quiz_id, answers)
+        finally:
+            self.content_cache.delete(("quiz", str(quiz_id)))
+
+    def _submit_quiz(self, quiz_id: str, answers: List[dict]) -> Optional[dict]:
+        if self._submit_rpc_available:
+            from postgrest.exceptions import APIError
+            try:
+                response = self.client.rpc("submit_quiz", {
+                    "p_quiz_id": quiz_id,
+                    "p_answers": answers
+                }).execute()
+                if response.data:
+                    self.record_finished_quiz(response.data["quiz"], response.data["answers"])
+                return response.data
+            except APIError as e:
+                if e.code == "QC409":
+                    raise QuizAlreadyFinishedError(e.message)
+                if e.code != "PGRST202":
+                    raise
+                self._submit_rpc_available = False
+
+        # Quiz and its answer key in one embedded select
+        response = self.client.table("Quiz") \
+            .select("*, Question(question_id, correct_answer)") \
             .eq("quiz_id", quiz_id) \
             .execute()
-        return response.data[0] if response.data else None
+        if not response.data:
+            return None
+        quiz = response.data[0]
+        if quiz.get("is_finished"):
+            raise QuizAlreadyFinishedError(f"Quiz {quiz_id} is already finished")
+
+        key = {q["question_id"]: q["correct_answer"] for q in quiz.pop("Question", [])}
+        # One answer per question (the last one sent), so the score cannot exceed the quiz
+        latest = {a["question_id"]: a["answer"] for a in answers if a["question_id"] in key}
+        rows = [
+            {
+                "question_id": question_id,
+                "answer": answer,
+                "is_correct": answer is not None and key[question_id] is not None
+                              and answer.strip() == key[question_id].strip()
+            }
+            for question_id, answer in latest.items()
+        ]
+
+        # Finish first, guarded on is_finished, so a racing submission that
+        # loses stores no answers
+        updated = self.client.table("Quiz") \
+            .update({
+                "score": sum(1 for row in rows if row["is_correct"]),
+                "is_finished": True,
+                "timestamp_finished": "now()"
+            }) \
+            .eq("quiz_id", quiz_id) \
+            .eq("is_finished", False) \
+            .execute()
+        if not updated.data:
+            raise QuizAlreadyFinishedError(f"Quiz {quiz_id} is already finished")
+        inserted = []
+        if rows:
+            try:
+                inserted = self.client.table("User_Answer") \
+                    .insert(rows) \
+                    .execute().data
+            except Exception:
+                # Reopen the quiz so the submission can be retried
+                self.client.table("Quiz") \
+                    .update({"score": quiz.get("score"), "is_finished": False, "timestamp_finished": None}) \
+                    .eq("quiz_id", quiz_id) \
+                    .execute()
+                raise
+        self.record_finished_quiz(updated.data[0], inserted)
+        return {"quiz": updated.data[0], "answers": inserted}
+    
+    # ===== PROGRESS METHODS =====
+    def get_user_progress(self, user_id: str) -> dict:
+        """Get a user's running progress totals (zeros if they have not finished a quiz)"""
+        response = self.client.table("User_Progress") \
+            .select("*") \
+            .eq("user_id", user_id) \
+            .execute()
+        return response.data[0] if response.data else empty_progress(user_id)
+    
+    def record_finished_quiz(self, quiz: dict, answers: Optional[List[dict]] = None) -> None:
+        """Add a quiz that was just marked finished to its owner's progress totals.
+
+        Failures are logged rather than raised so finishing the quiz still
+        succeeds; `python -m app.services.progress rebuild` repairs any drift.
+        """
+        try:
+            session = self.client.table("Chat_Session") \
+                .select("user_id") \
+                .eq("session_id", quiz["session_id"]) \
+                .execute()
+            if not session.data:
+                return
+            user_id = str(session.data[0]["user_id"])
+            if quiz.get("score") is None and answers is None:
+                answers = self.get_quiz_answers(quiz["quiz_id"], columns="is_correct")
+            earned = earned_points(quiz, answers)
+            maximum = quiz.get("no_of_questions") or 0
+
+            if self._progress_rpc_available:
+                from postgrest.exceptions import APIError
+                try:
+                    self.client.rpc("increment_user_progress", {
+                        "p_user_id": user_id,
+                        "p_earned": earned,
+                        "p_max": maximum
+                    }).execute()
+                    return
+                except APIError as e:
+                    if e.code != "PGRST202":
+                        raise
+                    self._progress_rpc_available = False
+
+            # Read-modify-write; concurrent finishes for one user can race here
+            current = self.get_user_progress(user_id)
+            taken = current["no_of_quizzes_taken"] + 1
+            total_earned = current["total_earned_score"] + earned
+            total_max = current["total_max_score"] + maximum
+            self.upsert_user_progress([{
+                "user_id": user_id,
+                "no_of_quizzes_taken": taken,
+                "total_earned_score": total_earned,
+                "total_max_score": total_max,
+                "percentage": percentage(total_earned, total_max)
+            }])
+        except Exception as e:
+            print(f"Failed to record progress for quiz {quiz.get('quiz_id')}: {e}")
+    
+    def upsert_user_progress(self, rows: List[dict], batch_size: int = 500) -> None:
+        """Write whole User_Progress rows, replacing existing ones"""
+        for start in range(0, len(rows), batch_size):
+            self.client.table("User_Progress") \
+                .upsert(rows[start:start + batch_size], on_conflict="user_id") \
+                .execute()
+    
+    def get_progress_user_ids(self) -> List[str]:
+        """IDs of every user that has a User_Progress row"""
+        response = self.client.table("User_Progress") \
+            .select("user_id") \
+            .execute()
+        return [row["user_id"] for row in response.data]
+    
+    def iter_finished_quizzes(self, page_size: int = 1000):
+        """Yield every finished quiz with its owner's user_id and its answers, a page at a time"""
+        quizzes = self.iter_rows(
+            "Quiz",
+            "quiz_id, score, no_of_questions, Chat_Session!inner(user_id), Question(User_Answer(is_correct))",
+            "quiz_id",
+            page_size,
+            filters={"is_finished": True},
+        )
+        for quiz in quizzes:
+            yield {
+                "quiz_id": quiz["quiz_id"],
+                "score": quiz.get("score"),
+                "no_of_questions": quiz.get("no_of_questions"),
+                "user_id": quiz["Chat_Session"]["user_id"],
+                "answers": [
+                    answer
+                    for question in quiz.get("Question") or []
+                    for answer in question.get("User_Answer") or []
+                ]
+            }
+    
+    # ===== BULK READS =====
+    def iter_pages(self, table: str, columns: str, key: str, page_size: int = 1000,
+                   filters: Optional[dict] = None):
+        """Yield a whole table as pages of rows, keyset-paginated on `key` ascending.
+
+        `filters` maps columns (embedded ones included) to values they must
+        equal. Stops on an empty page rather than a short one, since
+        PostgREST may cap page size below page_size (db-max-rows).
+        """
+        last = None
+        while True:
+            query = self.client.table(table).select(columns)
+            for column, value in (filters or {}).items():
+                query = query.eq(column, value)
+            if last is not None:
+                query = query.gt(key, last)
+            page = query \
+                .order(key) \
+                .limit(page_size) \
+                .execute().data
+            if not page:
+                return
+            yield page
+            last = page[-1][key]
+    
+    def iter_rows(self, table: str, columns: str, key: str, page_size: int = 1000,
+                  filters: Optional[dict] = None):
+        """Like iter_pages, one row at a time"""
+        for page in self.iter_pages(table, columns, key, page_size, filters):
+            yield from page
     
     # ===== QUESTION METHODS =====
     def create_question(self, quiz_id: str, quiz_question: str, 
-                       correct_answer: str) -> dict:
+                       correct_answer: str, options: Optional[List[str]] = None) -> dict:
         """Create a new question"""
         data = {
             "quiz_id": quiz_id,
             "quiz_question": quiz_question,
             "correct_answer": correct_answer
         }
-        response = self.client.table("Question") \
-            .insert(data) \
-            .execute()
-        return response.data[0]
+        if options is not None:
+            data["options"] = options
+        rows = self._insert_questions([data])
+        self.content_cache.delete(("questions", str(quiz_id)))
+        if self.question_banks is not None:
+            self.question_banks.forget_quizzes([quiz_id])
+        return rows[0]
     
     def create_questions_batch(self, questions: List[dict]) -> List[dict]:
         """Create multiple questions at once"""
-        response = self.client.table("Question") \
-            .insert(questions) \
-            .execute()
-        return response.data
+        rows = self._insert_questions(questions)
+        quiz_ids = {str(q.get("quiz_id")) for q in questions}
+        for quiz_id in quiz_ids:
+            self.content_cache.delete(("questions", quiz_id))
+        if self.question_banks is not None:
+            self.question_banks.forget_quizzes(quiz_ids)
+        return rows
+
+    def _insert_questions(self, questions: List[dict]) -> List[dict]:
+        """Insert Question rows, leaving options out while the options column does not exist"""
+        from postgrest.exceptions import APIError
+
+        if not self._options_column_available:
+            questions = [{k: v for k, v in q.items() if k != "options"} for q in questions]
+        try:
+            return self.client.table("Question") \
+                .insert(questions) \
+                .execute().data
+        except APIError as e:
+            # PGRST204: a column in the payload is missing from the schema cache
+            if e.code != "PGRST204" or "options" not in (e.message or "") \
+                    or not self._options_column_available:
+                raise
+            print("Question.options does not exist; saving questions without options "
+                  "until the question_options migration is applied")
+            self._options_column_available = False
+            return self._insert_questions(questions)
     
-    def get_quiz_questions(self, quiz_id: str) -> List[dict]:
-        """Get all questions for a quiz"""
-        response = self.client.table("Question") \
-            .select("*") \
-            .eq("quiz_id", quiz_id) \
-            .execute()
-        return response.data
+    def iter_user_questions(self, user_id: str, page_size: int = 1000):
+        """Pages of the questions in a user's quizzes, each row with its session title as `topic`"""
+        for page in self.iter_pages(
+            "Question",
+            "question_id, quiz_id, quiz_question, correct_answer, options, "
+            "Quiz!inner(Chat_Session!inner(user_id, title))",
+            "question_id",
+            page_size,
+            filters={"Quiz.Chat_Session.user_id": user_id},
+        ):
+            yield [{**row, "topic": row["Quiz"]["Chat_Session"].get("title")} for row in page]
+
+    def get_question_bank(self, user_id: str):
+        """The user's QuestionBank, built on first use; None when no banks are attached"""
+        if self.question_banks is None:
+            return None
+        return self.question_banks.get(user_id, self)
+
+    def get_quiz_questions(self, quiz_id: str, columns: str = "*") -> List[dict]:
+        """Get all questions for a quiz (read-through cached; columns are projected locally)"""
+        key = ("questions", str(quiz_id))
+        questions = self.content_cache.get(key)
+        if questions is None:
+            questions = self.client.table("Question") \
+                .select("*") \
+                .eq("quiz_id", quiz_id) \
+                .order("question_id") \
+                .execute().data
+            # An empty list usually means the questions are still being written
+            if questions:
+                self.content_cache.set(key, questions)
+        return project(questions, columns)
     
     # ===== USER ANSWER METHODS =====
     def create_user_answer(self, question_id: str, answer: str, 
@@ -179,13 +579,25 @@ class DatabaseService:
             .execute()
         return response.data[0] if response.data else None
     
-    def get_quiz_answers(self, quiz_id: str) -> List[dict]:
+    def get_quiz_answers(self, quiz_id: str, columns: str = "*") -> List[dict]:
         """Get all user answers for a quiz"""
         response = self.client.table("User_Answer") \
-            .select("*, Question!inner(quiz_id)") \
+            .select(f"{columns}, Question!inner(quiz_id)") \
             .eq("Question.quiz_id", quiz_id) \
+            .order("user_answer_id") \
             .execute()
         return response.data
+
+    def get_answered_question_ids(self, user_id: str) -> List[int]:
+        """IDs of every question the user has answered, across all their sessions"""
+        rows = self.iter_rows(
+            "User_Answer",
+            "user_answer_id, question_id, Question!inner(Quiz!inner(Chat_Session!inner(user_id)))",
+            "user_answer_id",
+            filters={"Question.Quiz.Chat_Session.user_id": user_id},
+        )
+        return list(dict.fromkeys(row["question_id"] for row in rows))
+
     def create_user_profile(self, user_id: str, email: str, first_name: str, last_name: str) -> dict:
         """Create user profile in User table after signup"""
         data = {
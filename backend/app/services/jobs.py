@@ -0,0 +1,356 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+job_depth = registry.gauge("quizcraft_jobs", "Jobs in the store by status", ("status",))
+job_outcomes = registry.counter(
+    "quizcraft_job_attempts_total", "Finished job attempts by kind and outcome", ("kind", "outcome")
+)
+job_latency = registry.histogram(
+    "quizcraft_job_duration_seconds", "Time from submission to a finished job", ("kind", "status")
+)
+
+
+class QueueFullError(Exception):
+    """Raised when a submission would push the queue past JOB_MAX_QUEUED"""
+
+
+class UnknownJobKindError(ValueError):
+    """Raised when a job is submitted for a kind with no registered handler"""
+
+
+class JobStore:
+    """SQLite table of jobs, shared by every worker process pointing at the same file.
+
+    A worker claims a job by flipping it to running under a lease; a job
+    whose lease runs out (its worker died) is claimable again, so nothing
+    submitted is lost across restarts. Finished jobs are kept for
+    `result_ttl` seconds so clients can still fetch the result. The file is
+    opened on first use. Every method blocks (up to the 10s busy timeout
+    when another process holds the lock), so async code calls them in a thread.
+    """
+
+    def __init__(self, path: str, lease: float, result_ttl: float):
+        self.path = path
+        self.lease = lease
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self):
+        """Open the file and create the table; called with the lock held"""
+        if self._conn is not None:
+            return
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL, "
+            "run_after REAL NOT NULL, lease_until REAL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, run_after, created_at)"
+        )
+        conn.commit()
+        self._conn = conn
+
+    def create(self, kind: str, payload: dict) -> dict:
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        with self._lock:
+            self._connect()
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, kind, payload, status, created_at, updated_at, run_after) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), QUEUED, now, now, now),
+            )
+            self._commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            self._connect()
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self) -> Optional[dict]:
+        """Mark the oldest runnable job running and return it with its payload"""
+        now = time.time()
+        with self._lock:
+            self._connect()
+            row = self._conn.execute(
+                "SELECT job_id FROM jobs WHERE (status = ? AND run_after <= ?) "
+                "OR (status = ? AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            # Guarded so two processes cannot both win the same job
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                "WHERE job_id = ? AND (status = ? OR (status = ? AND lease_until < ?))",
+                (RUNNING, now + self.lease, now, row["job_id"], QUEUED, RUNNING, now),
+            ).rowcount
+            self._commit()
+            if not claimed:
+                return None
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+        job = self._to_dict(row)
+        job["payload"] = json.loads(row["payload"])
+        return job
+
+    def succeed(self, job_id: str, result: Any):
+        self._finish(job_id, SUCCEEDED, result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, FAILED, error=error)
+
+    def retry(self, job_id: str, error: str, delay: float):
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, lease_until = NULL, "
+                "updated_at = ? WHERE job_id = ?",
+                (QUEUED, error, now + delay, now, job_id),
+            )
+            self._commit()
+
+    def release(self, job_id: str):
+        """Put a job that was interrupted by shutdown back without spending an attempt"""
+        now = time.time()
+        with self._lock:
+            self._connect()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), lease_until = NULL, "
+                "updated_at = ? WHERE job_id = ? AND status = ?",
+                (QUEUED, now, job_id, RUNNING),
+            )
+            self._commit()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            self._connect()
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def _finish(self, job_id: str, status: str, result: Optional[str] = None,
+                error: Optional[str] = None):
+        with self._lock:
+            self._connect()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, lease_until = NULL, "
+                "updated_at = ? WHERE job_id = ?",
+                (status, result, error, time.time(), job_id),
+            )
+            self._commit()
+
+    def _commit(self):
+        self._writes += 1
+        if self._writes % 100 == 0:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at <= ?",
+                (*FINISHED, time.time() - self.result_ttl),
+            )
+        self._conn.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        return {
+            "job_id": row["job_id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] is not None else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+
+class JobQueue:
+    """Runs registered async handlers for stored jobs on a fixed pool of worker tasks.
+
+    submit() returns at once; `workers` tasks claim jobs and run them, so
+    at most that many generations are in flight whatever the request rate.
+    A handler that raises is retried with exponential backoff until
+    `max_attempts` is spent. wait() lets a request long-poll for a result.
+    Store calls run in worker threads so a busy SQLite file never blocks
+    the event loop.
+    """
+
+    def __init__(self, store: JobStore, workers: int, max_attempts: int, retry_backoff: float,
+                 max_queued: int, poll_interval: float):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self._handlers: Dict[str, Callable[[dict], Awaitable[Any]]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._finished: Dict[str, asyncio.Event] = {}
+        # Long-polls per job; the event is dropped when the last one returns
+        self._waiters: Dict[str, int] = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def register(self, kind: str, handler: Callable[[dict], Awaitable[Any]]):
+        self._handlers[kind] = handler
+
+    def start(self):
+        if self.workers > 0 and not self._tasks:
+            self._wake = asyncio.Event()
+            self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; jobs they were running go back to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, payload: dict) -> dict:
+        if kind not in self._handlers:
+            raise UnknownJobKindError(f"No handler for job kind {kind!r}")
+        job = await asyncio.to_thread(self._create, kind, payload)
+        if self._wake is not None:
+            self._wake.set()
+        return job
+
+    def _create(self, kind: str, payload: dict) -> dict:
+        if self.store.counts()[QUEUED] >= self.max_queued:
+            raise QueueFullError(f"More than {self.max_queued} jobs are waiting")
+        job = self.store.create(kind, payload)
+        self.update_depth()
+        return job
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Return the job once it finishes, or as it stands after `timeout` seconds"""
+        deadline = time.monotonic() + timeout
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return job
+                # Re-read periodically: another process may be running the job
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_interval))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                self._finished.pop(job_id, None)
+
+    @property
+    def durable(self) -> bool:
+        """False when the store sits in the temp dir, which hosts like Render wipe on restart"""
+        temp = os.path.normcase(os.path.realpath(tempfile.gettempdir()))
+        return not os.path.normcase(os.path.realpath(self.store.path)).startswith(temp + os.sep)
+
+    def update_depth(self):
+        for status, count in self.store.counts().items():
+            job_depth.set(count, status)
+
+    async def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "max_attempts": self.max_attempts,
+            "max_queued": self.max_queued,
+            "durable": self.durable,
+            "jobs": await asyncio.to_thread(self.store.counts),
+        }
+
+    async def _work(self):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim)
+            except Exception as e:
+                # A locked or unreadable store; back off instead of killing the worker
+                print(f"Job claim failed: {e}")
+                job = None
+            if job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        await asyncio.to_thread(self.update_depth)
+        kind = job["kind"]
+        try:
+            result = await self._handlers[kind](job["payload"])
+        except asyncio.CancelledError:
+            # Synchronous, so a second cancellation during shutdown cannot skip it
+            self.store.release(job["job_id"])
+            raise
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e) or type(e).__name__
+            if job["attempts"] < self.max_attempts:
+                print(f"Job {job['job_id']} ({kind}) attempt {job['attempts']} failed, retrying: {error}")
+                job_outcomes.inc(kind, "retried")
+                await asyncio.to_thread(self.store.retry, job["job_id"], error,
+                                        delay=self.retry_backoff * 2 ** (job["attempts"] - 1))
+            else:
+                print(f"Job {job['job_id']} ({kind}) failed: {error}")
+                job_outcomes.inc(kind, FAILED)
+                await asyncio.to_thread(self.store.fail, job["job_id"], error)
+                job_latency.observe(time.time() - job["created_at"], kind, FAILED)
+        else:
+            job_outcomes.inc(kind, SUCCEEDED)
+            await asyncio.to_thread(self.store.succeed, job["job_id"], result)
+            job_latency.observe(time.time() - job["created_at"], kind, SUCCEEDED)
+        await asyncio.to_thread(self.update_depth)
+        event = self._finished.get(job["job_id"])
+        if event is not None:
+            event.set()
+
+
+# Singleton instance
+job_queue = JobQueue(
+    store=JobStore(
+        settings.JOB_DB_PATH,
+        lease=settings.JOB_LEASE_SECONDS,
+        result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+    ),
+    workers=settings.JOB_WORKERS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_backoff=settings.JOB_RETRY_BACKOFF,
+    max_queued=settings.JOB_MAX_QUEUED,
+    poll_interval=settings.JOB_POLL_INTERVAL,
+)
@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import re
+from typing import AsyncIterator, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import stage
+from app.services.conversation import to_gemini_contents
+
+
+# Seconds to wait for the next streamed token before giving up
+STREAM_IDLE_TIMEOUT = 60
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when a provider call times out on every attempt"""
+
+
+async def with_idle_timeout(chunks: AsyncIterator[str], idle_timeout: float) -> AsyncIterator[str]:
+    """Relay chunks, raising asyncio.TimeoutError if the next one takes longer than idle_timeout"""
+    iterator = chunks.__aiter__()
+    while True:
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout=idle_timeout)
+        except StopAsyncIteration:
+            return
+        yield chunk
+
+
+class LLMProvider:
+    """Async chat-completion interface shared by every AI endpoint.
+
+    messages are provider-neutral turns: [{"role": "user" | "assistant",
+    "content": str}, ...]. Subclasses implement _complete and _stream; the
+    public methods add the timeout and retry policy.
+    """
+
+    name = "base"
+    # Exceptions worth another attempt; subclasses extend this
+    retryable: tuple = (asyncio.TimeoutError,)
+    timeout_errors: tuple = (asyncio.TimeoutError,)
+
+    def __init__(self, model: str, timeout: float, max_retries: int, retry_backoff: float):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    async def complete(self, messages: List[dict], system: Optional[str] = None,
+                       temperature: float = 0.7) -> str:
+        """Return the full completion text"""
+        with stage(f"llm.{self.name}.complete"):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await asyncio.wait_for(
+                        self._complete(messages, system, temperature), timeout=self.timeout
+                    )
+                except self.retryable as e:
+                    if attempt == self.max_retries:
+                        self._raise_final(e)
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def stream(self, messages: List[dict], system: Optional[str] = None,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        """Yield completion text chunks as the provider produces them.
+
+        Failures before the first chunk are retried; once text has been sent
+        to the caller the error is raised as-is.
+        """
+        with stage(f"llm.{self.name}.stream"):
+            for attempt in range(self.max_retries + 1):
+                started = False
+                try:
+                    async for chunk in self._stream(messages, system, temperature):
+                        started = True
+                        yield chunk
+                    return
+                except self.retryable as e:
+                    if started:
+                        raise
+                    if attempt == self.max_retries:
+                        self._raise_final(e)
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _raise_final(self, error: Exception):
+        if isinstance(error, self.timeout_errors):
+            raise LLMTimeoutError(f"{self.name} timed out after {self.timeout}s") from error
+        raise error
+
+    async def _complete(self, messages, system, temperature) -> str:
+        raise NotImplementedError
+
+    async def _stream(self, messages, system, temperature) -> AsyncIterator[str]:
+        raise NotImplementedError
+        yield
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI chat completions over one long-lived AsyncOpenAI client"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], **kwargs):
+        super().__init__(**kwargs)
+        from openai import (
+            AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        )
+        # Retries are handled here so the policy is the same for every provider
+        self.client = AsyncOpenAI(api_key=api_key, timeout=self.timeout, max_retries=0)
+        self.retryable = (asyncio.TimeoutError, APIConnectionError, APITimeoutError,
+                          InternalServerError, RateLimitError)
+        self.timeout_errors = (asyncio.TimeoutError, APITimeoutError)
+
+    def _messages(self, messages, system):
+        if system:
+            return [{"role": "system", "content": system}, *messages]
+        return list(messages)
+
+    async def _complete(self, messages, system, temperature) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(messages, system),
+            temperature=temperature,
+        )
+        return response.choices[0].message.content or ""
+
+    async def _stream(self, messages, system, temperature) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(messages, system),
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini through google-generativeai's async (gRPC) client"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str], **kwargs):
+        super().__init__(**kwargs)
+        import google.generativeai as genai
+        from google.api_core import exceptions as google_exceptions
+
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.genai = genai
+        self.retryable = (asyncio.TimeoutError, google_exceptions.ServiceUnavailable,
+                          google_exceptions.ResourceExhausted, google_exceptions.DeadlineExceeded,
+                          google_exceptions.InternalServerError)
+        self.timeout_errors = (asyncio.TimeoutError, google_exceptions.DeadlineExceeded)
+
+    def _model(self, system):
+        return self.genai.GenerativeModel(self.model, system_instruction=system)
+
+    async def _complete(self, messages, system, temperature) -> str:
+        response = await self._model(system).generate_content_async(
+            to_gemini_contents(messages),
+            generation_config={"temperature": temperature},
+            request_options={"timeout": self.timeout},
+        )
+        return response.text
+
+    async def _stream(self, messages, system, temperature) -> AsyncIterator[str]:
+        response = await self._model(system).generate_content_async(
+            to_gemini_contents(messages),
+            generation_config={"temperature": temperature},
+            stream=True,
+            request_options={"timeout": self.timeout},
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+# Words from our own quiz prompts, skipped when the fake picks quiz terms
+PROMPT_WORDS = {
+    "generate", "multiple", "choice", "questions", "question", "based", "following",
+    "format", "response", "strictly", "valid", "option", "options", "answer",
+    "conversation", "context", "topic", "understanding", "plausible", "correct",
+    "markdown", "extra", "about", "there", "which", "these", "their",
+}
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local stand-in for offline runs and throughput tests.
+
+    Sleeps for `latency` seconds per call, then answers from `response` if
+    given. Otherwise quiz prompts get a JSON array of questions built from the
+    prompt text and anything else gets a short canned explanation. The same
+    input always produces the same output.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, response: Optional[str] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.response = response
+        self.calls = 0
+
+    def _answer(self, messages) -> str:
+        if self.response is not None:
+            return self.response
+        prompt = messages[-1]["content"] if messages else ""
+        if "multiple-choice" in prompt:
+            return json.dumps(self._quiz(prompt))
+        return (
+            "Here is a simple explanation. Start from the core idea, "
+            "look at an example, then check your understanding with a question."
+        )
+
+    def _quiz(self, prompt: str) -> List[dict]:
+        count_match = re.search(r"generate (\d+)", prompt, re.IGNORECASE)
+        count = int(count_match.group(1)) if count_match else 5
+        words = sorted({
+            word for word in re.findall(r"[A-Za-z]{5,}", prompt)
+            if word.lower() not in PROMPT_WORDS
+        }) or ["concept"]
+        questions = []
+        for i in range(count):
+            digest = hashlib.sha256(f"{prompt}:{i}".encode()).digest()
+            term = words[digest[0] % len(words)]
+            options = [f"{term} {label}" for label in ("A", "B", "C", "D")]
+            questions.append({
+                "question": f"Question {i + 1}: which statement about {term} is correct?",
+                "options": options,
+                "answer": options[digest[1] % 4],
+            })
+        return questions
+
+    async def _complete(self, messages, system, temperature) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._answer(messages)
+
+    async def _stream(self, messages, system, temperature) -> AsyncIterator[str]:
+        self.calls += 1
+        pieces = re.findall(r"\S+\s*", self._answer(messages)) or [""]
+        delay = self.latency / len(pieces)
+        for piece in pieces:
+            await asyncio.sleep(delay)
+            yield piece
+
+
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "gemini": "gemini-2.5-flash",
+    "fake": "fake-quizcraft",
+}
+
+_provider: Optional[LLMProvider] = None
+
+
+def create_provider(name: Optional[str] = None) -> LLMProvider:
+    """Build a provider from settings. Defaults to OpenAI in production and Gemini elsewhere."""
+    name = name or settings.LLM_PROVIDER or ("openai" if settings.ENV == "production" else "gemini")
+    common = {
+        "model": settings.LLM_MODEL or DEFAULT_MODELS.get(name, ""),
+        "timeout": settings.LLM_TIMEOUT,
+        "max_retries": settings.LLM_MAX_RETRIES,
+        "retry_backoff": settings.LLM_RETRY_BACKOFF,
+    }
+    if name == "openai":
+        return OpenAIProvider(api_key=settings.OPENAI_API_KEY, **common)
+    if name == "gemini":
+        return GeminiProvider(api_key=settings.GOOGLE_API_KEY, **common)
+    if name == "fake":
+        return FakeProvider(latency=settings.LLM_FAKE_LATENCY,
+                            response=settings.LLM_FAKE_RESPONSE, **common)
+    raise ValueError(f"Unknown LLM provider: {name}")
+
+
+def get_llm() -> LLMProvider:
+    """Process-wide provider, built on first use so its connections are reused"""
+    global _provider
+    if _provider is None:
+        _provider = create_provider()
+    return _provider
+
+
+def set_llm(provider: Optional[LLMProvider]):
+    """Swap the process-wide provider, e.g. for a FakeProvider in benchmarks"""
+    global _provider
+    _provider = provider
@@ -0,0 +1,278 @@
+"""Near-duplicate detection over quiz source texts with MinHash and LSH.
+
+A text becomes a set of word shingles, then a MinHash signature of
+`num_perm` 16-bit values whose per-position agreement with another
+signature estimates the two texts' Jaccard similarity. Signatures are
+split into `bands`; texts sharing any band hash become candidates, and only
+those are compared in full.
+
+Band hashes live in one sorted array per band (searched with
+searchsorted) plus a small unsorted tail of recent inserts, so a lookup is a
+handful of binary searches and one vectorized comparison, independent of
+the number of indexed texts. Per text the index keeps 2 bytes per
+permutation and 4 per band in memory; quizzes stay on disk in SQLite.
+"""
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+_WORD = re.compile(r"\w+")
+# Shingles hashed at a time, bounding the (shingles x num_perm) scratch matrix
+_HASH_BLOCK = 4096
+
+
+class MinHasher:
+    """MinHash signatures of word k-shingles using multiply-shift hashing"""
+
+    def __init__(self, num_perm: int, shingle_size: int, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Odd 64-bit multipliers and offsets, one pair per permutation
+        self._a = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._mix = rng.integers(0, 2 ** 63, shingle_size, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        if len(words) < self.shingle_size:
+            return np.empty(0, dtype=np.uint64)
+        hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words),
+                             dtype=np.uint64, count=len(words))
+        count = len(words) - self.shingle_size + 1
+        shingles = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            shingles += hashes[offset:offset + count] * self._mix[offset]
+        return np.unique(shingles)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """The text's signature, or None when it has fewer words than one shingle"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        minimum = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), _HASH_BLOCK):
+            block = shingles[start:start + _HASH_BLOCK, None]
+            # Top 32 bits of (a * x + b) mod 2^64 form a universal hash family
+            np.minimum(minimum, ((block * self._a + self._b) >> np.uint64(32)).min(axis=0), out=minimum)
+        # b-bit MinHash: the low 16 bits are enough to compare signatures
+        return (minimum & np.uint64(0xFFFF)).astype(np.uint16)
+
+
+class NearDuplicateIndex:
+    """Finds the stored quiz whose source text is most similar to a new one.
+
+    `namespace` separates texts whose quizzes must not be mixed (model and
+    prompt version). The SQLite file at `path` holds every signature and
+    quiz; signatures are read back into memory on first use.
+    """
+
+    def __init__(self, path: str, threshold: float, num_perm: int, bands: int,
+                 shingle_size: int, min_words: int, tail_size: int = 1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.min_words = min_words
+        self.tail_size = tail_size
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self._band_mix = np.random.default_rng(2).integers(
+            0, 2 ** 63, self.rows, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._namespaces: dict = {}
+        self._signatures: Optional[np.ndarray] = None
+        self._bands: Optional[np.ndarray] = None
+        self._doc_ids: Optional[np.ndarray] = None
+        self._namespace_ids: Optional[np.ndarray] = None
+        self._count = 0
+        self._sorted_count = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._conn is not None
+
+    def load(self):
+        with self._lock:
+            if self._conn is not None:
+                return
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS near_duplicates ("
+                "doc_id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, signature BLOB NOT NULL, "
+                "quiz TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.commit()
+            rows = conn.execute(
+                "SELECT doc_id, namespace, signature FROM near_duplicates ORDER BY doc_id"
+            ).fetchall()
+            num_perm = self.hasher.num_perm
+            self._allocate(max(len(rows), 1024))
+            if rows:
+                signatures = np.frombuffer(b"".join(row[2] for row in rows), dtype=np.uint16)
+                self._signatures[:len(rows)] = signatures.reshape(len(rows), num_perm)
+                self._bands[:len(rows)] = self._band_hashes(self._signatures[:len(rows)])
+                self._doc_ids[:len(rows)] = [row[0] for row in rows]
+                self._namespace_ids[:len(rows)] = [self._namespace_id(row[1]) for row in rows]
+                self._count = len(rows)
+            self._sort()
+            self._conn = conn
+
+    def lookup(self, text: str, namespace: str) -> Optional[dict]:
+        """The stored quiz for the most similar text at or above the threshold, with its similarity"""
+        if len(_WORD.findall(text)) < self.min_words:
+            return None
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return None
+        self.load()
+        with self._lock:
+            match = self._best_match(signature, namespace)
+            if match is None:
+                self.misses += 1
+                return None
+            doc_id, similarity = match
+            row = self._conn.execute(
+                "SELECT quiz FROM near_duplicates WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        self.hits += 1
+        return {"quiz": json.loads(row[0]), "similarity": similarity}
+
+    def add(self, text: str, namespace: str, quiz: list):
+        if len(_WORD.findall(text)) < self.min_words:
+            return
+        signature = self.hasher.signature(text)
+        if signature is None:
+            return
+        self.load()
+        with self._lock:
+            doc_id = self._conn.execute(
+                "INSERT INTO near_duplicates (namespace, signature, quiz, created_at) VALUES (?, ?, ?, ?)",
+                (namespace, signature.tobytes(), json.dumps(quiz), time.time()),
+            ).lastrowid
+            self._conn.commit()
+            self._append(signature, namespace, doc_id)
+
+    def stats(self) -> dict:
+        return {
+            "loaded": self.loaded,
+            "documents": self._count,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows_per_band": self.rows,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _append(self, signature: np.ndarray, namespace: str, doc_id: int):
+        if self._count == len(self._signatures):
+            self._allocate(len(self._signatures) * 2)
+        row = self._count
+        self._signatures[row] = signature
+        self._bands[row] = self._band_hashes(signature[None, :])[0]
+        self._doc_ids[row] = doc_id
+        self._namespace_ids[row] = self._namespace_id(namespace)
+        self._count += 1
+        if self._count - self._sorted_count >= self.tail_size:
+            self._merge_tail()
+
+    def _allocate(self, capacity: int):
+        def grow(old: Optional[np.ndarray], shape, dtype) -> np.ndarray:
+            new = np.zeros(shape, dtype=dtype)
+            if old is not None:
+                new[:self._count] = old[:self._count]
+            return new
+
+        self._signatures = grow(self._signatures, (capacity, self.hasher.num_perm), np.uint16)
+        self._bands = grow(self._bands, (capacity, self.bands), np.uint32)
+        self._doc_ids = grow(self._doc_ids, capacity, np.int64)
+        self._namespace_ids = grow(self._namespace_ids, capacity, np.int32)
+
+    def _namespace_id(self, namespace: str) -> int:
+        return self._namespaces.setdefault(namespace, len(self._namespaces))
+
+    def _band_hashes(self, signatures: np.ndarray) -> np.ndarray:
+        banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return ((banded * self._band_mix).sum(axis=2) >> np.uint64(32)).astype(np.uint32)
+
+    def _sort(self):
+        """Rebuild the sorted per-band arrays over every row"""
+        order = np.argsort(self._bands[:self._count], axis=0, kind="stable")
+        self._sorted_rows = [order[:, band].astype(np.int32) for band in range(self.bands)]
+        self._sorted_keys = [self._bands[order[:, band], band] for band in range(self.bands)]
+        self._sorted_count = self._count
+
+    def _merge_tail(self):
+        """Fold recent rows into the sorted arrays in linear time"""
+        tail = np.arange(self._sorted_count, self._count, dtype=np.int32)
+        for band in range(self.bands):
+            keys = self._bands[tail, band]
+            order = np.argsort(keys, kind="stable")
+            positions = np.searchsorted(self._sorted_keys[band], keys[order], side="right")
+            self._sorted_keys[band] = np.insert(self._sorted_keys[band], positions, keys[order])
+            self._sorted_rows[band] = np.insert(self._sorted_rows[band], positions, tail[order])
+        self._sorted_count = self._count
+
+    def _best_match(self, signature: np.ndarray, namespace: str):
+        namespace_id = self._namespaces.get(namespace)
+        if namespace_id is None or not self._count:
+            return None
+        query = self._band_hashes(signature[None, :])[0]
+        candidates: List[np.ndarray] = []
+        for band in range(self.bands):
+            keys = self._sorted_keys[band]
+            low = np.searchsorted(keys, query[band], side="left")
+            high = np.searchsorted(keys, query[band], side="right")
+            if high > low:
+                candidates.append(self._sorted_rows[band][low:high])
+        tail = self._bands[self._sorted_count:self._count]
+        if len(tail):
+            candidates.append(np.flatnonzero((tail == query).any(axis=1)) + self._sorted_count)
+        if not candidates:
+            return None
+        rows = np.unique(np.concatenate(candidates))
+        rows = rows[self._namespace_ids[rows] == namespace_id]
+        if not len(rows):
+            return None
+        similarity = (self._signatures[rows] == signature).mean(axis=1)
+        best = int(similarity.argmax())
+        if similarity[best] < self.threshold:
+            return None
+        return int(self._doc_ids[rows[best]]), round(float(similarity[best]), 4)
+
+
+def reshuffle(quiz: list, seed: Optional[int] = None) -> list:
+    """The same questions in a new order, each with its options shuffled"""
+    rng = random.Random(seed)
+    questions = [dict(question) for question in quiz]
+    rng.shuffle(questions)
+    for question in questions:
+        if isinstance(question.get("options"), list):
+            question["options"] = rng.sample(question["options"], len(question["options"]))
+    return questions
+
+
+# Singleton instance
+near_duplicates = NearDuplicateIndex(
+    path=settings.NEAR_DUP_DB_PATH,
+    threshold=settings.NEAR_DUP_THRESHOLD,
+    num_perm=settings.NEAR_DUP_NUM_PERM,
+    bands=settings.NEAR_DUP_BANDS,
+    shingle_size=settings.NEAR_DUP_SHINGLE_SIZE,
+    min_words=settings.NEAR_DUP_MIN_WORDS,
+)
@@ -0,0 +1,78 @@
+import base64
+import json
+from typing import Any, Optional
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(row: dict, sort_col: str, id_col: str) -> str:
+    """Opaque token for a row's position: base64url of its (sort value, id)"""
+    raw = json.dumps([row[sort_col], row[id_col]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_value, id_value = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, id_value
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def _quote(value: Any) -> str:
+    """Quote a value for a PostgREST logic tree (timestamps contain reserved characters)"""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _past(sort_col: str, id_col: str, cursor: tuple, op: str) -> str:
+    """or() filter for rows strictly past the cursor in (sort_col, id_col) order"""
+    sort_value, id_value = _quote(cursor[0]), _quote(cursor[1])
+    return f"{sort_col}.{op}.{sort_value},and({sort_col}.eq.{sort_value},{id_col}.{op}.{id_value})"
+
+
+def keyset_page(query, sort_col: str, id_col: str, descending: bool, limit: int,
+                before: Optional[str] = None, after: Optional[str] = None,
+                tail: bool = False) -> dict:
+    """Fetch one page of `query` ordered by (sort_col, id_col).
+
+    `after` returns the rows that follow the cursor in list order, `before`
+    the rows that precede it. Without a cursor the first page is returned,
+    or the last one when `tail` is set (e.g. the newest chat messages).
+    Each call is a single indexed range read of limit + 1 rows, however deep
+    the page. Returns {"items", "next_cursor", "prev_cursor"}; a cursor is
+    None when there is nothing further in that direction.
+    """
+    if before and after:
+        raise InvalidCursorError("Pass either before or after, not both")
+    reverse = bool(before) or (tail and not after)
+    # Walking backwards means reading the list in the opposite order
+    read_descending = descending != reverse
+
+    if after or before:
+        cursor = decode_cursor(after or before)
+        op = "lt" if read_descending else "gt"
+        query = query.or_(_past(sort_col, id_col, cursor, op))
+
+    rows = query \
+        .order(sort_col, desc=read_descending) \
+        .order(id_col, desc=read_descending) \
+        .limit(limit + 1) \
+        .execute().data
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if reverse:
+        rows.reverse()
+
+    first = encode_cursor(rows[0], sort_col, id_col) if rows else None
+    last = encode_cursor(rows[-1], sort_col, id_col) if rows else None
+    if reverse:
+        prev_cursor = first if has_more else None
+        next_cursor = last if before else None
+    else:
+        next_cursor = last if has_more else None
+        prev_cursor = first if after else None
+    return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
@@ -0,0 +1,74 @@
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+
+def earned_points(quiz: dict, answers: Optional[Iterable[dict]] = None) -> float:
+    """Score a finished quiz counts for: its stored score, else its correct answers"""
+    if quiz.get("score") is not None:
+        return float(quiz["score"])
+    return float(sum(1 for answer in answers or [] if answer.get("is_correct")))
+
+
+def percentage(earned: float, maximum: int) -> float:
+    return round(100 * earned / maximum, 2) if maximum else 0.0
+
+
+def aggregate(quizzes: Iterable[dict]) -> Dict[str, dict]:
+    """Fold finished quizzes ({"user_id", "earned", "max"}) into per-user progress rows"""
+    totals = defaultdict(lambda: {"no_of_quizzes_taken": 0, "total_earned_score": 0.0,
+                                  "total_max_score": 0})
+    for quiz in quizzes:
+        row = totals[str(quiz["user_id"])]
+        row["no_of_quizzes_taken"] += 1
+        row["total_earned_score"] += quiz["earned"]
+        row["total_max_score"] += quiz["max"]
+    return {
+        user_id: {
+            "user_id": user_id,
+            **row,
+            "percentage": percentage(row["total_earned_score"], row["total_max_score"])
+        }
+        for user_id, row in totals.items()
+    }
+
+
+def empty_progress(user_id: str) -> dict:
+    return {
+        "user_id": str(user_id),
+        "no_of_quizzes_taken": 0,
+        "total_earned_score": 0.0,
+        "total_max_score": 0,
+        "percentage": 0.0
+    }
+
+
+def rebuild(page_size: int = 1000) -> dict:
+    """Recompute every User_Progress row from Quiz and User_Answer.
+
+    Finished quizzes are read in pages, folded per user and written back in
+    bulk. Users who no longer have any finished quiz are reset to zero.
+    """
+    from app.services.databases import db
+
+    finished = (
+        {
+            "user_id": quiz["user_id"],
+            "earned": earned_points(quiz, quiz["answers"]),
+            "max": quiz.get("no_of_questions") or 0
+        }
+        for quiz in db.iter_finished_quizzes(page_size)
+    )
+    rows = aggregate(finished)
+    for user_id in db.get_progress_user_ids():
+        rows.setdefault(str(user_id), empty_progress(user_id))
+    db.upsert_user_progress(list(rows.values()))
+    return {"users": len(rows)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain per-user progress aggregates")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+    print(f"Rebuilt progress for {rebuild(args.page_size)['users']} users")
@@ -0,0 +1,40 @@
+from typing import Iterable, List, Optional
+
+# Columns a client may ask for, per table
+ALLOWED_FIELDS = {
+    "Chat_Session": {"session_id", "user_id", "title", "mode", "created_at", "last_active_at"},
+    "Message": {"message_id", "session_id", "sender", "content", "timestamp", "quiz_data"},
+    "Quiz": {"quiz_id", "session_id", "score", "is_finished", "timestamp_started",
+             "timestamp_finished", "no_of_questions"},
+    "Question": {"question_id", "quiz_id", "quiz_question", "correct_answer", "options"},
+    "User_Answer": {"user_answer_id", "question_id", "answer", "is_correct", "created_at"},
+}
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a fields= parameter names a column that is not allowed"""
+
+
+def parse_fields(table: str, fields: Optional[str], required: Iterable[str] = ()) -> str:
+    """Turn a comma-separated fields= value into a PostgREST column list.
+
+    Returns "*" when no fields are requested. Columns in `required` (e.g.
+    pagination keys) are always included.
+    """
+    if not fields:
+        return "*"
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in ALLOWED_FIELDS[table]]
+    if unknown:
+        allowed = ", ".join(sorted(ALLOWED_FIELDS[table]))
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(unknown)}. Allowed: {allowed}")
+    columns = list(dict.fromkeys([*requested, *required]))
+    return ",".join(columns)
+
+
+def project(rows: List[dict], columns: str) -> List[dict]:
+    """Apply a parse_fields() column list to rows that were fetched with select("*")"""
+    if columns == "*":
+        return [dict(row) for row in rows]
+    keys = columns.split(",")
+    return [{key: row.get(key) for key in keys} for row in rows]
@@ -0,0 +1,222 @@
+"""Stored questions as a searchable bank, so topic quizzes can skip the LLM.
+
+A user's bank holds the questions with options from their own quizzes,
+indexed by the words of the text, options and answer, plus the topic (the
+chat session title) unless it is a default title. Identical questions
+stored under several quizzes are one entry. A topic query ranks entries
+with BM25 over an in-memory inverted index, leaves out questions the user
+has already answered, and returns a quiz only when it can fill every slot.
+"""
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+from app.services.cache import LRUCache
+from app.services.quiz_cache import normalize_text
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "which", "who",
+    "why", "with", "me", "my", "about", "some", "quiz", "question", "questions",
+}
+# Titles sessions get before the user names them; they say nothing about the topic
+DEFAULT_TITLES = {"new chat"}
+# Term weight of a question's topic relative to its text
+TOPIC_WEIGHT = 2.0
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words without stopwords, with a plural "s" dropped"""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOPWORDS or len(word) < 2:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def question_key(text: str) -> str:
+    return normalize_text(text).lower()
+
+
+class QuestionBank:
+    """Inverted index over stored multiple-choice questions.
+
+    add() takes Question rows (rows without at least two options cannot be
+    served and are skipped). Safe to call from DB worker threads.
+    """
+
+    def __init__(self, min_coverage: float):
+        self.min_coverage = min_coverage
+        self._lock = threading.Lock()
+        self._entries: List[dict] = []
+        self._by_key: Dict[str, int] = {}
+        self._by_question_id: Dict[str, int] = {}
+        self.quiz_ids: Set[str] = set()
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._total_length = 0.0
+        self.served = 0
+        self.unfilled = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, rows: Iterable[dict], topics: Optional[Dict[str, str]] = None):
+        """Index Question rows; `topics` maps quiz_id to a topic for rows that have one"""
+        with self._lock:
+            for row in rows:
+                self._add(row, (topics or {}).get(str(row.get("quiz_id"))))
+
+    def _add(self, row: dict, topic: Optional[str]):
+        options = row.get("options")
+        text = row.get("quiz_question")
+        if not text or not isinstance(options, list) or len(options) < 2:
+            return
+        self.quiz_ids.add(str(row.get("quiz_id")))
+        key = question_key(text)
+        index = self._by_key.get(key)
+        if index is None:
+            index = len(self._entries)
+            self._entries.append({
+                "question": text,
+                "options": [str(option) for option in options],
+                "answer": row.get("correct_answer"),
+                "topics": set(),
+                "length": 0.0,
+            })
+            self._by_key[key] = index
+            words = " ".join([text, row.get("correct_answer") or "", *map(str, options)])
+            self._index(index, tokenize(words), 1.0)
+        # The same question can be stored under several topics; each counts once
+        if topic and question_key(topic) not in DEFAULT_TITLES \
+                and question_key(topic) not in self._entries[index]["topics"]:
+            self._entries[index]["topics"].add(question_key(topic))
+            self._index(index, tokenize(topic), TOPIC_WEIGHT)
+        if row.get("question_id") is not None:
+            self._by_question_id[str(row["question_id"])] = index
+
+    def _index(self, index: int, terms: List[str], weight: float):
+        postings = self._postings
+        for term in terms:
+            postings[term][index] = postings[term].get(index, 0.0) + weight
+        self._entries[index]["length"] += weight * len(terms)
+        self._total_length += weight * len(terms)
+
+    def can_fill(self, topic: str, count: int) -> bool:
+        """Whether `count` questions match the topic before excluding any the user has answered"""
+        terms = list(dict.fromkeys(tokenize(topic)))
+        if not terms or len(self._entries) < count:
+            return False
+        with self._lock:
+            return len(self._rank(terms, set())) >= count
+
+    def quiz(self, topic: str, count: int, answered_ids: Iterable = ()) -> Optional[List[dict]]:
+        """The `count` best-matching questions for `topic`, or None if the bank has too few"""
+        terms = list(dict.fromkeys(tokenize(topic)))
+        if not terms:
+            return None
+        with self._lock:
+            excluded: Set[int] = {self._by_question_id[str(question_id)] for question_id in answered_ids
+                                  if str(question_id) in self._by_question_id}
+            ranked = self._rank(terms, excluded)
+            if len(ranked) < count:
+                self.unfilled += 1
+                return None
+            self.served += 1
+            return [
+                {key: self._entries[index][key] for key in ("question", "options", "answer")}
+                for index in ranked[:count]
+            ]
+
+    def _rank(self, terms: List[str], excluded: Set[int]) -> List[int]:
+        documents = len(self._entries)
+        average_length = self._total_length / documents if documents else 1.0
+        scores: Dict[int, float] = defaultdict(float)
+        matched: Dict[int, int] = defaultdict(int)
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for index, tf in postings.items():
+                if index in excluded:
+                    continue
+                length = self._entries[index]["length"]
+                scores[index] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+                matched[index] += 1
+        needed = math.ceil(self.min_coverage * len(terms))
+        candidates = [index for index in scores if matched[index] >= needed]
+        candidates.sort(key=lambda index: (-scores[index], index))
+        return candidates
+
+    def stats(self) -> dict:
+        return {
+            "questions": len(self._entries),
+            "stored_rows": len(self._by_question_id),
+            "terms": len(self._postings),
+            "quizzes_served": self.served,
+            "quizzes_unfilled": self.unfilled,
+        }
+
+
+class UserQuestionBanks:
+    """One QuestionBank per user, over the questions in that user's own quizzes.
+
+    A bank is built on the user's first topic quiz from a query scoped to
+    their sessions, so nothing is scanned at startup and nobody is served
+    another user's questions. Banks live for `ttl` seconds; one is dropped
+    early when questions are written to a quiz it holds, and a brand-new
+    quiz shows up once the bank expires.
+    """
+
+    def __init__(self, min_coverage: float, ttl: float, max_users: int, page_size: int):
+        self.min_coverage = min_coverage
+        self.page_size = page_size
+        self._banks = LRUCache(max_entries=max_users, ttl=ttl)
+        self.builds = 0
+
+    def get(self, user_id: str, service) -> QuestionBank:
+        """The user's bank, built from `service` (a DatabaseService) when not cached"""
+        bank = self._banks.get(str(user_id))
+        if bank is None:
+            bank = QuestionBank(self.min_coverage)
+            for page in service.iter_user_questions(user_id, self.page_size):
+                bank.add(page, {str(row["quiz_id"]): row.get("topic") for row in page})
+            self._banks.set(str(user_id), bank)
+            self.builds += 1
+        return bank
+
+    def forget_quizzes(self, quiz_ids: Iterable):
+        """Drop the banks holding any of these quizzes; they are rebuilt on next use"""
+        quiz_ids = {str(quiz_id) for quiz_id in quiz_ids}
+        for user_id, bank in self._banks.items():
+            if bank.quiz_ids & quiz_ids:
+                self._banks.delete(user_id)
+
+    def stats(self) -> dict:
+        banks = [bank for _, bank in self._banks.items()]
+        return {
+            "users": len(banks),
+            "builds": self.builds,
+            "questions": sum(len(bank) for bank in banks),
+            "quizzes_served": sum(bank.served for bank in banks),
+            "quizzes_unfilled": sum(bank.unfilled for bank in banks),
+        }
+
+
+# Singleton instance
+question_banks = UserQuestionBanks(
+    min_coverage=settings.QUESTION_BANK_MIN_COVERAGE,
+    ttl=settings.QUESTION_BANK_TTL_SECONDS,
+    max_users=settings.QUESTION_BANK_MAX_USERS,
+    page_size=settings.QUESTION_BANK_PAGE_SIZE,
+)
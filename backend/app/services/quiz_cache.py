@@ -0,0 +1,191 @@
+import asyncio
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.services.cache import LRUCache
+
+# Bump whenever a quiz prompt changes so old generations stop matching
+PROMPT_VERSION = "1"
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of source text: NFC unicode and collapsed whitespace"""
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def quiz_cache_key(text: str, topic: Optional[str], model: str,
+                   prompt_version: str = PROMPT_VERSION) -> str:
+    """Content address of a generation: hash of normalized text, topic, model and prompt version"""
+    payload = json.dumps(
+        [normalize_text(text), normalize_text(topic or "").lower(), model, prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """SQLite-backed second tier that survives restarts"""
+
+    def __init__(self, path: str, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS quiz_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM quiz_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] + self.ttl <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO quiz_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        self._conn.execute(
+            "DELETE FROM quiz_cache WHERE created_at <= ?", (time.time() - self.ttl,)
+        )
+        self._conn.execute(
+            "DELETE FROM quiz_cache WHERE key NOT IN "
+            "(SELECT key FROM quiz_cache ORDER BY created_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM quiz_cache")
+            self._conn.commit()
+
+
+class QuizCache:
+    """Two-tier cache of generated quizzes keyed by quiz_cache_key().
+
+    Lookups hit the in-process LRU first, then the optional SQLite tier,
+    promoting disk hits back into memory. The memory tier is bounded by
+    entry count and by the JSON size of the quizzes it holds. Values are
+    copied in and out, so callers may modify what they get back.
+
+    Async code uses aget/aset, which run SQLite in a worker thread so a
+    slow disk never stalls the event loop.
+    """
+
+    def __init__(self, enabled: bool, max_entries: int, ttl: float,
+                 max_bytes: Optional[int] = None,
+                 disk_path: Optional[str] = None, disk_max_entries: int = 10000):
+        self.enabled = enabled
+        self.memory = LRUCache(
+            max_entries=max_entries, ttl=ttl, max_bytes=max_bytes,
+            size_fn=lambda value: len(json.dumps(value)),
+        )
+        self.disk = DiskTier(disk_path, ttl, disk_max_entries) if disk_path else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    def get(self, key: str, bypass: bool = False) -> Optional[Any]:
+        if not self.enabled or bypass:
+            self.bypassed += 1
+            return None
+        value = self._get_memory(key)
+        if value is None and self.disk is not None:
+            value = self._promote(key, self.disk.get(key))
+        if value is None:
+            self.misses += 1
+        return value
+
+    async def aget(self, key: str, bypass: bool = False) -> Optional[Any]:
+        """Like get, with the disk lookup off the event loop"""
+        if not self.enabled or bypass:
+            self.bypassed += 1
+            return None
+        value = self._get_memory(key)
+        if value is None and self.disk is not None:
+            value = self._promote(key, await asyncio.to_thread(self.disk.get, key))
+        if value is None:
+            self.misses += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    async def aset(self, key: str, value: Any):
+        """Like set, with the disk write off the event loop"""
+        if not self.enabled:
+            return
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is None:
+            return None
+        self.memory_hits += 1
+        return copy.deepcopy(value)
+
+    def _promote(self, key: str, value: Optional[Any]) -> Optional[Any]:
+        if value is None:
+            return None
+        self.disk_hits += 1
+        self.memory.set(key, value)
+        return copy.deepcopy(value)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory": self.memory.stats(),
+            "disk": self.disk is not None,
+        }
+
+
+# Singleton instance
+quiz_cache = QuizCache(
+    enabled=settings.QUIZ_CACHE_ENABLED,
+    max_entries=settings.QUIZ_CACHE_MAX_ENTRIES,
+    ttl=settings.QUIZ_CACHE_TTL_SECONDS,
+    max_bytes=settings.QUIZ_CACHE_MAX_BYTES,
+    disk_path=settings.QUIZ_CACHE_DB_PATH,
+    disk_max_entries=settings.QUIZ_CACHE_DISK_MAX_ENTRIES,
+)
@@ -0,0 +1,109 @@
+import asyncio
+import math
+import re
+from typing import Awaitable, Callable, List
+
+# Look this far back from a chunk's end for a paragraph or sentence break
+BOUNDARY_WINDOW = 0.2
+# Question pairs at or above this word-set Jaccard similarity are duplicates
+DUPLICATE_THRESHOLD = 0.8
+WHITESPACE = re.compile(r"\s")
+
+
+def split_text(text: str, chunk_size: int, overlap: int) -> List[str]:
+    """Split text into chunks of at most chunk_size characters.
+
+    Consecutive chunks share about `overlap` characters so questions about a
+    passage that straddles a boundary still see all of it. Chunks end at a
+    paragraph or sentence break when one is close to the limit.
+    """
+    text = text.strip()
+    if len(text) <= chunk_size:
+        return [text] if text else []
+
+    overlap = min(overlap, chunk_size // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            window_start = end - int(chunk_size * BOUNDARY_WINDOW)
+            window = text[window_start:end]
+            breaks = [window.rfind("\n\n")] + [m.end() for m in re.finditer(r"[.!?]\s", window)]
+            best = max(breaks)
+            if best > 0:
+                end = window_start + best
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        # Begin the overlap at a word boundary
+        gap = WHITESPACE.search(text, start, end)
+        if gap:
+            start = gap.end()
+    return [chunk for chunk in chunks if chunk]
+
+
+def spread(items: List, limit: int) -> List:
+    """Pick at most `limit` items evenly spaced across the list"""
+    if len(items) <= limit:
+        return items
+    step = len(items) / limit
+    return [items[int(i * step)] for i in range(limit)]
+
+
+def _words(question: dict) -> set:
+    return set(re.findall(r"\w+", str(question.get("question", "")).lower()))
+
+
+def dedupe_questions(questions: List[dict]) -> List[dict]:
+    """Drop questions whose wording matches an earlier one"""
+    kept, kept_words = [], []
+    for question in questions:
+        words = _words(question)
+        if not words:
+            continue
+        duplicate = any(
+            len(words & other) / len(words | other) >= DUPLICATE_THRESHOLD
+            for other in kept_words
+        )
+        if not duplicate:
+            kept.append(question)
+            kept_words.append(words)
+    return kept
+
+
+def select_questions(candidates_per_chunk: List[List[dict]], count: int) -> List[dict]:
+    """Take questions round-robin across chunks so the quiz covers the whole text"""
+    ordered = []
+    for round_index in range(max((len(c) for c in candidates_per_chunk), default=0)):
+        for candidates in candidates_per_chunk:
+            if round_index < len(candidates):
+                ordered.append(candidates[round_index])
+    return dedupe_questions(ordered)[:count]
+
+
+async def map_reduce_quiz(text: str, count: int,
+                          generate: Callable[[str, int], Awaitable[List[dict]]],
+                          chunk_size: int, overlap: int,
+                          max_chunks: int, parallelism: int) -> List[dict]:
+    """Build a quiz for a long text from per-chunk candidate questions.
+
+    Map: `generate(chunk, n)` runs for at most max_chunks evenly spaced
+    chunks, `parallelism` at a time. Reduce: candidates are de-duplicated and
+    `count` questions are picked across chunks. Failed chunks are skipped
+    unless every chunk fails.
+    """
+    chunks = spread(split_text(text, chunk_size, overlap), max_chunks)
+    per_chunk = max(2, math.ceil(count * 1.5 / len(chunks)))
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(chunk: str) -> List[dict]:
+        async with semaphore:
+            return await generate(chunk, per_chunk)
+
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    candidates = [result for result in results if not isinstance(result, BaseException)]
+    if not candidates:
+        raise results[0]
+    return select_questions(candidates, count)
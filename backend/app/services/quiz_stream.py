@@ -0,0 +1,90 @@
+import json
+from typing import AsyncIterator, List
+
+from pydantic import ValidationError
+
+from app.core.metrics import stage
+from app.models.schemas import QuizQuestion
+
+
+class IncrementalArrayParser:
+    """Pull complete objects out of a JSON array while its text streams in.
+
+    feed() takes the next chunk of model output and returns every top-level
+    object of the array that closed within it. Text before the opening
+    bracket (prose, a markdown fence) is ignored. Only the unfinished tail is
+    kept in memory.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._object_start = -1
+
+    def feed(self, chunk: str) -> List[dict]:
+        if self._finished:
+            return []
+        self._buffer += chunk
+        objects = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            char = buffer[i]
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                    self._depth = 1
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if char == "{" and self._depth == 1:
+                    self._object_start = i
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._depth == 1 and self._object_start >= 0:
+                    try:
+                        objects.append(json.loads(buffer[self._object_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._object_start = -1
+                elif self._depth == 0:
+                    self._finished = True
+                    break
+            i += 1
+
+        # Drop everything no open object still needs
+        keep_from = self._object_start if self._object_start >= 0 else i
+        self._buffer = buffer[keep_from:]
+        self._pos = i - keep_from
+        if self._object_start >= 0:
+            self._object_start = 0
+        return objects
+
+
+async def stream_questions(chunks: AsyncIterator[str]) -> AsyncIterator[QuizQuestion]:
+    """Validate and yield each quiz question as soon as its JSON object closes.
+
+    Objects that do not match QuizQuestion are skipped.
+    """
+    parser = IncrementalArrayParser()
+    async for chunk in chunks:
+        with stage("quiz.stream_parse"):
+            items = parser.feed(chunk)
+        for item in items:
+            try:
+                yield QuizQuestion(**item)
+            except (TypeError, ValidationError):
+                continue
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.core.metrics import registry
+
+flight_calls = registry.counter(
+    "quizcraft_singleflight_calls_total",
+    "Coalesced calls by group; role=shared calls rode on another caller's request",
+    ("group", "role"),
+)
+
+
+class SingleFlight:
+    """Collapses concurrent async calls with the same key into one.
+
+    The first caller for a key starts `fn()` as a task; callers arriving
+    while it runs await that same task and get its result or its exception.
+    The task is shielded, so a leader whose client disconnects does not
+    cancel the call for everyone else. Coalescing is per process and only
+    while a call is in flight; caching finished results is the caller's job.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            flight_calls.inc(self.name, "leader")
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self.shared += 1
+            flight_calls.inc(self.name, "shared")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Nobody may be left to retrieve it once every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
+
+
+# Singleton instances
+quiz_flights = SingleFlight("quiz")
+explain_flights = SingleFlight("explain")
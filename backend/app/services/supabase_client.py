@@ -1,5 +1,158 @@
-from supabase import create_client, Client
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
 from app.core.config import settings
 
-def get_supabase() -> Client:
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+
+class SupabasePool:
+    """Long-lived Supabase client shared by the whole app.
+
+    One Client is built over a single httpx connection pool, so PostgREST and
+    auth requests reuse keep-alive connections instead of paying a new TLS
+    handshake per request. The pool is opened and closed by the FastAPI
+    lifespan, and rebuilt on demand if its connections go bad, at most once
+    per `reconnect_interval` seconds.
+    """
+
+    def __init__(self, url: str, key: str, pool_size: int,
+                 keepalive_expiry: float, timeout: float, reconnect_interval: float = 5.0):
+        self.url = url
+        self.key = key
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
+        self._lock = threading.Lock()
+        self._http: Optional["httpx.Client"] = None
+        self._client: Optional["Client"] = None
+        # Bumped on every rebuild, so callers that saw the same broken pool reconnect once
+        self.generation = 0
+        self._reconnected_at = float("-inf")
+        self.reconnects = 0
+
+    @property
+    def client(self) -> "Client":
+        """The shared client, connecting on first use"""
+        client = self._client
+        if client is None:
+            with self._lock:
+                if self._client is None:
+                    self._connect()
+                client = self._client
+        return client
+
+    def _connect(self):
+        # Imported on first use: supabase pulls in auth, realtime, storage and
+        # postgrest, a large share of cold-start time
+        import httpx
+        from supabase import create_client
+        from supabase.lib.client_options import SyncClientOptions
+
+        self._http = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=self.timeout,
+            follow_redirects=True,
+            http2=True,
+        )
+        options = SyncClientOptions(httpx_client=self._http)
+        self._client = create_client(self.url, self.key, options=options)
+        self.generation += 1
+
+    def connect(self):
+        """Open the pool if it is not open yet"""
+        return self.client
+
+    def auth_client(self) -> "Client":
+        """A new Client for Supabase Auth calls, over the shared connection pool.
+
+        sign_in, sign_up and sign_out rewrite the Authorization header of the
+        client they run on; on the shared client that would change the
+        credentials of every PostgREST call in flight.
+        """
+        from supabase import create_client
+        from supabase.lib.client_options import SyncClientOptions
+
+        self.connect()
+        options = SyncClientOptions(httpx_client=self._http, auto_refresh_token=False,
+                                    persist_session=False)
+        return create_client(self.url, self.key, options=options)
+
+    def reconnect(self, generation: Optional[int] = None) -> bool:
+        """Replace the client and its connection pool; returns whether it did.
+
+        `generation` is the one the caller saw fail: if the pool has been
+        rebuilt since, or was rebuilt less than reconnect_interval ago, this
+        is a no-op, so an outage does not turn into a rebuild per failed
+        call. The old pool is closed once requests already running on it
+        have had `timeout` seconds to finish.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            now = time.monotonic()
+            if now - self._reconnected_at < self.reconnect_interval:
+                return False
+            old = self._http
+            self._connect()
+            self._reconnected_at = now
+            self.reconnects += 1
+        if old is not None:
+            closer = threading.Timer(self.timeout, old.close)
+            closer.daemon = True
+            closer.start()
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+            self._http = None
+            self._client = None
+
+    def health_check(self) -> dict:
+        """Ping the auth health endpoint over the pool, reconnecting once on transport errors"""
+        import httpx
+
+        for attempt in range(2):
+            self.connect()
+            generation = self.generation
+            started = time.perf_counter()
+            try:
+                response = self._http.get(
+                    f"{self.url}/auth/v1/health", headers={"apikey": self.key}
+                )
+                response.raise_for_status()
+                return {
+                    "status": "healthy",
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                }
+            except httpx.TransportError as e:
+                if attempt == 0 and self.reconnect(generation):
+                    continue
+                return {"status": "unhealthy", "error": str(e)}
+            except httpx.HTTPError as e:
+                return {"status": "unhealthy", "error": str(e)}
+
+
+# Singleton instance
+supabase_pool = SupabasePool(
+    url=settings.SUPABASE_URL,
+    key=settings.SUPABASE_KEY,
+    pool_size=settings.SUPABASE_POOL_SIZE,
+    keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+    timeout=settings.SUPABASE_HTTP_TIMEOUT,
+    reconnect_interval=settings.SUPABASE_RECONNECT_INTERVAL,
+)
+
+
+def get_supabase() -> "Client":
+    return supabase_pool.client
@@ -0,0 +1,46 @@
+import time
+
+
+def _import_jwt():
+    import jwt  # noqa: F401
+
+
+def _import_analytics():
+    import app.services.analytics  # noqa: F401
+
+
+def _load_near_duplicates():
+    from app.core.config import settings
+    if settings.NEAR_DUP_ENABLED:
+        from app.services.near_duplicates import near_duplicates
+        near_duplicates.load()
+
+
+def warm_up() -> dict:
+    """Do the work that otherwise happens lazily on first use.
+
+    Opens the Supabase pool (importing supabase), builds the LLM provider
+    (importing its SDK), loads PyJWT and NumPy and reads the near-duplicate
+    index into memory. Returns how long each step took in ms; failures are
+    logged and skipped, since everything still initializes on demand.
+    """
+    from app.services.llm import get_llm
+    from app.services.supabase_client import supabase_pool
+
+    steps = [
+        ("supabase", supabase_pool.connect),
+        ("llm", get_llm),
+        ("jwt", _import_jwt),
+        ("analytics", _import_analytics),
+        ("near_duplicates", _load_near_duplicates),
+    ]
+    timings = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"Warm-up step {name} failed: {e}")
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return timings
@@ -0,0 +1,239 @@
+"""End-to-end API throughput with no Supabase and no LLM keys.
+
+Runs the FastAPI app in-process (httpx ASGITransport, lifespan included)
+with the fake LLM provider, against either the in-memory DatabaseService
+(benchmarks/memory_db.py, the default) or a local Supabase stack at
+SUPABASE_URL (`supabase start`; users bench0@example.com, bench1@... with
+password "benchmark" must exist there). Each virtual user repeatedly logs in, lists sessions, chats,
+generates a quiz and submits it. Latency percentiles and requests per
+second are reported per endpoint and can be saved as JSON and compared
+with an earlier run.
+
+    cd backend
+    python -m benchmarks.api_throughput --users 20 --iterations 10 --output results.json
+    python -m benchmarks.api_throughput --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+JWT_SECRET = "benchmark-secret-benchmark-secret"
+NOTES = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll absorbs light in the thylakoid membranes.",
+    "The French Revolution began in 1789. The storming of the Bastille became its symbol "
+    "and the monarchy was abolished in 1792.",
+    "Newton's second law states that force equals mass times acceleration. "
+    "Momentum is conserved in closed systems.",
+]
+
+
+def configure(args):
+    """Point settings at the stand-ins; must run before the app is imported"""
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark")
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_FAKE_LATENCY"] = str(args.llm_latency)
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    # Fresh SQLite stores per run, so jobs and indexed quizzes from earlier runs never skew the numbers
+    data = tempfile.mkdtemp(prefix="quizcraft-bench-")
+    os.environ["JOB_DB_PATH"] = os.path.join(data, "jobs.sqlite3")
+    os.environ["NEAR_DUP_DB_PATH"] = os.path.join(data, "near_duplicates.sqlite3")
+    if args.no_quiz_cache:
+        os.environ["QUIZ_CACHE_ENABLED"] = "false"
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[label].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.errors[label] += 1
+            return None
+        return response.json()
+
+    def summary(self, wall_seconds: float) -> dict:
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            endpoints[label] = {
+                "requests": len(samples),
+                "errors": self.errors[label],
+                "rps": round(len(samples) / wall_seconds, 2),
+                "mean_ms": round(statistics.mean(samples), 3),
+                "p50_ms": round(percentile(samples, 50), 3),
+                "p95_ms": round(percentile(samples, 95), 3),
+                "p99_ms": round(percentile(samples, 99), 3),
+            }
+        everything = [s for samples in self.samples.values() for s in samples]
+        total = {
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "rps": round(len(everything) / wall_seconds, 2),
+            "p50_ms": round(percentile(everything, 50), 3) if everything else None,
+            "p95_ms": round(percentile(everything, 95), 3) if everything else None,
+            "p99_ms": round(percentile(everything, 99), 3) if everything else None,
+        }
+        return {"endpoints": endpoints, "total": total}
+
+
+async def virtual_user(client, recorder: Recorder, user: int, iterations: int, messages: int):
+    email = f"bench{user}@example.com"
+    for iteration in range(iterations):
+        login = await recorder.call(client, "POST /auth/login", "POST", "/auth/login",
+                                    json={"email": email, "password": "benchmark"})
+        if not login:
+            continue
+        headers = {"Authorization": f"Bearer {login['access_token']}"}
+        user_id = login["user"]["id"]
+        await recorder.call(client, "GET /auth/me", "GET", "/auth/me", headers=headers)
+        await recorder.call(client, "GET /api/sessions", "GET", "/api/sessions",
+                            params={"user_id": user_id, "limit": 20})
+
+        session = await recorder.call(client, "POST /api/sessions", "POST", "/api/sessions",
+                                      json={"user_id": user_id, "title": f"Bench {iteration}"})
+        if not session:
+            continue
+        session_id = session["session"]["session_id"]
+        for turn in range(messages):
+            await recorder.call(client, "POST /api/messages", "POST", "/api/messages", json={
+                "session_id": session_id, "sender": "user" if turn % 2 == 0 else "ai",
+                "content": f"Message {turn} of iteration {iteration}"
+            })
+        await recorder.call(client, "GET /api/messages", "GET", "/api/messages",
+                            params={"session_id": session_id, "limit": 50})
+
+        note = NOTES[(user + iteration) % len(NOTES)]
+        generated = await recorder.call(client, "POST /api/quizzes/generate-quiz", "POST",
+                                        "/api/quizzes/generate-quiz", json={"text": note})
+        if not generated:
+            continue
+        # The route wraps generate_quiz_from_text's {"quiz": [...]} once more
+        questions = generated["quiz"]["quiz"]
+        quiz = await recorder.call(client, "POST /api/quizzes", "POST", "/api/quizzes",
+                                   json={"session_id": session_id, "no_of_questions": len(questions)})
+        if not quiz:
+            continue
+        quiz_id = quiz["quiz"]["quiz_id"]
+        stored = await recorder.call(client, "POST /api/questions/batch", "POST", "/api/questions/batch", json=[
+            {"quiz_id": quiz_id, "quiz_question": q["question"], "correct_answer": q["answer"]}
+            for q in questions
+        ])
+        if not stored:
+            continue
+        await recorder.call(client, "GET /api/quizzes/{quiz_id}/questions", "GET",
+                            f"/api/quizzes/{quiz_id}/questions")
+        await recorder.call(client, "POST /api/quizzes/{quiz_id}/submit", "POST",
+                            f"/api/quizzes/{quiz_id}/submit", json={"answers": [
+                                {"question_id": q["question_id"],
+                                 "answer": q["correct_answer"] if i % 2 == 0 else "wrong"}
+                                for i, q in enumerate(stored["questions"])
+                            ]})
+        await recorder.call(client, "GET /api/sessions/{session_id}/bootstrap", "GET",
+                            f"/api/sessions/{session_id}/bootstrap")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    import httpx
+    from app.api.main import app
+    from app.services.async_db import async_db
+
+    if args.backend == "memory":
+        from benchmarks.memory_db import InMemoryDatabaseService
+        store = InMemoryDatabaseService(latency=args.db_latency / 1000, jwt_secret=JWT_SECRET)
+        for user in range(args.users):
+            store.create_user_profile(f"00000000-0000-0000-0000-{user:012d}",
+                                      f"bench{user}@example.com", "Bench", str(user))
+        async_db._service = store
+
+    recorder = Recorder()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                virtual_user(client, recorder, user, args.iterations, args.messages)
+                for user in range(args.users)
+            ))
+            wall = time.perf_counter() - started
+
+    result = recorder.summary(wall)
+    result["meta"] = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "wall_seconds": round(wall, 3),
+        **{key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    }
+    return result
+
+
+def report(result: dict, baseline: dict = None):
+    header = f"{'endpoint':<42}{'reqs':>7}{'err':>5}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["total"])]
+    for label, stats in rows:
+        line = (f"{label:<42}{stats['requests']:>7}{stats['errors']:>5}{stats['rps']:>9.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+        if baseline:
+            before = baseline["total"] if label == "TOTAL" else baseline["endpoints"].get(label)
+            if before and before.get("p95_ms"):
+                line += f"{(stats['p95_ms'] / before['p95_ms'] - 1) * 100:>+12.1f}%"
+        print(line)
+    print(f"wall {result['meta']['wall_seconds']}s, commit {result['meta']['commit']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=5, help="Scenario runs per user")
+    parser.add_argument("--messages", type=int, default=4, help="Chat messages per scenario run")
+    parser.add_argument("--backend", choices=["memory", "postgrest"], default="memory",
+                        help="memory: in-process DatabaseService; postgrest: the server at SUPABASE_URL")
+    parser.add_argument("--db-latency", type=float, default=5.0, help="Simulated DB round trip (ms, memory backend)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake LLM latency (seconds)")
+    parser.add_argument("--no-quiz-cache", action="store_true", help="Disable the generated-quiz cache")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Earlier JSON results to compare p95 against")
+    args = parser.parse_args()
+
+    configure(args)
+    result = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Cold start: import cost by module and time to first response.
+
+`imports` runs `python -X importtime` on the app and prints where import
+time goes, grouped by top-level package, plus the slowest single modules.
+`first-response` starts a fresh interpreter per run, imports the app, runs
+the lifespan startup and serves one request in-process, and reports the
+wall time from process start.
+
+    cd backend
+    python -m benchmarks.cold_start imports --top 15
+    python -m benchmarks.cold_start first-response --runs 5 --path /health
+    WARMUP_ON_STARTUP=true python -m benchmarks.cold_start first-response
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+FIRST_RESPONSE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.api.main import app
+imported = time.perf_counter()
+import httpx
+
+async def main():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://cold") as client:
+            response = await client.get(sys.argv[1])
+        done = time.perf_counter()
+    print(json.dumps({
+        "status": response.status_code,
+        "import_ms": (imported - started) * 1000,
+        "startup_ms": (ready - imported) * 1000,
+        "request_ms": (done - ready) * 1000,
+    }))
+
+asyncio.run(main())
+"""
+
+
+def environment() -> dict:
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    env.setdefault("SUPABASE_KEY", "cold-start")
+    env.setdefault("LLM_PROVIDER", "fake")
+    return env
+
+
+def import_breakdown(module: str, top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=environment(),
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    if not rows:
+        print(result.stderr)
+        raise SystemExit(1)
+
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total = sum(by_package.values())
+
+    print(f"import {module}: {total / 1000:.1f} ms across {len(rows)} modules\n")
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<32}{self_us / 1000:>10.1f}{self_us / total:>8.1%}")
+
+    print(f"\n{'slowest modules':<48}{'self ms':>10}{'cumul. ms':>11}")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"{name:<48}{self_us / 1000:>10.1f}{cumulative_us / 1000:>11.1f}")
+
+
+def first_response(path: str, runs: int):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", FIRST_RESPONSE, path],
+            capture_output=True, text=True, env=environment(),
+        )
+        wall = (time.perf_counter() - started) * 1000
+        if result.returncode != 0:
+            print(result.stderr)
+            raise SystemExit(1)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample["wall_ms"] = wall
+        samples.append(sample)
+
+    print(f"GET {path} -> {samples[0]['status']}, median of {runs} fresh processes")
+    for key in ("import_ms", "startup_ms", "request_ms", "wall_ms"):
+        print(f"{key:<12}{statistics.median(s[key] for s in samples):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    imports = commands.add_parser("imports", help="Import cost by package and module")
+    imports.add_argument("--module", default="app.api.main")
+    imports.add_argument("--top", type=int, default=15)
+    first = commands.add_parser("first-response", help="Process start to first response")
+    first.add_argument("--path", default="/health")
+    first.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == "imports":
+        import_breakdown(args.module, args.top)
+    else:
+        first_response(args.path, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Learning analytics on synthetic answer history.
+
+Generates sessions, quizzes, questions and User_Answer pages shaped like
+the Supabase rows, then times building the AnswerFrame and each statistic.
+No database is needed.
+
+    cd backend
+    python -m benchmarks.learning_analytics --answers 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.analytics import (
+    AnswerFrame, distractor_rates, mastery_curve, question_difficulty, topic_accuracy
+)
+
+CHOICES = ["A", "B", "C", "D"]
+
+
+def synthetic(answers: int, questions: int, users: int, topics: int, page_size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    sessions = [
+        {"session_id": f"s{i}", "user_id": f"u{i % users}", "title": f"Topic {i % topics}"}
+        for i in range(users * 4)
+    ]
+    quizzes = [{"quiz_id": f"q{i}", "session_id": f"s{i % len(sessions)}"} for i in range(questions // 5)]
+    question_rows = [{"question_id": i, "quiz_id": f"q{i % len(quizzes)}"} for i in range(questions)]
+    difficulty = rng.uniform(0.2, 0.95, questions)
+
+    def pages():
+        for start in range(0, answers, page_size):
+            n = min(page_size, answers - start)
+            question = rng.integers(0, questions, n)
+            correct = rng.random(n) < difficulty[question]
+            picks = rng.integers(0, len(CHOICES), n)
+            yield [
+                {
+                    "user_answer_id": start + i,
+                    "question_id": int(question[i]),
+                    "answer": "A" if correct[i] else CHOICES[picks[i]],
+                    "is_correct": bool(correct[i])
+                }
+                for i in range(n)
+            ]
+
+    return sessions, quizzes, question_rows, pages()
+
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    print(f"{label:<22} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=1_000_000)
+    parser.add_argument("--questions", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sessions, quizzes, questions, pages = synthetic(
+        args.answers, args.questions, args.users, args.topics, args.page_size, args.seed
+    )
+    frame = timed("build frame", lambda: AnswerFrame.build(sessions, quizzes, questions, pages))
+    array_bytes = sum(a.nbytes for a in (frame.question, frame.answer, frame.correct))
+    print(f"{len(frame):,} answers in {array_bytes / 1e6:.1f} MB of arrays")
+
+    hardest = timed("question difficulty", lambda: question_difficulty(frame, min_attempts=5, limit=20))
+    timed("topic accuracy", lambda: topic_accuracy(frame))
+    timed("mastery curve", lambda: mastery_curve(frame, "u1"))
+    timed("distractors (top 20)", lambda: distractor_rates(frame, [q["question_id"] for q in hardest]))
+    timed("distractors (all)", lambda: distractor_rates(frame))
+
+
+if __name__ == "__main__":
+    main()
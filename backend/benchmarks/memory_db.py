@@ -0,0 +1,379 @@
+"""In-memory stand-in for DatabaseService, for benchmarks.
+
+Implements the DatabaseService methods the API routes call on plain dicts,
+plus just enough of `client.auth` for /auth/login and /auth/signup. Every
+call sleeps `latency` seconds first to stand in for the PostgREST round
+trip, on the DB thread pool like the real thing.
+"""
+import itertools
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import List, Optional
+
+import jwt
+
+from app.services.databases import DatabaseService, QuizAlreadyFinishedError
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from app.services.progress import earned_points, empty_progress, percentage
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def page(rows: List[dict], sort_col: str, id_col: str, descending: bool, limit: int,
+         before: Optional[str] = None, after: Optional[str] = None, tail: bool = False) -> dict:
+    """In-memory equivalent of pagination.keyset_page"""
+    if before and after:
+        raise InvalidCursorError("Pass either before or after, not both")
+    ordered = sorted(rows, key=lambda row: (row[sort_col], row[id_col]), reverse=descending)
+    keys = [(row[sort_col], row[id_col]) for row in ordered]
+    if after:
+        cursor = tuple(decode_cursor(after))
+        start = next((i for i, key in enumerate(keys) if key == cursor), -1) + 1
+        items, has_more = ordered[start:start + limit], start + limit < len(ordered)
+        prev_cursor = encode_cursor(items[0], sort_col, id_col) if items else None
+        next_cursor = encode_cursor(items[-1], sort_col, id_col) if has_more and items else None
+    else:
+        if before:
+            cursor = tuple(decode_cursor(before))
+            end = next((i for i, key in enumerate(keys) if key == cursor), len(ordered))
+        else:
+            end = len(ordered) if tail else min(limit, len(ordered))
+        start = max(end - limit, 0)
+        items = ordered[start:end]
+        prev_cursor = encode_cursor(items[0], sort_col, id_col) if start > 0 and items else None
+        next_cursor = encode_cursor(items[-1], sort_col, id_col) if end < len(ordered) and items else None
+    return {"items": [dict(row) for row in items], "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
+
+class FakeAuth:
+    """The slice of supabase.auth used by app/api/auth.py; tokens are HS256 signed with `secret`"""
+
+    def __init__(self, store: "InMemoryDatabaseService", secret: str):
+        self.store = store
+        self.secret = secret
+
+    def _token(self, user_id: str, email: str) -> str:
+        return jwt.encode(
+            {"sub": user_id, "email": email, "aud": "authenticated", "exp": int(time.time()) + 3600},
+            self.secret, algorithm="HS256",
+        )
+
+    def sign_in_with_password(self, credentials: dict):
+        self.store.round_trip()
+        user = self.store.get_user_by_email(credentials["email"])
+        if not user:
+            raise ValueError("Invalid login credentials")
+        return SimpleNamespace(
+            user=SimpleNamespace(id=user["user_id"], email=user["email"]),
+            session=SimpleNamespace(access_token=self._token(user["user_id"], user["email"])),
+        )
+
+    def sign_up(self, credentials: dict):
+        self.store.round_trip()
+        user_id = str(uuid.uuid4())
+        return SimpleNamespace(
+            user=SimpleNamespace(id=user_id, email=credentials["email"]),
+            session=SimpleNamespace(access_token=self._token(user_id, credentials["email"])),
+        )
+
+    def get_user(self, token: str):
+        self.store.round_trip()
+        claims = jwt.decode(token, self.secret, algorithms=["HS256"], audience="authenticated")
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"], email=claims["email"]))
+
+    def sign_out(self):
+        self.store.round_trip()
+
+
+class InMemoryDatabaseService(DatabaseService):
+    def __init__(self, latency: float = 0.0, jwt_secret: str = "benchmark-secret-benchmark-secret"):
+        super().__init__(pool=None)
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.users, self.sessions, self.messages = {}, {}, {}
+        self.quizzes, self.questions, self.answers = {}, {}, {}
+        self.progress = {}
+        self._client = SimpleNamespace(auth=FakeAuth(self, jwt_secret))
+
+    @property
+    def client(self):
+        return self._client
+
+    def auth_client(self):
+        return self._client
+
+    def round_trip(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ===== USERS =====
+    def create_user_profile(self, user_id: str, email: str, first_name: str, last_name: str) -> dict:
+        self.round_trip()
+        row = {"user_id": user_id, "email": email, "first_name": first_name, "last_name": last_name}
+        with self._lock:
+            self.users[email] = row
+        return dict(row)
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        self.round_trip()
+        row = self.users.get(email)
+        return dict(row) if row else None
+
+    # ===== SESSIONS =====
+    def _user_sessions(self, user_id) -> List[dict]:
+        return [s for s in self.sessions.values() if str(s["user_id"]) == str(user_id)]
+
+    def get_user_sessions(self, user_id, columns: str = "*") -> List[dict]:
+        self.round_trip()
+        rows = sorted(self._user_sessions(user_id), key=lambda s: s["last_active_at"], reverse=True)
+        return [dict(row) for row in rows]
+
+    def get_user_sessions_page(self, user_id, limit: int, before: Optional[str] = None,
+                               after: Optional[str] = None, columns: str = "*") -> dict:
+        self.round_trip()
+        return page(self._user_sessions(user_id), "last_active_at", "session_id", True,
+                    limit, before, after)
+
+    def get_session(self, session_id: str) -> Optional[dict]:
+        self.round_trip()
+        row = self.sessions.get(session_id)
+        return dict(row) if row else None
+
+    def create_session(self, user_id, title: str, mode: str) -> dict:
+        self.round_trip()
+        row = {"session_id": str(uuid.uuid4()), "user_id": user_id, "title": title, "mode": mode,
+               "created_at": now(), "last_active_at": now()}
+        with self._lock:
+            self.sessions[row["session_id"]] = row
+        return dict(row)
+
+    def update_session(self, session_id: str, title: Optional[str] = None) -> dict:
+        self.round_trip()
+        with self._lock:
+            row = self.sessions.get(session_id)
+            if not row:
+                return None
+            row["last_active_at"] = now()
+            if title is not None:
+                row["title"] = title
+            return dict(row)
+
+    def touch_sessions(self, session_ids: List[str]) -> None:
+        self.round_trip()
+        with self._lock:
+            for session_id in session_ids:
+                if session_id in self.sessions:
+                    self.sessions[session_id]["last_active_at"] = now()
+
+    def delete_session(self, session_id: str) -> bool:
+        self.round_trip()
+        with self._lock:
+            return self.sessions.pop(session_id, None) is not None
+
+    # ===== MESSAGES =====
+    def _session_messages(self, session_id: str) -> List[dict]:
+        return [m for m in self.messages.values() if m["session_id"] == session_id]
+
+    def get_session_messages(self, session_id: str, columns: str = "*") -> List[dict]:
+        self.round_trip()
+        rows = sorted(self._session_messages(session_id), key=lambda m: (m["timestamp"], m["message_id"]))
+        return [dict(row) for row in rows]
+
+    def get_session_messages_page(self, session_id: str, limit: int, before: Optional[str] = None,
+                                  after: Optional[str] = None, columns: str = "*") -> dict:
+        self.round_trip()
+        return page(self._session_messages(session_id), "timestamp", "message_id", False,
+                    limit, before, after, tail=True)
+
+    def create_message(self, session_id: str, sender: str, content: str,
+                       quiz_data: Optional[str] = None) -> dict:
+        self.round_trip()
+        row = {"message_id": str(uuid.uuid4()), "session_id": session_id, "sender": sender,
+               "content": content, "quiz_data": quiz_data, "timestamp": now()}
+        with self._lock:
+            self.messages[row["message_id"]] = row
+            if session_id in self.sessions:
+                self.sessions[session_id]["last_active_at"] = row["timestamp"]
+        return dict(row)
+
+    # ===== QUIZZES =====
+    def create_quiz(self, session_id: str, no_of_questions: int) -> dict:
+        self.round_trip()
+        row = {"quiz_id": str(uuid.uuid4()), "session_id": session_id, "score": None,
+               "is_finished": False, "no_of_questions": no_of_questions,
+               "timestamp_started": now(), "timestamp_finished": None}
+        with self._lock:
+            self.quizzes[row["quiz_id"]] = row
+        return dict(row)
+
+    def get_quiz(self, quiz_id: str) -> Optional[dict]:
+        self.round_trip()
+        row = self.quizzes.get(str(quiz_id))
+        return dict(row) if row else None
+
+    def get_session_quizzes(self, session_id: str, columns: str = "*") -> List[dict]:
+        self.round_trip()
+        rows = [q for q in self.quizzes.values() if q["session_id"] == session_id]
+        return [dict(row) for row in sorted(rows, key=lambda q: q["timestamp_started"], reverse=True)]
+
+    def get_session_quizzes_detail(self, session_id: str) -> List[dict]:
+        self.round_trip()
+        quizzes = []
+        for quiz in sorted((q for q in self.quizzes.values() if q["session_id"] == session_id),
+                           key=lambda q: q["timestamp_started"], reverse=True):
+            questions = [dict(q) for q in self.questions.values() if q["quiz_id"] == quiz["quiz_id"]]
+            ids = {q["question_id"] for q in questions}
+            answers = [dict(a) for a in self.answers.values() if a["question_id"] in ids]
+            quizzes.append({**quiz, "questions": questions, "answers": answers})
+        return quizzes
+
+    def update_quiz(self, quiz_id: str, score: Optional[int] = None,
+                    is_finished: Optional[bool] = None) -> dict:
+        self.round_trip()
+        with self._lock:
+            row = self.quizzes.get(str(quiz_id))
+            if not row:
+                return None
+            finishing = is_finished and not row["is_finished"]
+            if row["is_finished"] and (is_finished or (score is not None and is_finished is None)):
+                raise QuizAlreadyFinishedError(f"Quiz {quiz_id} is already finished")
+            if score is not None:
+                row["score"] = score
+            if is_finished is not None:
+                row["is_finished"] = is_finished
+                if is_finished:
+                    row["timestamp_finished"] = now()
+            result = dict(row)
+        if finishing:
+            self.record_finished_quiz(result)
+        return result
+
+    def submit_quiz(self, quiz_id: str, answers: List[dict]) -> Optional[dict]:
+        self.round_trip()
+        with self._lock:
+            quiz = self.quizzes.get(str(quiz_id))
+            if not quiz:
+                return None
+            if quiz["is_finished"]:
+                raise QuizAlreadyFinishedError(f"Quiz {quiz_id} is already finished")
+            key = {q["question_id"]: q["correct_answer"]
+                   for q in self.questions.values() if q["quiz_id"] == quiz["quiz_id"]}
+            # Like the submit_quiz RPC: the last answer to each question counts
+            latest = {a["question_id"]: a["answer"] for a in answers if a["question_id"] in key}
+            inserted = []
+            for question_id, answer in latest.items():
+                row = {"user_answer_id": next(self._ids), "question_id": question_id,
+                       "answer": answer, "created_at": now(),
+                       "is_correct": answer is not None and key[question_id] is not None
+                                     and answer.strip() == key[question_id].strip()}
+                self.answers[row["user_answer_id"]] = row
+                inserted.append(dict(row))
+            quiz.update(score=sum(1 for row in inserted if row["is_correct"]),
+                        is_finished=True, timestamp_finished=now())
+            result = {"quiz": dict(quiz), "answers": inserted}
+        self.record_finished_quiz(result["quiz"], inserted)
+        return result
+
+    # ===== PROGRESS =====
+    def get_user_progress(self, user_id: str) -> dict:
+        self.round_trip()
+        return dict(self.progress.get(str(user_id)) or empty_progress(user_id))
+
+    def record_finished_quiz(self, quiz: dict, answers: Optional[List[dict]] = None) -> None:
+        session = self.sessions.get(quiz["session_id"])
+        if not session:
+            return
+        user_id = str(session["user_id"])
+        earned = earned_points(quiz, answers)
+        maximum = quiz.get("no_of_questions") or 0
+        with self._lock:
+            row = self.progress.setdefault(user_id, empty_progress(user_id))
+            row["no_of_quizzes_taken"] += 1
+            row["total_earned_score"] += earned
+            row["total_max_score"] += maximum
+            row["percentage"] = percentage(row["total_earned_score"], row["total_max_score"])
+
+    # ===== BULK READS =====
+    def iter_pages(self, table: str, columns: str, key: str, page_size: int = 1000,
+                   filters: Optional[dict] = None):
+        """Rows of a table in `key` order; every column is returned and filters match top-level ones"""
+        tables = {"Chat_Session": self.sessions, "Quiz": self.quizzes, "Question": self.questions,
+                  "User_Answer": self.answers}
+        with self._lock:
+            rows = sorted((dict(row) for row in tables[table].values()
+                           if all(row.get(column) == value for column, value in (filters or {}).items())),
+                          key=lambda row: row[key])
+        for start in range(0, len(rows), page_size):
+            self.round_trip()
+            yield rows[start:start + page_size]
+
+    # ===== QUESTIONS =====
+    def create_question(self, quiz_id: str, quiz_question: str, correct_answer: str,
+                        options: Optional[List[str]] = None) -> dict:
+        question = {"quiz_id": quiz_id, "quiz_question": quiz_question, "correct_answer": correct_answer}
+        if options is not None:
+            question["options"] = options
+        return self.create_questions_batch([question])[0]
+
+    def create_questions_batch(self, questions: List[dict]) -> List[dict]:
+        self.round_trip()
+        rows = []
+        with self._lock:
+            for question in questions:
+                row = {"question_id": next(self._ids), **question}
+                self.questions[row["question_id"]] = row
+                rows.append(dict(row))
+        if self.question_banks is not None:
+            self.question_banks.forget_quizzes({str(row["quiz_id"]) for row in rows})
+        return rows
+
+    def iter_user_questions(self, user_id: str, page_size: int = 1000):
+        self.round_trip()
+        with self._lock:
+            titles = {str(s["session_id"]): s.get("title") for s in self.sessions.values()
+                      if str(s["user_id"]) == str(user_id)}
+            topics = {str(q["quiz_id"]): titles[str(q["session_id"])] for q in self.quizzes.values()
+                      if str(q["session_id"]) in titles}
+            rows = [{**q, "topic": topics[str(q["quiz_id"])]}
+                    for q in sorted(self.questions.values(), key=lambda q: q["question_id"])
+                    if str(q["quiz_id"]) in topics]
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+    def get_quiz_questions(self, quiz_id: str, columns: str = "*") -> List[dict]:
+        self.round_trip()
+        rows = [q for q in self.questions.values() if q["quiz_id"] == str(quiz_id)]
+        return [dict(row) for row in sorted(rows, key=lambda q: q["question_id"])]
+
+    # ===== ANSWERS =====
+    def create_user_answer(self, question_id, answer: str, is_correct: bool) -> dict:
+        self.round_trip()
+        row = {"user_answer_id": next(self._ids), "question_id": question_id, "answer": answer,
+               "is_correct": is_correct, "created_at": now()}
+        with self._lock:
+            self.answers[row["user_answer_id"]] = row
+        return dict(row)
+
+    def get_question_answer(self, question_id) -> Optional[dict]:
+        self.round_trip()
+        row = next((a for a in self.answers.values() if str(a["question_id"]) == str(question_id)), None)
+        return dict(row) if row else None
+
+    def get_quiz_answers(self, quiz_id: str, columns: str = "*") -> List[dict]:
+        self.round_trip()
+        ids = {q["question_id"] for q in self.questions.values() if q["quiz_id"] == str(quiz_id)}
+        return sorted((dict(a) for a in self.answers.values() if a["question_id"] in ids),
+                      key=lambda a: a["user_answer_id"])
+
+    def get_answered_question_ids(self, user_id: str) -> List[int]:
+        self.round_trip()
+        sessions = {str(s["session_id"]) for s in self.sessions.values() if str(s["user_id"]) == str(user_id)}
+        quizzes = {str(q["quiz_id"]) for q in self.quizzes.values() if str(q["session_id"]) in sessions}
+        ids = {q["question_id"] for q in self.questions.values() if str(q["quiz_id"]) in quizzes}
+        return list(dict.fromkeys(a["question_id"] for a in self.answers.values() if a["question_id"] in ids))
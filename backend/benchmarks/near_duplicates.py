@@ -0,0 +1,126 @@
+"""Near-duplicate index: signature cost, lookup latency and accuracy at scale.
+
+Fills a NearDuplicateIndex with synthetic study texts (random words drawn
+from a fixed vocabulary), then times signatures and lookups and checks
+that lightly edited copies are found while unrelated texts are not. Texts
+beyond --texts are indexed from random signatures, which exercise the
+band arrays the same way without paying for shingling. The index lives in
+a temporary SQLite file.
+
+    cd backend
+    python -m benchmarks.near_duplicates --documents 300000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.near_duplicates import NearDuplicateIndex
+
+NAMESPACE = "benchmark"
+
+
+def vocabulary(size: int, rng: random.Random):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(size)]
+
+
+def edit(text: str, rate: float, rng: random.Random, words) -> str:
+    """Replace, drop or insert about `rate` of the words and mangle whitespace"""
+    out = []
+    for word in text.split():
+        roll = rng.random()
+        if roll < rate / 3:
+            continue
+        if roll < 2 * rate / 3:
+            out.append(rng.choice(words))
+        elif roll < rate:
+            out.extend([word, rng.choice(words)])
+        else:
+            out.append(word)
+    return "  ".join(out) + "\n"
+
+
+def jaccard_similarity(index: NearDuplicateIndex, a: str, b: str) -> float:
+    left, right = set(index.hasher.shingles(a).tolist()), set(index.hasher.shingles(b).tolist())
+    return len(left & right) / len(left | right)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=300000, help="Indexed texts in total")
+    parser.add_argument("--texts", type=int, default=2000, help="Of those, real texts that are shingled")
+    parser.add_argument("--words", type=int, default=300, help="Words per text")
+    parser.add_argument("--edit-rate", type=float, default=0.03, help="Share of words changed in near duplicates")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--num-perm", type=int, default=64)
+    parser.add_argument("--bands", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(5000, rng)
+    texts = [" ".join(rng.choice(words) for _ in range(args.words)) for _ in range(args.texts)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        index = NearDuplicateIndex(
+            os.path.join(directory, "index.sqlite3"), threshold=args.threshold,
+            num_perm=args.num_perm, bands=args.bands, shingle_size=3, min_words=30,
+        )
+        index.load()
+
+        started = time.perf_counter()
+        signatures = [index.hasher.signature(text) for text in texts]
+        signature_ms = (time.perf_counter() - started) * 1000 / len(texts)
+
+        started = time.perf_counter()
+        for i, text in enumerate(texts):
+            index.add(text, NAMESPACE, [{"question": f"q{i}"}])
+        filler = np.random.default_rng(args.seed).integers(
+            0, 2 ** 16, (args.documents - len(texts), args.num_perm), dtype=np.uint16)
+        for signature in filler:
+            index._append(signature, NAMESPACE, doc_id=0)
+        build_s = time.perf_counter() - started
+
+        queries = [rng.randrange(len(texts)) for _ in range(args.queries)]
+        edited_texts = [edit(texts[i], args.edit_rate, rng, words) for i in queries]
+        edited = [index.hasher.signature(text) for text in edited_texts]
+        jaccard = [jaccard_similarity(index, texts[i], text) for i, text in zip(queries, edited_texts)]
+        unrelated = [index.hasher.signature(" ".join(rng.choice(words) for _ in range(args.words)))
+                     for _ in range(args.queries)]
+
+        def timed(signature):
+            started = time.perf_counter()
+            with index._lock:
+                match = index._best_match(signature, NAMESPACE)
+            return (time.perf_counter() - started) * 1000, match
+
+        found = [timed(signature) for signature in edited]
+        missed = [timed(signature) for signature in unrelated]
+        latencies = sorted(ms for ms, _ in found + missed)
+
+    above = [match for (_, match), exact in zip(found, jaccard) if exact >= args.threshold]
+    below = [match for (_, match), exact in zip(found, jaccard) if exact < args.threshold]
+    false_hits = sum(match is not None for _, match in missed) / len(missed)
+    print(f"{args.documents} texts indexed in {build_s:.1f}s "
+          f"({args.num_perm} permutations, {args.bands} bands, threshold {args.threshold})")
+    print(f"signature          {signature_ms:8.3f} ms per {args.words}-word text")
+    print(f"lookup p50         {latencies[len(latencies) // 2]:8.3f} ms")
+    print(f"lookup p99         {latencies[int(len(latencies) * 0.99)]:8.3f} ms")
+    print(f"edited copies      mean exact Jaccard {statistics.mean(jaccard):.3f}")
+    if above:
+        print(f"  >= threshold     {sum(m is not None for m in above) / len(above):8.1%} found of {len(above)}")
+    if below:
+        print(f"  <  threshold     {sum(m is not None for m in below) / len(below):8.1%} found of {len(below)}")
+    print(f"unrelated texts    {false_hits:8.1%} matched")
+    # Signature, band hash, and per band a sorted key and row; plus doc ID and namespace
+    print(f"memory per text    {2 * args.num_perm + 3 * 4 * args.bands + 12} bytes")
+
+
+if __name__ == "__main__":
+    main()
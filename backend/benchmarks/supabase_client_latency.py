@@ -0,0 +1,62 @@
+"""Per-request latency: a fresh create_client() per call vs the shared pool.
+
+Runs the same small PostgREST read against SUPABASE_URL both ways and prints
+latency percentiles. Point it at a local stack (`supabase start`) or a
+project you are allowed to load.
+
+    cd backend
+    python -m benchmarks.supabase_client_latency --requests 200
+"""
+import argparse
+import statistics
+import time
+
+from supabase import create_client
+from app.core.config import settings
+from app.services.supabase_client import SupabasePool
+
+
+def query(client, table: str):
+    client.table(table).select("*").limit(1).execute()
+
+
+def measure(label: str, get_client, table: str, requests: int):
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        query(get_client(), table)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22} mean {statistics.mean(samples):8.2f} ms   "
+          f"p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--table", default="User")
+    args = parser.parse_args()
+
+    pool = SupabasePool(
+        url=settings.SUPABASE_URL,
+        key=settings.SUPABASE_KEY,
+        pool_size=settings.SUPABASE_POOL_SIZE,
+        keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY,
+        timeout=settings.SUPABASE_HTTP_TIMEOUT,
+    )
+    # Warm both paths once so DNS and imports are not counted
+    query(create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY), args.table)
+    query(pool.client, args.table)
+
+    fresh = measure("create_client per call",
+                    lambda: create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY),
+                    args.table, args.requests)
+    pooled = measure("pooled client", lambda: pool.client, args.table, args.requests)
+    pool.close()
+    print(f"p50 speedup: {fresh / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
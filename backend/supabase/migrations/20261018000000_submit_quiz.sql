@@ -0,0 +1,55 @@
+-- Grade and store a whole quiz submission in one transaction.
+--
+-- p_answers is a JSON array of {"question_id": <bigint>, "answer": <text>}.
+-- Answers are graded against "Question".correct_answer, inserted into
+-- "User_Answer" in bulk, and the quiz gets its score, is_finished and
+-- timestamp_finished. Answers to questions outside the quiz are ignored,
+-- and only the last answer to each question counts, so the score can never
+-- exceed the number of questions.
+-- Returns null if the quiz does not exist and raises QC409 if it is
+-- already finished.
+create or replace function public.submit_quiz(p_quiz_id uuid, p_answers jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_quiz "Quiz";
+  v_score integer;
+  v_answers jsonb;
+begin
+  -- Lock the quiz so two concurrent submissions cannot both grade it
+  select * into v_quiz from "Quiz" where quiz_id = p_quiz_id for update;
+  if not found then
+    return null;
+  end if;
+  if v_quiz.is_finished then
+    raise exception 'Quiz % is already finished', p_quiz_id using errcode = 'QC409';
+  end if;
+
+  with submitted as (
+    select distinct on ((a ->> 'question_id')::bigint)
+      (a ->> 'question_id')::bigint as question_id, a ->> 'answer' as answer
+    from jsonb_array_elements(p_answers) with ordinality as e(a, position)
+    order by (a ->> 'question_id')::bigint, position desc
+  ), graded as (
+    select s.question_id, s.answer,
+      coalesce(btrim(s.answer) = btrim(q.correct_answer), false) as is_correct
+    from submitted s
+    join "Question" q on q.question_id = s.question_id and q.quiz_id = p_quiz_id
+  ), inserted as (
+    insert into "User_Answer" (question_id, answer, is_correct)
+    select question_id, answer, is_correct from graded
+    returning *
+  )
+  select count(*) filter (where is_correct), coalesce(jsonb_agg(to_jsonb(inserted)), '[]'::jsonb)
+  into v_score, v_answers
+  from inserted;
+
+  update "Quiz"
+  set score = v_score, is_finished = true, timestamp_finished = now()
+  where quiz_id = p_quiz_id
+  returning * into v_quiz;
+
+  return jsonb_build_object('quiz', to_jsonb(v_quiz), 'answers', v_answers);
+end;
+$$;
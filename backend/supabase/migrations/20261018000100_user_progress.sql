@@ -0,0 +1,38 @@
+-- Running progress totals, one row per user.
+--
+-- Rows are bumped by increment_user_progress each time one of the user's
+-- quizzes is finished, so reading a user's progress is a primary-key lookup.
+-- `python -m app.services.progress rebuild` recomputes every row from
+-- "Quiz" and "User_Answer".
+create table if not exists public."User_Progress" (
+  user_id text primary key,
+  no_of_quizzes_taken integer not null default 0,
+  total_earned_score double precision not null default 0,
+  total_max_score integer not null default 0,
+  percentage double precision not null default 0,
+  updated_at timestamptz not null default now()
+);
+
+-- Add one finished quiz to a user's totals atomically
+create or replace function public.increment_user_progress(
+  p_user_id text, p_earned double precision, p_max integer
+)
+returns "User_Progress"
+language sql
+as $$
+  insert into "User_Progress" as p
+    (user_id, no_of_quizzes_taken, total_earned_score, total_max_score, percentage, updated_at)
+  values
+    (p_user_id, 1, p_earned, p_max,
+     case when p_max > 0 then round((100 * p_earned / p_max)::numeric, 2) else 0 end, now())
+  on conflict (user_id) do update set
+    no_of_quizzes_taken = p.no_of_quizzes_taken + 1,
+    total_earned_score = p.total_earned_score + excluded.total_earned_score,
+    total_max_score = p.total_max_score + excluded.total_max_score,
+    percentage = case when p.total_max_score + excluded.total_max_score > 0
+      then round((100 * (p.total_earned_score + excluded.total_earned_score)
+                  / (p.total_max_score + excluded.total_max_score))::numeric, 2)
+      else 0 end,
+    updated_at = now()
+  returning *;
+$$;
@@ -0,0 +1,7 @@
+-- Answer options of each stored question.
+--
+-- Optional: without this column the backend saves questions without their
+-- options (it retries once PostgREST reports the column missing, PGRST204),
+-- but only questions with options can be served again from the question
+-- bank (app/services/question_bank.py) as topic quizzes without an LLM call.
+alter table public."Question" add column if not exists options jsonb;
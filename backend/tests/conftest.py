@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Settings are read at import time; point them at local stand-ins first
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["LLM_FAKE_LATENCY"] = "0"
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-secret-test-secret-test-secret")
+_data = tempfile.mkdtemp(prefix="quizcraft-tests-")
+os.environ.setdefault("JOB_DB_PATH", os.path.join(_data, "jobs.sqlite3"))
+os.environ.setdefault("NEAR_DUP_DB_PATH", os.path.join(_data, "near_duplicates.sqlite3"))
@@ -0,0 +1,127 @@
+"""In-memory stand-in for the supabase-py client, enough for DatabaseService.
+
+Tables are lists of dicts. Queries support the builder calls the service
+makes (select with one level of plain embedded child rows, eq, gt, order,
+limit, insert, update) and fail like PostgREST does: an unknown RPC raises
+PGRST202 and an unknown column in an insert raises PGRST204.
+"""
+import itertools
+import re
+from types import SimpleNamespace
+
+from postgrest.exceptions import APIError
+
+# Primary key of each table; a child embedded under a parent is matched on the parent's key
+KEYS = {
+    "User": "user_id",
+    "Chat_Session": "session_id",
+    "Quiz": "quiz_id",
+    "Question": "question_id",
+    "User_Answer": "user_answer_id",
+    "User_Progress": "user_id",
+}
+_EMBED = re.compile(r"(\w+)\(([^)]*)\)")
+
+
+class FakeClient:
+    def __init__(self, columns=None, max_rows=None):
+        self.tables = {name: [] for name in KEYS}
+        # PostgREST's db-max-rows: no select returns more rows than this
+        self.max_rows = max_rows
+        # Allowed columns per table; tables not listed accept any column
+        self.columns = columns or {}
+        self.failures = {}
+        self.calls = []
+        self._ids = itertools.count(1)
+
+    def table(self, name):
+        return Query(self, name)
+
+    def rpc(self, name, params):
+        raise APIError({"code": "PGRST202", "message": f"Could not find the function public.{name}"})
+
+    def fail(self, operation, table, error):
+        """Make the next `operation` ("insert" or "update") on `table` raise `error`"""
+        self.failures[(operation, table)] = error
+
+
+class Query:
+    def __init__(self, client, table):
+        self.client = client
+        self.name = table
+        self.operation = "select"
+        self.columns = "*"
+        self.payload = None
+        self.filters = []
+        self.ordering = None
+        self.count = None
+
+    def select(self, columns="*"):
+        self.columns = columns
+        return self
+
+    def insert(self, rows):
+        self.operation, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def update(self, data):
+        self.operation, self.payload = "update", data
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: str(row.get(column)) == str(value))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row[column] > value)
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        self.client.calls.append((self.operation, self.name, self.payload))
+        error = self.client.failures.pop((self.operation, self.name), None)
+        if error is not None:
+            raise error
+        rows = self.client.tables[self.name]
+        if self.operation == "insert":
+            return SimpleNamespace(data=[self._insert(row) for row in self.payload])
+        matching = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.operation == "update":
+            for row in matching:
+                row.update(self.payload)
+            return SimpleNamespace(data=[dict(row) for row in matching])
+        if self.ordering:
+            column, desc = self.ordering
+            matching = sorted(matching, key=lambda row: row[column], reverse=desc)
+        if self.count is not None:
+            matching = matching[:self.count]
+        if self.client.max_rows is not None:
+            matching = matching[:self.client.max_rows]
+        return SimpleNamespace(data=[self._embed(dict(row)) for row in matching])
+
+    def _insert(self, row):
+        allowed = self.client.columns.get(self.name)
+        unknown = set(row) - allowed if allowed else set()
+        if unknown:
+            column = sorted(unknown)[0]
+            raise APIError({"code": "PGRST204",
+                            "message": f"Could not find the '{column}' column of '{self.name}' in the schema cache"})
+        key = KEYS[self.name]
+        stored = {key: next(self.client._ids), **row}
+        self.client.tables[self.name].append(stored)
+        return dict(stored)
+
+    def _embed(self, row):
+        key = KEYS[self.name]
+        for child, columns in _EMBED.findall(self.columns):
+            wanted = [c.strip() for c in columns.split(",")]
+            row[child] = [{c: r.get(c) for c in wanted}
+                          for r in self.client.tables[child] if r.get(key) == row[key]]
+        return row
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.auth import require_user
+from app.api.main import app
+from app.core.config import settings
+from app.services.analytics import AnswerFrame, LearningAnalytics, distractor_rates, learning_analytics
+
+SESSIONS = [
+    {"session_id": "s1", "user_id": 1, "title": "Cells"},
+    {"session_id": "s2", "user_id": 2, "title": "Stars"},
+]
+QUIZZES = [{"quiz_id": "q1", "session_id": "s1"}, {"quiz_id": "q2", "session_id": "s2"}]
+QUESTIONS = [{"question_id": 10, "quiz_id": "q1"}, {"question_id": 20, "quiz_id": "q2"}]
+ANSWERS = [
+    {"user_answer_id": 1, "question_id": 10, "answer": "A", "is_correct": True},
+    {"user_answer_id": 2, "question_id": 10, "answer": "B", "is_correct": False},
+    {"user_answer_id": 3, "question_id": 20, "answer": "C", "is_correct": False},
+    {"user_answer_id": 4, "question_id": 20, "answer": "C", "is_correct": False},
+]
+
+
+def frame():
+    return AnswerFrame.build(SESSIONS, QUIZZES, QUESTIONS, [ANSWERS])
+
+
+class Loader:
+    def __init__(self):
+        self.loads = 0
+
+    def __call__(self):
+        self.loads += 1
+        return frame()
+
+
+def test_for_user_keeps_only_their_answers():
+    mine = frame().for_user("1")
+    assert len(mine) == 2
+    assert set(mine.question_ids[q] for q in mine.question) == {10}
+    assert len(frame().for_user("nobody")) == 0
+
+
+def test_distractor_rates_for_chosen_questions():
+    rates = distractor_rates(frame(), [20, 99])
+    assert rates == {20: [{"answer": "C", "picks": 2, "rate": 1.0}]}
+
+
+def test_refresh_is_rate_limited():
+    loader = Loader()
+    analytics = LearningAnalytics(loader, ttl=300, min_refresh=60)
+    analytics.frame()
+    analytics.frame(refresh=True)
+    assert loader.loads == 1
+
+    analytics._loaded_at -= 60
+    analytics.frame(refresh=True)
+    assert loader.loads == 2
+
+
+@pytest.fixture
+def as_user(monkeypatch):
+    monkeypatch.setattr(learning_analytics, "loader", Loader())
+    monkeypatch.setattr(learning_analytics, "_frame", None)
+    monkeypatch.setattr(settings, "ANALYTICS_ADMIN_EMAILS", "root@example.com")
+
+    def login(user_id, email):
+        app.dependency_overrides[require_user] = lambda: {"id": user_id, "email": email}
+        return TestClient(app)
+
+    yield login
+    app.dependency_overrides.pop(require_user, None)
+
+
+def test_requires_authentication():
+    response = TestClient(app).get("/api/analytics")
+    assert response.status_code == 401
+
+
+def test_users_see_only_their_own_answers(as_user):
+    client = as_user(1, "ada@example.com")
+    report = client.get("/api/analytics", params={"min_attempts": 1}).json()
+    assert report["answers"] == 2
+    assert [q["question_id"] for q in report["questions"]] == [10]
+    assert report["mastery"]["user_id"] == "1"
+
+    assert client.get("/api/analytics", params={"user_id": "2"}).status_code == 403
+    assert client.get("/api/analytics", params={"refresh": True}).status_code == 403
+
+
+def test_admins_see_everyone(as_user):
+    client = as_user(3, "Root@example.com")
+    report = client.get("/api/analytics", params={"min_attempts": 1, "user_id": "2", "refresh": True}).json()
+    assert report["answers"] == 4
+    assert report["mastery"]["answers"] == 2
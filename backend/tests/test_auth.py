@@ -0,0 +1,99 @@
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.core.config import settings
+from app.services.async_db import async_db
+from app.services.auth_tokens import profile_cache, token_verifier
+
+AUTH_ID = "5f0c1d3e-0000-4000-8000-000000000001"
+PROFILE = {"user_id": 42, "email": "ada@example.com", "first_name": "Ada", "last_name": "Lovelace"}
+
+
+class Profiles:
+    """Stands in for DatabaseService: the one lookup require_user makes"""
+
+    def __init__(self):
+        self.lookups = 0
+
+    def get_user_by_email(self, email):
+        self.lookups += 1
+        return PROFILE if email == PROFILE["email"] else None
+
+
+@pytest.fixture
+def profiles(monkeypatch):
+    service = Profiles()
+    monkeypatch.setattr(async_db, "_service", service)
+    profile_cache.clear()
+    yield service
+    profile_cache.clear()
+
+
+@pytest.fixture
+def signing_key(monkeypatch):
+    """An RSA key whose public half is served by a stubbed JWKS endpoint"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key(), as_dict=True)
+    jwk.update({"kid": "test-key", "alg": "RS256", "use": "sig"})
+    monkeypatch.setattr(jwt.PyJWKClient, "fetch_data", lambda self: {"keys": [jwk]})
+    monkeypatch.setattr(token_verifier, "jwks_url", "https://auth.test/.well-known/jwks.json")
+    monkeypatch.setattr(token_verifier, "_jwks", None)
+    return key
+
+
+def claims(**overrides):
+    now = int(time.time())
+    return {"sub": AUTH_ID, "email": PROFILE["email"], "aud": settings.SUPABASE_JWT_AUDIENCE,
+            "iat": now, "exp": now + 3600, **overrides}
+
+
+def me(token):
+    return TestClient(app).get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def test_hs256_token_verified_locally(profiles):
+    token = jwt.encode(claims(), settings.SUPABASE_JWT_SECRET, algorithm="HS256")
+
+    first, second = me(token), me(token)
+
+    assert first.status_code == 200
+    assert first.json()["user"]["id"] == PROFILE["user_id"]
+    assert first.json()["user"]["auth_id"] == AUTH_ID
+    assert second.json() == first.json()
+    # The second request is served from the profile cache
+    assert profiles.lookups == 1
+
+
+def test_rs256_token_verified_against_jwks(profiles, signing_key):
+    token = jwt.encode(claims(), signing_key, algorithm="RS256", headers={"kid": "test-key"})
+
+    response = me(token)
+
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == PROFILE["email"]
+
+
+@pytest.mark.parametrize("secret, overrides", [
+    ("not-the-project-secret-not-the-secret", {}),
+    (None, {"exp": int(time.time()) - 3600}),
+    (None, {"aud": "anon"}),
+])
+def test_bad_hs256_tokens_rejected(profiles, secret, overrides):
+    token = jwt.encode(claims(**overrides), secret or settings.SUPABASE_JWT_SECRET, algorithm="HS256")
+
+    response = me(token)
+
+    assert response.status_code == 401
+    assert profiles.lookups == 0
+
+
+def test_rs256_token_from_another_key_rejected(profiles, signing_key):
+    other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    token = jwt.encode(claims(), other, algorithm="RS256", headers={"kid": "test-key"})
+
+    assert me(token).status_code == 401
@@ -0,0 +1,160 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.services.databases import DatabaseService, QuizAlreadyFinishedError
+from tests.fake_postgrest import FakeClient
+
+
+def service_for(client):
+    return DatabaseService(pool=SimpleNamespace(client=client))
+
+
+def test_questions_saved_without_options_column():
+    client = FakeClient(columns={"Question": {"quiz_id", "quiz_question", "correct_answer"}})
+    service = service_for(client)
+    question = {"quiz_id": "q1", "quiz_question": "2 + 2?", "correct_answer": "4", "options": ["3", "4"]}
+
+    first = service.create_questions_batch([question, dict(question, quiz_question="3 + 3?")])
+    second = service.create_question("q1", "4 + 4?", "8", options=["8", "9"])
+
+    assert [row["quiz_question"] for row in first] == ["2 + 2?", "3 + 3?"]
+    assert second["correct_answer"] == "8"
+    assert not any("options" in row for row in client.tables["Question"])
+    # Only the first insert found out the hard way
+    assert [call[0] for call in client.calls] == ["insert", "insert", "insert"]
+
+
+def test_questions_keep_options_when_the_column_exists():
+    client = FakeClient()
+    service = service_for(client)
+
+    service.create_question("q1", "2 + 2?", "4", options=["3", "4"])
+
+    assert client.tables["Question"][0]["options"] == ["3", "4"]
+
+
+def finished_quiz(client):
+    client.tables["Chat_Session"].append({"session_id": "s1", "user_id": "u1", "title": "Cells"})
+    client.tables["Quiz"].append({"quiz_id": "q1", "session_id": "s1", "score": 3, "is_finished": False,
+                                  "no_of_questions": 5, "timestamp_finished": None})
+    service = service_for(client)
+    service.update_quiz("q1", score=3, is_finished=True)
+    return service
+
+
+def test_finishing_a_finished_quiz_is_refused():
+    client = FakeClient()
+    service = finished_quiz(client)
+    finished_at = client.tables["Quiz"][0]["timestamp_finished"]
+
+    with pytest.raises(QuizAlreadyFinishedError):
+        service.update_quiz("q1", score=5, is_finished=True)
+    with pytest.raises(QuizAlreadyFinishedError):
+        service.update_quiz("q1", score=5)
+
+    assert client.tables["Quiz"][0]["score"] == 3
+    assert client.tables["Quiz"][0]["timestamp_finished"] == finished_at
+
+
+def test_updating_a_missing_quiz_returns_none():
+    assert service_for(FakeClient()).update_quiz("nope", score=1, is_finished=True) is None
+
+
+def test_bulk_reads_do_not_stop_at_a_capped_page():
+    client = FakeClient(max_rows=3)
+    client.tables["Quiz"] = [{"quiz_id": f"q{i:02d}", "is_finished": i % 2 == 0} for i in range(10)]
+
+    rows = list(service_for(client).iter_rows("Quiz", "*", "quiz_id", page_size=4,
+                                              filters={"is_finished": True}))
+
+    assert [row["quiz_id"] for row in rows] == ["q00", "q02", "q04", "q06", "q08"]
+
+
+def test_cached_quiz_rows_expire_quickly(monkeypatch):
+    monkeypatch.setattr(settings, "QUIZ_ROW_CACHE_TTL_SECONDS", 0.05)
+    client = FakeClient()
+    client.tables["Quiz"].append({"quiz_id": "q1", "session_id": "s1", "is_finished": False})
+    service = service_for(client)
+    assert service.get_quiz("q1")["is_finished"] is False
+
+    # Another process finishes the quiz
+    client.tables["Quiz"][0]["is_finished"] = True
+
+    assert service.get_quiz("q1")["is_finished"] is False
+    time.sleep(0.1)
+    assert service.get_quiz("q1")["is_finished"] is True
+
+
+def open_quiz(client):
+    client.tables["Chat_Session"].append({"session_id": "s1", "user_id": "u1", "title": "Cells"})
+    client.tables["Quiz"].append({"quiz_id": 1, "session_id": "s1", "score": None, "is_finished": False,
+                                  "no_of_questions": 3, "timestamp_finished": None})
+    client.tables["Question"] += [
+        {"question_id": 11, "quiz_id": 1, "correct_answer": "4"},
+        {"question_id": 12, "quiz_id": 1, "correct_answer": " Paris "},
+        {"question_id": 13, "quiz_id": 1, "correct_answer": "H2O"},
+    ]
+    return service_for(client)
+
+
+def test_submit_grades_against_the_answer_key():
+    client = FakeClient()
+    service = open_quiz(client)
+
+    result = service.submit_quiz(1, [
+        {"question_id": 11, "answer": "4"},
+        {"question_id": 12, "answer": "Paris"},
+        {"question_id": 13, "answer": "CO2"},
+        {"question_id": 99, "answer": "from another quiz"},
+    ])
+
+    graded = {row["question_id"]: row["is_correct"] for row in result["answers"]}
+    assert graded == {11: True, 12: True, 13: False}
+    assert result["quiz"]["score"] == 2 and result["quiz"]["is_finished"] is True
+    assert len(client.tables["User_Answer"]) == 3
+
+
+def test_submit_keeps_the_last_answer_per_question():
+    client = FakeClient()
+    service = open_quiz(client)
+
+    result = service.submit_quiz(1, [
+        {"question_id": 11, "answer": "4"},
+        {"question_id": 11, "answer": "5"},
+        {"question_id": 11, "answer": "4"},
+        {"question_id": 12, "answer": "Paris"},
+        {"question_id": 12, "answer": "Rome"},
+    ])
+
+    assert {row["question_id"]: row["answer"] for row in result["answers"]} == {11: "4", 12: "Rome"}
+    assert result["quiz"]["score"] == 1
+
+
+def test_submit_reopens_the_quiz_when_answers_cannot_be_stored():
+    client = FakeClient()
+    service = open_quiz(client)
+    client.fail("insert", "User_Answer", RuntimeError("connection reset"))
+
+    with pytest.raises(RuntimeError):
+        service.submit_quiz(1, [{"question_id": 11, "answer": "4"}])
+
+    quiz = client.tables["Quiz"][0]
+    assert (quiz["is_finished"], quiz["score"], quiz["timestamp_finished"]) == (False, None, None)
+    assert client.tables["User_Answer"] == []
+
+    # The retry goes through
+    result = service.submit_quiz(1, [{"question_id": 11, "answer": "4"}])
+    assert result["quiz"]["score"] == 1 and len(client.tables["User_Answer"]) == 1
+
+
+def test_submitting_twice_is_refused():
+    client = FakeClient()
+    service = open_quiz(client)
+    service.submit_quiz(1, [{"question_id": 11, "answer": "4"}])
+
+    with pytest.raises(QuizAlreadyFinishedError):
+        service.submit_quiz(1, [{"question_id": 11, "answer": "5"}])
+    assert len(client.tables["User_Answer"]) == 1
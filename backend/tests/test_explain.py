@@ -0,0 +1,97 @@
+import json
+import time
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.core.config import settings
+from app.services.async_db import async_db
+from app.services.auth_tokens import profile_cache
+from app.services.question_bank import QuestionBank
+from app.services.llm import FakeProvider, get_llm, set_llm
+
+
+@pytest.fixture
+def provider():
+    previous = get_llm()
+    fake = FakeProvider(model="fake-test", timeout=5, max_retries=0, retry_backoff=0)
+    set_llm(fake)
+    yield fake
+    set_llm(previous)
+
+
+@pytest.mark.parametrize("turns", [1, 4, 12])
+def test_explain_sends_history_in_one_provider_call(provider, turns):
+    messages = []
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Why does the sky look blue? (turn {turn})"})
+        messages.append({"role": "assistant", "content": f"Because of Rayleigh scattering ({turn})."})
+    messages.append({"role": "user", "content": "Can you explain that more simply?"})
+
+    response = TestClient(app).post("/ai/explain", json={"messages": messages})
+
+    assert response.status_code == 200
+    assert response.json()["answer"]
+    assert provider.calls == 1
+
+
+def test_explain_stream_uses_one_provider_call(provider):
+    messages = [
+        {"role": "user", "content": "What is osmosis?"},
+        {"role": "assistant", "content": "Water moving across a membrane."},
+        {"role": "user", "content": "Why does it happen?"},
+    ]
+
+    response = TestClient(app).post("/ai/explain/stream", json={"messages": messages})
+
+    assert response.status_code == 200
+    assert "event: done" in response.text
+    assert provider.calls == 1
+
+
+class AnsweredQuestions:
+    """Stands in for DatabaseService: the profile, bank and answered-question lookups"""
+
+    def __init__(self, bank):
+        self.bank = bank
+        self.asked_for = []
+
+    def get_user_by_email(self, email):
+        return {"user_id": 7, "email": email}
+
+    def get_question_bank(self, user_id):
+        self.asked_for.append(user_id)
+        return self.bank
+
+    def get_answered_question_ids(self, user_id):
+        self.asked_for.append(user_id)
+        return [1]
+
+
+def test_topic_quiz_skips_questions_of_the_signed_in_user(provider, monkeypatch):
+    bank = QuestionBank(min_coverage=1.0)
+    bank.add([
+        {"question_id": i, "quiz_id": 1, "quiz_question": f"Which gas do plants release in photosynthesis step {i}?",
+         "correct_answer": "Oxygen", "options": ["Oxygen", "Nitrogen"]}
+        for i in range(1, 7)
+    ])
+    service = AnsweredQuestions(bank)
+    monkeypatch.setattr(async_db, "_service", service)
+    profile_cache.clear()
+    token = jwt.encode(
+        {"sub": "auth-7", "email": "sam@example.com", "aud": settings.SUPABASE_JWT_AUDIENCE,
+         "exp": int(time.time()) + 3600},
+        settings.SUPABASE_JWT_SECRET, algorithm="HS256",
+    )
+    # A user_id in the body is not trusted; only the token says who is asking
+    body = {"messages": [{"role": "user", "content": "Quiz me on photosynthesis"}], "user_id": "99"}
+
+    response = TestClient(app).post("/ai/explain", json=body, headers={"Authorization": f"Bearer {token}"})
+    profile_cache.clear()
+
+    assert response.status_code == 200
+    assert service.asked_for == ["7", "7"]
+    assert "step 1?" not in json.dumps(response.json()["quiz"])
+    assert provider.calls == 0
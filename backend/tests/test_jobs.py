@@ -0,0 +1,44 @@
+import asyncio
+import tempfile
+
+from app.services.jobs import SUCCEEDED, JobQueue, JobStore
+
+
+def queue(path):
+    return JobQueue(JobStore(str(path), lease=30, result_ttl=60), workers=1, max_attempts=1,
+                    retry_backoff=0, max_queued=10, poll_interval=30)
+
+
+def test_every_concurrent_waiter_sees_the_finish(tmp_path):
+    jobs = queue(tmp_path / "jobs.sqlite3")
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def handler(payload):
+            await gate.wait()
+            return payload
+
+        jobs.register("echo", handler)
+        job = await jobs.submit("echo", {"n": 1})
+        # One long-poll returns on its own timeout while the others keep waiting
+        short = asyncio.create_task(jobs.wait(job["job_id"], timeout=0.05))
+        waiters = [asyncio.create_task(jobs.wait(job["job_id"], timeout=10)) for _ in range(3)]
+        jobs.start()
+        await short
+        gate.set()
+        try:
+            # The poll interval is 30s, so only the finish event can wake them in time
+            return await asyncio.wait_for(asyncio.gather(*waiters), timeout=5)
+        finally:
+            await jobs.stop()
+
+    finished = asyncio.run(run())
+    assert [job["status"] for job in finished] == [SUCCEEDED] * 3
+    assert jobs._finished == {} and jobs._waiters == {}
+
+
+def test_store_in_temp_dir_is_not_durable(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    assert not queue(tmp_path / "tmp" / "jobs.sqlite3").durable
+    assert queue(tmp_path / "data" / "jobs.sqlite3").durable
@@ -0,0 +1,114 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.pagination import InvalidCursorError, decode_cursor, encode_cursor, keyset_page
+
+# The or() tree keyset_page sends: sort.op."v",and(sort.eq."v",id.op."i")
+_TREE = re.compile(r'^(\w+)\.(lt|gt)\."((?:[^"\\]|\\.)*)",and\(\1\.eq\."((?:[^"\\]|\\.)*)",(\w+)\.\2\."((?:[^"\\]|\\.)*)"\)$')
+
+
+def unquote(text):
+    return re.sub(r"\\(.)", r"\1", text)
+
+
+class Rows:
+    """Just enough of a PostgREST query to run keyset_page over a list"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.tree = None
+        self.ordering = []
+        self.count = None
+
+    def or_(self, tree):
+        self.tree = tree
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        rows = list(self.rows)
+        if self.tree:
+            sort_col, op, sort_value, tie_value, id_col, id_value = _TREE.match(self.tree).groups()
+            assert sort_value == tie_value
+            before = op == "lt"
+
+            def past(row):
+                key = (row[sort_col], row[id_col])
+                cursor = (type(row[sort_col])(unquote(sort_value)), type(row[id_col])(unquote(id_value)))
+                return key < cursor if before else key > cursor
+            rows = [row for row in rows if past(row)]
+        for column, desc in reversed(self.ordering):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        return SimpleNamespace(data=rows[:self.count])
+
+
+# Ties on the sort column, and ids that sort differently as text
+ROWS = [{"id": i, "created_at": f"2026-10-18T10:00:0{i // 3}+00:00"} for i in range(1, 12)]
+
+
+def page(descending=False, **kwargs):
+    return keyset_page(Rows(ROWS), "created_at", "id", descending=descending, limit=4, **kwargs)
+
+
+def test_cursor_round_trip():
+    row = {"created_at": '2026-10-18T10:00:00+00:00 "quoted" é', "id": 10}
+    token = encode_cursor(row, "created_at", "id")
+    assert "=" not in token
+    assert decode_cursor(token) == (row["created_at"], 10)
+
+
+@pytest.mark.parametrize("token", ["not base64!", "bm90IGpzb24", "WzFd"])
+def test_bad_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token)
+
+
+def test_or_filter_quotes_values():
+    query = Rows([])
+    cursor = encode_cursor({"created_at": 'a,b."c"\\d', "id": 7}, "created_at", "id")
+    keyset_page(query, "created_at", "id", descending=True, limit=5, after=cursor)
+    assert query.tree == ('created_at.lt."a,b.\\"c\\"\\\\d",'
+                          'and(created_at.eq."a,b.\\"c\\"\\\\d",id.lt."7")')
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_walk_forward_then_back(descending):
+    expected = sorted(ROWS, key=lambda row: (row["created_at"], row["id"]), reverse=descending)
+
+    pages, result = [], page(descending)
+    assert result["prev_cursor"] is None
+    while True:
+        pages.append(result["items"])
+        if result["next_cursor"] is None:
+            break
+        result = page(descending, after=result["next_cursor"])
+    assert [row for items in pages for row in items] == expected
+
+    # Back from the last page returns the same pages in reverse
+    back = [pages[-1]]
+    while result["prev_cursor"] is not None:
+        result = page(descending, before=result["prev_cursor"])
+        back.append(result["items"])
+    assert back[::-1] == pages
+
+
+def test_tail_starts_at_the_end():
+    result = page(tail=True)
+    assert [row["id"] for row in result["items"]] == [8, 9, 10, 11]
+    assert result["next_cursor"] is None
+    assert [row["id"] for row in page(before=result["prev_cursor"])["items"]] == [4, 5, 6, 7]
+
+
+def test_before_and_after_together_are_rejected():
+    token = encode_cursor(ROWS[0], "created_at", "id")
+    with pytest.raises(InvalidCursorError):
+        page(before=token, after=token)
@@ -0,0 +1,53 @@
+from benchmarks.memory_db import InMemoryDatabaseService
+
+from app.services.question_bank import QuestionBank, UserQuestionBanks
+
+TOPIC = "photosynthesis"
+
+
+def store_quiz(service, user_id, title, count=5):
+    session = service.create_session(user_id, title, "chat")
+    quiz = service.create_quiz(session["session_id"], count)
+    service.create_questions_batch([
+        {"quiz_id": quiz["quiz_id"], "quiz_question": f"What do chloroplasts make, part {i}?",
+         "correct_answer": "Glucose", "options": ["Glucose", "Salt", "Iron", "Wax"]}
+        for i in range(count)
+    ])
+    return quiz
+
+
+def test_each_user_is_served_only_their_own_questions():
+    service = InMemoryDatabaseService()
+    service.question_banks = UserQuestionBanks(min_coverage=1.0, ttl=60, max_users=10, page_size=2)
+    store_quiz(service, 1, "Photosynthesis")
+
+    assert service.get_question_bank(1).can_fill(TOPIC, 5)
+    assert not service.get_question_bank(2).can_fill(TOPIC, 5)
+    assert len(service.get_question_bank(2)) == 0
+
+
+def test_default_session_titles_are_not_topics():
+    bank = QuestionBank(min_coverage=1.0)
+    rows = [{"question_id": i, "quiz_id": "q", "quiz_question": f"What do chloroplasts make, part {i}?",
+             "correct_answer": "Glucose", "options": ["Glucose", "Salt"]} for i in range(5)]
+
+    bank.add(rows, {"q": "New Chat"})
+
+    assert not bank.can_fill("new chat", 5)
+    assert bank.can_fill("chloroplasts", 5)
+
+
+def test_writing_to_a_quiz_rebuilds_its_owners_bank():
+    service = InMemoryDatabaseService()
+    banks = service.question_banks = UserQuestionBanks(min_coverage=1.0, ttl=60, max_users=10, page_size=100)
+    quiz = store_quiz(service, 1, "Photosynthesis", count=3)
+    assert not service.get_question_bank(1).can_fill(TOPIC, 5)
+
+    service.create_questions_batch([
+        {"quiz_id": quiz["quiz_id"], "quiz_question": f"Where does photosynthesis happen, part {i}?",
+         "correct_answer": "Leaves", "options": ["Leaves", "Roots"]}
+        for i in range(2)
+    ])
+
+    assert service.get_question_bank(1).can_fill(TOPIC, 5)
+    assert banks.builds == 2
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from app.services.quiz_cache import QuizCache
+
+
+def test_async_disk_tier_runs_off_the_event_loop(tmp_path):
+    cache = QuizCache(enabled=True, max_entries=10, ttl=60, disk_path=str(tmp_path / "cache.sqlite3"))
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(cache.disk, name)
+
+        def recorded(*args, _method=method):
+            threads.append(threading.current_thread())
+            return _method(*args)
+        setattr(cache.disk, name, recorded)
+
+    async def run():
+        await cache.aset("k", [{"question": "Q"}])
+        cache.memory.clear()
+        first = await cache.aget("k")
+        second = await cache.aget("k")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second == [{"question": "Q"}]
+    assert cache.disk_hits == 1 and cache.memory_hits == 1
+    assert threads and threading.main_thread() not in threads
+
+
+def test_aget_miss_and_bypass(tmp_path):
+    cache = QuizCache(enabled=True, max_entries=10, ttl=60, disk_path=str(tmp_path / "cache.sqlite3"))
+    assert asyncio.run(cache.aget("absent")) is None
+    assert asyncio.run(cache.aget("absent", bypass=True)) is None
+    assert (cache.misses, cache.bypassed) == (1, 1)
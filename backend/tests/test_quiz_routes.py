@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.main import app
+from app.services.async_db import async_db
+
+
+class Answers:
+    """Stands in for DatabaseService: the one lookup the answers route makes"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.asked_for = []
+
+    def get_quiz_answers(self, quiz_id, columns="*"):
+        self.asked_for.append(quiz_id)
+        return self.rows
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    def install(rows):
+        service = Answers(rows)
+        monkeypatch.setattr(async_db, "_service", service)
+        return service
+    return install
+
+
+def test_quiz_answers_come_from_the_service(answers):
+    rows = [{"user_answer_id": 1, "question_id": 11, "answer": "4", "is_correct": True}]
+    service = answers(rows)
+
+    response = TestClient(app).get("/api/quizzes/7/answers")
+
+    assert response.status_code == 200
+    assert response.json() == {"answers": rows}
+    assert service.asked_for == ["7"]
+
+
+def test_quiz_without_answers_is_404(answers):
+    answers([])
+    assert TestClient(app).get("/api/quizzes/7/answers").status_code == 404
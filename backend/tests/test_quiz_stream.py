@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from app.services.quiz_stream import IncrementalArrayParser, stream_questions
+
+ITEMS = [
+    {"question": "Which brace closes {this}?", "options": ["}", "]"], "answer": "}"},
+    {"question": 'Say "hi" \\ then [leave]', "meta": {"tags": ["a", {"b": "}"}], "n": 2}},
+    {"question": "Unicode é and \\u escapes", "answer": "\\"},
+]
+TEXT = "Here is your quiz:\n```json\n" + json.dumps(ITEMS, indent=2) + "\n```"
+
+
+def parse(chunks):
+    parser = IncrementalArrayParser()
+    objects = []
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    return objects
+
+
+def test_whole_text():
+    assert parse([TEXT]) == ITEMS
+
+
+def test_every_two_way_split():
+    # Covers splits inside strings, between a backslash and what it escapes, and inside nested objects
+    for cut in range(len(TEXT)):
+        assert parse([TEXT[:cut], TEXT[cut:]]) == ITEMS, cut
+
+
+def test_one_character_at_a_time():
+    assert parse(TEXT) == ITEMS
+
+
+def test_objects_are_returned_as_they_close():
+    raw = json.dumps(ITEMS)
+    parser = IncrementalArrayParser()
+    first_end = raw.index("}, {") + 1
+    assert parser.feed(raw[:first_end]) == ITEMS[:1]
+    assert parser.feed(raw[first_end:]) == ITEMS[1:]
+
+
+def test_trailing_garbage_after_the_array_is_ignored():
+    parser = IncrementalArrayParser()
+    assert parser.feed(json.dumps(ITEMS[:1]) + " and also [{\"x\": 1}]") == ITEMS[:1]
+    assert parser.feed('{"question": "late"}') == []
+
+
+def test_malformed_object_is_skipped():
+    assert parse(['[{"a": 1,}, ', '{"b": 2}]']) == [{"b": 2}]
+
+
+def test_stream_questions_skips_invalid_items():
+    good = {"question": "2 + 2?", "options": ["3", "4", "5", "6"], "answer": "4"}
+
+    async def chunks():
+        text = json.dumps([good, {"question": "no options"}])
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+
+    async def collect():
+        return [q async for q in stream_questions(chunks())]
+
+    questions = asyncio.run(collect())
+    assert [q.question for q in questions] == ["2 + 2?"]
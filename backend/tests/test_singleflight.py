@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight("test")
+    runs = []
+
+    async def fn():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"quiz": len(runs)}
+
+    async def run():
+        return await asyncio.gather(*(flights.do("key", fn) for _ in range(5)), flights.do("other", fn))
+
+    *shared, other = asyncio.run(run())
+    assert len(runs) == 2
+    assert all(result is shared[0] for result in shared)
+    assert other is not shared[0]
+    assert flights.stats() == {"calls": 6, "shared": 4, "in_flight": 0}
+
+
+def test_exception_reaches_every_waiter_and_the_key_is_released():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("provider down")
+
+    async def run():
+        results = await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+        # Once finished, the next call starts afresh
+        retried = await flights.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, retried
+
+    results, retried = asyncio.run(run())
+    assert [type(r) for r in results] == [ValueError] * 3
+    assert len({id(r) for r in results}) == 1
+    assert retried == "ok"
+
+
+def test_cancelled_leader_does_not_cancel_the_others():
+    flights = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flights.do("key", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "done"
@@ -0,0 +1,60 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services.supabase_client import SupabasePool
+
+
+def pool(**overrides):
+    options = dict(url="http://127.0.0.1:9", key="test", pool_size=2, keepalive_expiry=1,
+                   timeout=0.05, reconnect_interval=60)
+    return SupabasePool(**{**options, **overrides})
+
+
+def test_callers_that_saw_the_same_broken_pool_reconnect_once():
+    shared = pool()
+    shared.connect()
+    broken, old_http = shared.generation, shared._http
+    barrier = threading.Barrier(16)
+
+    def fail():
+        barrier.wait()
+        shared.reconnect(broken)
+
+    threads = [threading.Thread(target=fail) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert shared.reconnects == 1
+    assert shared.generation == broken + 1
+    # The old pool is closed once in-flight requests have had `timeout` to finish
+    time.sleep(0.2)
+    assert old_http.is_closed
+    assert not shared._http.is_closed
+    shared.close()
+
+
+def test_reconnects_are_rate_limited():
+    shared = pool()
+    shared.connect()
+
+    assert shared.reconnect(shared.generation)
+    assert not shared.reconnect(shared.generation)
+    assert shared.reconnects == 1
+    shared.close()
+
+
+def test_auth_sessions_do_not_touch_the_shared_client():
+    shared = pool()
+    auth = shared.auth_client()
+
+    # What supabase-py does when sign_in_with_password succeeds on a client
+    auth._listen_to_auth_events("SIGNED_IN", SimpleNamespace(access_token="user-token"))
+
+    assert auth.options.headers["Authorization"] == "Bearer user-token"
+    assert shared.client.options.headers["Authorization"] == "Bearer test"
+    assert shared.client.postgrest.headers["Authorization"] == "Bearer test"
+    assert auth.options.httpx_client is shared._http
+    shared.close()
@@ -1,5 +1,6 @@
 import { Message } from "../types/types";
 import { QuizQuestion } from "../types/types";
+import { AuthService } from "../lib/auth";
 
 const API_BASE = process.env.NEXT_PUBLIC_API_BASE_URL || "https://quiz-craft-api.vercel.app" || "https://quizcraft-api.onrender.com";
 
@@ -69,9 +70,14 @@ export const messageApi = {
 
 export const aiApi = {
   explain: async (messages: Message[]) => {
+    // Signed-in users get topic quizzes that skip questions they have answered
+    const token = AuthService.getToken();
     const res = await fetch(`${API_BASE}/ai/explain`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: {
+        "Content-Type": "application/json",
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
       body: JSON.stringify({ messages }),
     });
     if (!res.ok) throw new Error("Failed to get AI response");
@@ -100,6 +106,7 @@ export const quizApi = {
       quiz_id: quizId,
       quiz_question: q.question,
       correct_answer: q.correct_answer || q.answer,  // Handle both field names
+      options: q.options,
     }));
 
     console.log("Storing questions:", questionsData);  // Debug log